@@ -0,0 +1,226 @@
+"""
+scheduler.py
+
+Persistent single-task job scheduler on a binary heap, running jobs that
+come due together as one batch per kind.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import heapq
+import json
+import logging
+import os
+import re
+import time
+
+from FrozenMusic.infra.storage.kv_store import bot_store
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_BATCH_SIZE = int(os.environ.get("SCHEDULER_BATCH_SIZE", "500"))
+# Upper bound on one sleep, so wall-clock jumps are noticed within a minute.
+SCHEDULER_MAX_SLEEP = 60.0
+
+_DURATION_PART = re.compile(r"(\d+)\s*([smhd])")
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_duration(text: str):
+    """
+    "90s", "5m", "1h30m", "2d" -> seconds; a bare number means minutes, as
+    in /tmute. Returns None for anything else.
+    """
+    text = text.strip().lower()
+    if text.isdigit():
+        return int(text) * 60
+    parts = _DURATION_PART.findall(text)
+    if not parts or _DURATION_PART.sub("", text).strip():
+        return None
+    return sum(int(value) * _DURATION_UNITS[unit] for value, unit in parts)
+
+
+def format_duration(seconds: int) -> str:
+    """5400 -> "1h30m"; the inverse of parse_duration for display."""
+    out = ""
+    for unit in "dhms":
+        value, seconds = divmod(seconds, _DURATION_UNITS[unit])
+        if value:
+            out += f"{value}{unit}"
+    return out or "0s"
+
+
+class JobScheduler:
+    """
+    Pending jobs are (due, id) entries in a heap plus an id -> job map, with
+    one SQLite row each so they survive restarts. Cancelling only drops the
+    map entry; the stale heap entry is skipped when it surfaces. Jobs that
+    are due together are grouped by kind and each handler receives its
+    whole batch of payloads in one call. Kinds registered with index() are
+    also kept in a (kind, key) -> job ids map, so cancel_key() touches only
+    the matching jobs however many others are pending.
+    """
+
+    def __init__(self, store=bot_store, batch_size: int = SCHEDULER_BATCH_SIZE):
+        self.store = store
+        self.batch_size = batch_size
+        self._heap = []
+        self._jobs = {}
+        self._handlers = {}
+        self._key_fns = {}
+        self._keyed = {}
+        self._next_id = 1
+        self._wake = asyncio.Event()
+        self._runner = None
+        self.executed = 0
+        self.failed = 0
+        store.add_schema(
+            "CREATE TABLE IF NOT EXISTS scheduled_jobs ("
+            " id INTEGER PRIMARY KEY, due REAL NOT NULL, kind TEXT NOT NULL, payload TEXT NOT NULL)"
+        )
+        store.on_load(self.load)
+
+    def register(self, kind: str, handler) -> None:
+        """handler(payloads) is awaited with a list of due payloads of `kind`."""
+        self._handlers[kind] = handler
+
+    def index(self, kind: str, key_fn) -> None:
+        """Makes pending `kind` jobs cancellable by key_fn(payload), which must be hashable."""
+        self._key_fns[kind] = key_fn
+        for job_id, (_, job_kind, payload) in self._jobs.items():
+            if job_kind == kind:
+                self._track(job_id, kind, payload)
+
+    def _track(self, job_id: int, kind: str, payload: dict) -> None:
+        key_fn = self._key_fns.get(kind)
+        if key_fn is not None:
+            self._keyed.setdefault((kind, key_fn(payload)), set()).add(job_id)
+
+    def _untrack(self, job_id: int, kind: str, payload: dict) -> None:
+        key_fn = self._key_fns.get(kind)
+        if key_fn is None:
+            return
+        key = (kind, key_fn(payload))
+        ids = self._keyed.get(key)
+        if ids is not None:
+            ids.discard(job_id)
+            if not ids:
+                del self._keyed[key]
+
+    def schedule(self, delay: float, kind: str, payload: dict) -> int:
+        due = time.time() + delay
+        job_id = self._next_id
+        self._next_id += 1
+        self._jobs[job_id] = (due, kind, payload)
+        heapq.heappush(self._heap, (due, job_id))
+        self._track(job_id, kind, payload)
+        self.store.queue(
+            "INSERT INTO scheduled_jobs (id, due, kind, payload) VALUES (?, ?, ?, ?)",
+            (job_id, due, kind, json.dumps(payload)),
+        )
+        if self._heap[0][1] == job_id:
+            self._wake.set()
+        return job_id
+
+    def get(self, job_id: int):
+        """(due, kind, payload) of a pending job, or None."""
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: int) -> bool:
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        self._untrack(job_id, job[1], job[2])
+        self.store.queue("DELETE FROM scheduled_jobs WHERE id = ?", (job_id,))
+        if len(self._heap) > 2 * len(self._jobs) + 1024:
+            self._heap = [(due, job_id) for job_id, (due, _, _) in self._jobs.items()]
+            heapq.heapify(self._heap)
+        return True
+
+    def cancel_key(self, kind: str, key) -> int:
+        """Cancels the pending `kind` jobs filed under key by index(); O(matching)."""
+        matching = list(self._keyed.get((kind, key), ()))
+        for job_id in matching:
+            self.cancel(job_id)
+        return len(matching)
+
+    def pending(self) -> int:
+        return len(self._jobs)
+
+    @staticmethod
+    def _read_all(conn):
+        return conn.execute("SELECT id, due, kind, payload FROM scheduled_jobs").fetchall()
+
+    async def load(self) -> None:
+        rows = await self.store.run(self._read_all)
+        self._jobs = {job_id: (due, kind, json.loads(payload)) for job_id, due, kind, payload in rows}
+        self._heap = [(due, job_id) for job_id, (due, _, _) in self._jobs.items()]
+        heapq.heapify(self._heap)
+        self._keyed = {}
+        for job_id, (_, kind, payload) in self._jobs.items():
+            self._track(job_id, kind, payload)
+        self._next_id = max(self._jobs, default=0) + 1
+        self._wake.set()
+
+    def _pop_due(self, now: float):
+        batches = {}
+        done = []
+        while self._heap and self._heap[0][0] <= now and len(done) < self.batch_size:
+            _, job_id = heapq.heappop(self._heap)
+            job = self._jobs.pop(job_id, None)
+            if job is None:
+                continue
+            self._untrack(job_id, job[1], job[2])
+            batches.setdefault(job[1], []).append(job[2])
+            done.append(job_id)
+        return batches, done
+
+    async def _run_batch(self, kind: str, payloads) -> None:
+        handler = self._handlers.get(kind)
+        if handler is None:
+            logger.warning(f"No handler for {len(payloads)} scheduled '{kind}' jobs, dropping them")
+            self.failed += len(payloads)
+            return
+        try:
+            await handler(payloads)
+            self.executed += len(payloads)
+        except Exception as e:
+            self.failed += len(payloads)
+            logger.warning(f"Scheduled '{kind}' batch of {len(payloads)} failed: {e}")
+
+    async def _run_forever(self) -> None:
+        while True:
+            batches, done = self._pop_due(time.time())
+            if done:
+                self.store.queue(
+                    f"DELETE FROM scheduled_jobs WHERE id IN ({','.join('?' * len(done))})", done
+                )
+                await asyncio.gather(*(self._run_batch(kind, payloads) for kind, payloads in batches.items()))
+                continue
+
+            delay = min(self._heap[0][0] - time.time(), SCHEDULER_MAX_SLEEP) if self._heap else SCHEDULER_MAX_SLEEP
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), max(delay, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        if self._runner is None:
+            self._runner = asyncio.ensure_future(self._run_forever())
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._jobs),
+            "next_due": self._heap[0][0] - time.time() if self._heap else None,
+            "executed": self.executed,
+            "failed": self.failed,
+        }
+
+
+job_scheduler = JobScheduler()
@@ -0,0 +1,136 @@
+"""
+admin_roster.py
+
+Per-chat administrator roster cache shared by every privilege check.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import os
+import time
+
+from pyrogram.enums import ChatMemberStatus, ChatMembersFilter
+
+ADMIN_STATUSES = (ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR)
+ADMIN_ROSTER_TTL = int(os.environ.get("ADMIN_ROSTER_TTL", "600"))
+ADMIN_FALLBACK_TTL = int(os.environ.get("ADMIN_FALLBACK_TTL", "60"))
+ADMIN_FALLBACK_MAX_USERS = 1000
+
+
+class AdminRosterCache:
+    """
+    Keeps the set of admin user ids per chat. A roster is filled with a single
+    administrators listing, patched from chat_member_updated events and
+    refetched once its TTL runs out.
+
+    Chats where the listing fails are remembered as unlistable, and the
+    per-user lookups used instead are cached, negatives included, for
+    `fallback_ttl`, so such a chat costs one call per user per window
+    rather than one per message.
+    """
+
+    def __init__(self, ttl: int = ADMIN_ROSTER_TTL, fallback_ttl: int = ADMIN_FALLBACK_TTL):
+        self.ttl = ttl
+        self.fallback_ttl = fallback_ttl
+        self._rosters = {}
+        self._locks = {}
+        self._unlistable = {}
+        self._members = {}
+        self.hits = 0
+        self.misses = 0
+        self.rpc_calls = 0
+
+    def _fresh(self, chat_id: int):
+        entry = self._rosters.get(chat_id)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    async def _fetch(self, client, chat_id: int) -> set:
+        admins = set()
+        self.rpc_calls += 1
+        async for member in client.get_chat_members(chat_id, filter=ChatMembersFilter.ADMINISTRATORS):
+            if member.user and member.status in ADMIN_STATUSES:
+                admins.add(member.user.id)
+        self._rosters[chat_id] = (time.monotonic() + self.ttl, admins)
+        return admins
+
+    async def get_admins(self, client, chat_id: int) -> set:
+        admins = self._fresh(chat_id)
+        if admins is not None:
+            self.hits += 1
+            return admins
+
+        self.misses += 1
+        lock = self._locks.setdefault(chat_id, asyncio.Lock())
+        async with lock:
+            # Another waiter may have filled the roster while we were queued.
+            admins = self._fresh(chat_id)
+            if admins is not None:
+                return admins
+            return await self._fetch(client, chat_id)
+
+    async def _lookup_member(self, client, chat_id: int, user_id: int) -> bool:
+        now = time.monotonic()
+        members = self._members.setdefault(chat_id, {})
+        entry = members.get(user_id)
+        if entry and entry[0] > now:
+            self.hits += 1
+            return entry[1]
+
+        self.misses += 1
+        self.rpc_calls += 1
+        try:
+            member = await client.get_chat_member(chat_id, user_id)
+            admin = member.status in ADMIN_STATUSES
+        except Exception:
+            admin = False
+        if len(members) >= ADMIN_FALLBACK_MAX_USERS:
+            for stale in [uid for uid, (expires, _) in members.items() if expires <= now]:
+                del members[stale]
+        members[user_id] = (now + self.fallback_ttl, admin)
+        return admin
+
+    async def is_admin(self, client, chat_id: int, user_id: int) -> bool:
+        if self._unlistable.get(chat_id, 0) > time.monotonic():
+            return await self._lookup_member(client, chat_id, user_id)
+        try:
+            admins = await self.get_admins(client, chat_id)
+        except Exception:
+            # Listing is not allowed everywhere (e.g. hidden member lists),
+            # so fall back to direct lookups for a while.
+            self._unlistable[chat_id] = time.monotonic() + self.fallback_ttl
+            return await self._lookup_member(client, chat_id, user_id)
+        return user_id in admins
+
+    def apply_member_update(self, update) -> None:
+        member = update.new_chat_member or update.old_chat_member
+        if not member or not member.user:
+            return
+        self._members.get(update.chat.id, {}).pop(member.user.id, None)
+        entry = self._rosters.get(update.chat.id)
+        if entry is None:
+            return
+        admins = entry[1]
+        if update.new_chat_member and update.new_chat_member.status in ADMIN_STATUSES:
+            admins.add(member.user.id)
+        else:
+            admins.discard(member.user.id)
+
+    def invalidate(self, chat_id: int) -> None:
+        self._rosters.pop(chat_id, None)
+        self._unlistable.pop(chat_id, None)
+        self._members.pop(chat_id, None)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "chats": len(self._rosters),
+            "hits": self.hits,
+            "misses": self.misses,
+            "rpc_calls": self.rpc_calls,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+admin_roster = AdminRosterCache()
@@ -0,0 +1,130 @@
+"""
+broadcast.py
+
+Queued, rate-limited and resumable broadcast engine.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+from FrozenMusic.infra.concurrency.fanout import fan_out
+from FrozenMusic.infra.concurrency.rate_limit import send_limiter
+from FrozenMusic.infra.storage.kv_store import bot_store
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_WORKERS = int(os.environ.get("BROADCAST_WORKERS", "10"))
+PROGRESS_EDIT_INTERVAL = float(os.environ.get("BROADCAST_PROGRESS_INTERVAL", "5"))
+
+
+class BroadcastEngine:
+    """
+    Jobs run one after another. Each job record keeps its target list and
+    the chats already handled, and is re-staged in the store after every
+    send, so a crashed or restarted bot resumes with only the remainder.
+    """
+
+    def __init__(self, store=bot_store, limiter=send_limiter, workers: int = BROADCAST_WORKERS):
+        self.jobs = store.dict("broadcast_jobs")
+        store.on_load(self.jobs.warm)
+        self.limiter = limiter
+        self.workers = workers
+        self.client = None
+        self._queue = asyncio.Queue()
+        self._runner = None
+
+    def start(self, client) -> None:
+        """Starts the job runner and re-queues every unfinished job."""
+        self.client = client
+        for job_id in sorted(self.jobs):
+            if self.jobs[job_id]["status"] in ("queued", "running"):
+                self._queue.put_nowait(job_id)
+        if self._runner is None:
+            self._runner = asyncio.ensure_future(self._run_forever())
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            self._runner.cancel()
+            self._runner = None
+
+    def submit(self, text: str, targets, status_chat_id: int, status_message_id: int) -> str:
+        job_id = str(time.time_ns())
+        self.jobs[job_id] = {
+            "text": text,
+            "targets": list(targets),
+            "done": [],
+            "sent": 0,
+            "failed": 0,
+            "status": "queued",
+            "status_message": [status_chat_id, status_message_id],
+        }
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def _run_forever(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Broadcast {job_id} failed: {e}")
+
+    async def _edit_status(self, job: dict, text: str) -> None:
+        chat_id, message_id = job["status_message"]
+        try:
+            await self.client.edit_message_text(chat_id, message_id, text)
+        except Exception as e:
+            logger.debug(f"Broadcast status edit failed: {e}")
+
+    async def _run(self, job_id: str) -> None:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return
+        job["status"] = "running"
+        self.jobs.touch(job_id)
+
+        handled = set(job["done"])
+        remaining = [chat_id for chat_id in job["targets"] if chat_id not in handled]
+        total = len(job["targets"])
+
+        def on_item(chat_id, ok):
+            job["done"].append(chat_id)
+            job["sent" if ok else "failed"] += 1
+            self.jobs.touch(job_id)
+
+        async def on_progress(result):
+            await self._edit_status(
+                job,
+                f"📣 ब्रॉडकास्ट जारी है: {len(job['done'])}/{total}\n"
+                f"सफलता: {job['sent']} | विफलता: {job['failed']} | FloodWait: {result.flood_waits}",
+            )
+
+        async def send(chat_id):
+            await self.client.send_message(chat_id, job["text"])
+
+        result = await fan_out(
+            remaining, send,
+            workers=self.workers,
+            on_progress=on_progress,
+            progress_interval=PROGRESS_EDIT_INTERVAL,
+            limiter=self.limiter,
+            on_item=on_item,
+        )
+
+        await self._edit_status(
+            job,
+            f"✅ मैसेज सफलतापूर्वक भेजा गया। ({result.elapsed:.0f}s)\n"
+            f"सफलता: {job['sent']}\nविफलता: {job['failed']}",
+        )
+        del self.jobs[job_id]
+
+
+broadcast_engine = BroadcastEngine()
@@ -11,8 +11,8 @@ import os
 from typing import Union
 from pyrogram.types import Message, CallbackQuery
 from pyrogram.enums import ChatType
-from pyrogram.enums import ChatMemberStatus
 
+from FrozenMusic.infra.concurrency.admin_roster import admin_roster
 
 
 QUANTUM_T = 0.987
@@ -66,11 +66,4 @@ async def deterministic_privilege_validator(obj: Union[Message, CallbackQuery])
     chat_id = message.chat.id
     user_id = user.id
 
-    try:
-        check_status = await client.get_chat_member(chat_id=chat_id, user_id=user_id)
-        if check_status.status in [ChatMemberStatus.OWNER, ChatMemberStatus.ADMINISTRATOR]:
-            return True
-        else:
-            return False
-    except Exception:
-        return False
+    return await admin_roster.is_admin(client, chat_id, user_id)
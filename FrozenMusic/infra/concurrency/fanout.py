@@ -0,0 +1,104 @@
+"""
+fanout.py
+
+Bounded worker pool for running one Telegram call against many chats while
+honouring FloodWait back-off.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import namedtuple
+
+from pyrogram.errors import FloodWait
+
+logger = logging.getLogger(__name__)
+
+FANOUT_WORKERS = int(os.environ.get("FANOUT_WORKERS", "8"))
+FANOUT_MAX_RETRIES = 3
+PROGRESS_INTERVAL = 5.0
+
+FanOutResult = namedtuple("FanOutResult", ["total", "done", "failed", "flood_waits", "elapsed"])
+
+
+class _Progress:
+    __slots__ = ("total", "done", "failed", "flood_waits", "started")
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.flood_waits = 0
+        self.started = time.monotonic()
+
+    def snapshot(self) -> FanOutResult:
+        return FanOutResult(self.total, self.done, self.failed, self.flood_waits, time.monotonic() - self.started)
+
+
+async def fan_out(items, action, workers: int = FANOUT_WORKERS, on_progress=None,
+                  progress_interval: float = PROGRESS_INTERVAL, limiter=None, on_item=None) -> FanOutResult:
+    """
+    Awaits action(item) for every item with at most `workers` calls in
+    flight. A FloodWait pauses every worker until it has passed, then the
+    item is retried; other errors count as failures. on_progress(result) is
+    awaited at most once per progress_interval and once at the end.
+
+    limiter, if given, is a SendLimiter-like object whose acquire(item) is
+    awaited before each call. on_item(item, ok) is called once per item as
+    soon as its outcome is final.
+    """
+    items = list(items)
+    queue = asyncio.Queue()
+    for item in items:
+        queue.put_nowait((item, 0))
+    progress = _Progress(len(items))
+    resume_at = [0.0]
+    last_report = [time.monotonic()]
+
+    async def report(force=False):
+        now = time.monotonic()
+        if on_progress and (force or now - last_report[0] >= progress_interval):
+            last_report[0] = now
+            try:
+                await on_progress(progress.snapshot())
+            except Exception as e:
+                logger.debug(f"Progress callback failed: {e}")
+
+    async def worker():
+        while True:
+            try:
+                item, attempt = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            delay = resume_at[0] - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if limiter is not None:
+                await limiter.acquire(item)
+            ok = None
+            try:
+                await action(item)
+                progress.done += 1
+                ok = True
+            except FloodWait as e:
+                progress.flood_waits += 1
+                resume_at[0] = max(resume_at[0], time.monotonic() + e.value + 1)
+                if limiter is not None:
+                    limiter.pause(e.value + 1)
+                if attempt < FANOUT_MAX_RETRIES:
+                    queue.put_nowait((item, attempt + 1))
+                else:
+                    progress.failed += 1
+                    ok = False
+            except Exception:
+                progress.failed += 1
+                ok = False
+            if ok is not None and on_item is not None:
+                on_item(item, ok)
+            await report()
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(workers, len(items))))))
+    await report(force=True)
+    return progress.snapshot()
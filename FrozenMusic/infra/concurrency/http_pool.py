@@ -0,0 +1,54 @@
+"""
+http_pool.py
+
+Process-wide pooled aiohttp client shared by search, backup search and downloads.
+(c) 2025 FrozenBots
+"""
+
+import os
+
+import aiohttp
+
+HTTP_POOL_LIMIT = int(os.environ.get("HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(os.environ.get("HTTP_POOL_LIMIT_PER_HOST", "20"))
+HTTP_DNS_TTL = int(os.environ.get("HTTP_DNS_TTL", "300"))
+HTTP_KEEPALIVE = float(os.environ.get("HTTP_KEEPALIVE", "30"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "10"))
+HTTP_TOTAL_TIMEOUT = float(os.environ.get("HTTP_TOTAL_TIMEOUT", "60"))
+
+SEARCH_TIMEOUT = aiohttp.ClientTimeout(
+    total=float(os.environ.get("SEARCH_TIMEOUT", "30")), connect=HTTP_CONNECT_TIMEOUT
+)
+DOWNLOAD_TIMEOUT = aiohttp.ClientTimeout(
+    total=float(os.environ.get("DOWNLOAD_TIMEOUT", "150")), connect=HTTP_CONNECT_TIMEOUT
+)
+
+_session = None
+
+
+def get_http_session() -> aiohttp.ClientSession:
+    """
+    Returns the shared session, creating it on first use. Callers must not
+    close it; use close_http_session() on shutdown instead.
+    """
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=HTTP_POOL_LIMIT,
+            limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+            ttl_dns_cache=HTTP_DNS_TTL,
+            use_dns_cache=True,
+            keepalive_timeout=HTTP_KEEPALIVE,
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=HTTP_TOTAL_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+        )
+    return _session
+
+
+async def close_http_session() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
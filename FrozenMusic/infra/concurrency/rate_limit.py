@@ -0,0 +1,75 @@
+"""
+rate_limit.py
+
+Async token buckets sized to Telegram's bot sending limits.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import os
+import time
+
+# Telegram allows roughly 30 messages/s overall and 20 messages/min per group.
+GLOBAL_SEND_RATE = float(os.environ.get("GLOBAL_SEND_RATE", "25"))
+PER_CHAT_SEND_RATE = float(os.environ.get("PER_CHAT_SEND_RATE", str(20 / 60)))
+MAX_TRACKED_CHATS = 10000
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def pause(self, seconds: float) -> None:
+        """Drains the bucket for `seconds`, e.g. after a FloodWait."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0.0
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class SendLimiter:
+    """One global bucket plus a lazily created bucket per chat."""
+
+    def __init__(self, global_rate: float = GLOBAL_SEND_RATE, per_chat_rate: float = PER_CHAT_SEND_RATE):
+        self.global_bucket = TokenBucket(global_rate)
+        self.per_chat_rate = per_chat_rate
+        self._chats = {}
+
+    async def acquire(self, chat_id: int) -> None:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self.per_chat_rate, 1.0)
+        await bucket.acquire()
+        await self.global_bucket.acquire()
+        if len(self._chats) > MAX_TRACKED_CHATS:
+            self._sweep()
+
+    def _sweep(self) -> None:
+        # A bucket idle for a full refill period holds no state worth keeping.
+        cutoff = time.monotonic() - 1 / self.per_chat_rate
+        for chat_id in [c for c, b in self._chats.items() if b.updated < cutoff]:
+            del self._chats[chat_id]
+
+    def pause(self, seconds: float) -> None:
+        self.global_bucket.pause(seconds)
+
+
+send_limiter = SendLimiter()
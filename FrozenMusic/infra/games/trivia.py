@@ -0,0 +1,180 @@
+"""
+trivia.py
+
+Trivia games indexed by (chat, question message), with normalized answer
+matching, per-game timeouts and a question bank read lazily from disk.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+TRIVIA_BANK_PATH = os.environ.get(
+    "TRIVIA_BANK_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "assets", "trivia_questions.jsonl"),
+)
+TRIVIA_TIMEOUT = float(os.environ.get("TRIVIA_TIMEOUT", "120"))
+
+# Zero-width joiners and the like change nothing a reader can see.
+_INVISIBLE = dict.fromkeys(map(ord, "\u200b\u200c\u200d\u2060\ufeff"))
+
+
+class TriviaBusy(Exception):
+    """Raised when the chat already has a game running or starting."""
+
+
+def normalize_answer(text: str) -> str:
+    """NFKC, casefold, punctuation dropped and whitespace collapsed."""
+    text = unicodedata.normalize("NFKC", text).translate(_INVISIBLE).casefold()
+    text = "".join(" " if unicodedata.category(ch).startswith("P") else ch for ch in text)
+    return " ".join(text.split())
+
+
+class QuestionBank:
+    """
+    JSON lines of {"q": question, "a": [answer, alias, ...]}. Only the byte
+    offset of each line is kept; a draw seeks to one line and parses it, so
+    the bank can be far larger than what is worth holding in memory.
+    """
+
+    def __init__(self, path: str = TRIVIA_BANK_PATH):
+        self.path = path
+        self._offsets = None
+        self._lock = asyncio.Lock()
+
+    def _index(self):
+        offsets = []
+        with open(self.path, "rb") as f:
+            position = 0
+            for line in f:
+                if line.strip():
+                    offsets.append(position)
+                position += len(line)
+        return offsets
+
+    def _read(self, offset: int) -> dict:
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            return json.loads(f.readline())
+
+    async def draw(self):
+        """A random question, or None for an empty or missing bank."""
+        if self._offsets is None:
+            async with self._lock:
+                if self._offsets is None:
+                    try:
+                        self._offsets = await asyncio.to_thread(self._index)
+                    except OSError as e:
+                        logger.warning(f"Trivia bank {self.path} unavailable: {e}")
+                        return None
+        if not self._offsets:
+            return None
+        return await asyncio.to_thread(self._read, random.choice(self._offsets))
+
+    def __len__(self):
+        return len(self._offsets or ())
+
+
+class TriviaGame:
+    __slots__ = ("chat_id", "message_id", "question", "answer", "accepted", "timer")
+
+    def __init__(self, chat_id: int, message_id: int, entry: dict):
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.question = entry["q"]
+        self.answer = entry["a"][0]
+        self.accepted = frozenset(normalize_answer(a) for a in entry["a"])
+        self.timer = None
+
+
+class TriviaEngine:
+    """
+    Active games live in a dict keyed by (chat_id, question message id), so
+    a reply that is not to a live question is one dict miss. One game runs
+    per chat; each expires after `timeout` seconds and on_expire(game) is
+    awaited to announce it.
+    """
+
+    def __init__(self, bank: QuestionBank = None, timeout: float = TRIVIA_TIMEOUT, on_expire=None):
+        self.bank = bank or QuestionBank()
+        self.timeout = timeout
+        self.on_expire = on_expire
+        self._games = {}
+        self._by_chat = {}
+        self._reserved = set()
+        self.solved = 0
+        self.expired = 0
+
+    def active_in(self, chat_id: int) -> bool:
+        return chat_id in self._by_chat or chat_id in self._reserved
+
+
+    async def draw(self):
+        return await self.bank.draw()
+
+    async def begin(self, chat_id: int, post):
+        """
+        Draws a question, awaits post(entry) -> id of the sent question and
+        starts the game; None when the bank is empty. The chat is reserved
+        before the first await, so of two concurrent calls one raises
+        TriviaBusy instead of both starting a game.
+        """
+        if self.active_in(chat_id):
+            raise TriviaBusy()
+        self._reserved.add(chat_id)
+        try:
+            entry = await self.draw()
+            if entry is None:
+                return None
+            return self.start(chat_id, await post(entry), entry)
+        finally:
+            self._reserved.discard(chat_id)
+
+    def start(self, chat_id: int, message_id: int, entry: dict) -> TriviaGame:
+        game = TriviaGame(chat_id, message_id, entry)
+        self._games[(chat_id, message_id)] = game
+        self._by_chat[chat_id] = game
+        self._reserved.discard(chat_id)
+        game.timer = asyncio.get_running_loop().call_later(self.timeout, self._expire, game)
+        return game
+
+    def _end(self, game: TriviaGame) -> None:
+        self._games.pop((game.chat_id, game.message_id), None)
+        if self._by_chat.get(game.chat_id) is game:
+            del self._by_chat[game.chat_id]
+        if game.timer is not None:
+            game.timer.cancel()
+
+    def _expire(self, game: TriviaGame) -> None:
+        if self._games.get((game.chat_id, game.message_id)) is not game:
+            return
+        self._end(game)
+        self.expired += 1
+        if self.on_expire is not None:
+            asyncio.ensure_future(self.on_expire(game))
+
+    def answer(self, chat_id: int, reply_to_message_id: int, text: str):
+        """
+        None when the reply is not to a live question; otherwise the game and
+        whether the answer was right. A right answer ends the game.
+        """
+        game = self._games.get((chat_id, reply_to_message_id))
+        if game is None:
+            return None
+        correct = normalize_answer(text) in game.accepted
+        if correct:
+            self._end(game)
+            self.solved += 1
+        return game, correct
+
+    def stats(self) -> dict:
+        return {"active": len(self._games), "bank": len(self.bank), "solved": self.solved, "expired": self.expired}
+
+
+trivia_engine = TriviaEngine()
@@ -0,0 +1,164 @@
+"""
+flood.py
+
+Constant-time per-(chat, user) flood detection with automatic escalation.
+(c) 2025 FrozenBots
+"""
+
+import os
+import time
+from collections import OrderedDict
+
+from FrozenMusic.infra.storage.kv_store import bot_store
+
+FLOOD_LIMIT = int(os.environ.get("FLOOD_LIMIT", "8"))
+FLOOD_WINDOW = float(os.environ.get("FLOOD_WINDOW", "10"))
+FLOOD_MUTE_SECONDS = int(os.environ.get("FLOOD_MUTE_SECONDS", "600"))
+FLOOD_STRIKE_TTL = float(os.environ.get("FLOOD_STRIKE_TTL", "3600"))
+FLOOD_IDLE_TTL = float(os.environ.get("FLOOD_IDLE_TTL", "900"))
+# Pipeline order of the flood check: ahead of the command table
+# (COMMAND_STAGE = 20), so commands are throttled like any other message.
+FLOOD_STAGE = 12
+
+ESCALATION = ("warn", "tmute", "ban")
+
+
+class FloodConfig:
+    __slots__ = ("limit", "window", "mute_seconds", "enabled")
+
+    def __init__(self, limit=FLOOD_LIMIT, window=FLOOD_WINDOW, mute_seconds=FLOOD_MUTE_SECONDS, enabled=True):
+        self.limit = limit
+        self.window = window
+        self.mute_seconds = mute_seconds
+        self.enabled = enabled
+
+
+class _FloodState:
+    __slots__ = ("tokens", "last", "strikes", "last_strike", "quiet_until", "throttled")
+
+    def __init__(self, tokens, now):
+        self.tokens = tokens
+        self.last = now
+        self.strikes = 0
+        self.last_strike = 0.0
+        self.quiet_until = 0.0
+        self.throttled = False
+
+
+class FloodDetector:
+    """
+    One token bucket per (chat, user): `limit` messages may burst, refilled at
+    limit/window tokens per second. Running dry is a strike; strikes walk up
+    ESCALATION and decay after FLOOD_STRIKE_TTL without a new one. Idle users
+    are dropped from the front of the LRU as new messages arrive.
+    """
+
+    def __init__(self, idle_ttl: float = FLOOD_IDLE_TTL, strike_ttl: float = FLOOD_STRIKE_TTL, store=bot_store):
+        self.idle_ttl = idle_ttl
+        self.strike_ttl = strike_ttl
+        self.configs = {}
+        self._default = FloodConfig()
+        self._states = OrderedDict()
+        self._saved = store.dict("flood_configs")
+        store.on_load(self._restore)
+
+    async def _restore(self) -> None:
+        await self._saved.warm()
+        self.configs = {
+            chat_id: FloodConfig(limit, window, FLOOD_MUTE_SECONDS, enabled)
+            for chat_id, (limit, window, enabled) in self._saved.items()
+        }
+
+    def config(self, chat_id: int) -> FloodConfig:
+        return self.configs.get(chat_id, self._default)
+
+    def configure(self, chat_id: int, limit: int = None, window: float = None, enabled: bool = True) -> FloodConfig:
+        current = self.config(chat_id)
+        self.configs[chat_id] = FloodConfig(
+            limit if limit is not None else current.limit,
+            window if window is not None else current.window,
+            current.mute_seconds,
+            enabled,
+        )
+        cfg = self.configs[chat_id]
+        self._saved[chat_id] = [cfg.limit, cfg.window, cfg.enabled]
+        return cfg
+
+    def _expire(self, now: float) -> None:
+        # Bounded per call so one message never pays for a mass expiry.
+        for _ in range(8):
+            if not self._states:
+                return
+            key, state = next(iter(self._states.items()))
+            if now - state.last < self.idle_ttl:
+                return
+            del self._states[key]
+
+    def hit(self, chat_id: int, user_id: int, now: float = None):
+        """
+        Counts one message and returns None, or the escalation step to apply
+        ("warn", "tmute" or "ban") when the user just flooded.
+        """
+        cfg = self.config(chat_id)
+        if not cfg.enabled:
+            return None
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+
+        key = (chat_id, user_id)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = _FloodState(float(cfg.limit), now)
+        else:
+            self._states.move_to_end(key)
+            state.tokens = min(cfg.limit, state.tokens + (now - state.last) * cfg.limit / cfg.window)
+            state.last = now
+
+        state.throttled = state.tokens < 1
+        if not state.throttled:
+            state.tokens -= 1
+            return None
+        if now < state.quiet_until:
+            # Same burst as the last strike; it has already been punished.
+            return None
+
+        if now - state.last_strike > self.strike_ttl:
+            state.strikes = 0
+        state.strikes += 1
+        state.last_strike = now
+        state.quiet_until = now + cfg.window
+        return ESCALATION[min(state.strikes, len(ESCALATION)) - 1]
+
+    def over_limit(self, chat_id: int, user_id: int) -> bool:
+        """True when the user's last hit found the bucket empty, strike or not."""
+        state = self._states.get((chat_id, user_id))
+        return state is not None and state.throttled
+
+    def forget(self, chat_id: int, user_id: int) -> None:
+        self._states.pop((chat_id, user_id), None)
+
+    def __len__(self):
+        return len(self._states)
+
+
+def flood_check(detector: FloodDetector, punish):
+    """
+    Pipeline stage around `detector`; await punish(client, message, action)
+    applies a fresh escalation step. Plain messages in an already-punished
+    burst still go on to the content checks; commands in it are dropped
+    without another strike.
+    """
+
+    async def check_flood(ctx) -> bool:
+        action = detector.hit(ctx.chat_id, ctx.user_id)
+        if not action:
+            return bool(ctx.command) and detector.over_limit(ctx.chat_id, ctx.user_id) and not await ctx.is_admin()
+        if await ctx.is_admin():
+            return False
+        await punish(ctx.client, ctx.message, action)
+        return True
+
+    return check_flood
+
+
+flood_detector = FloodDetector()
@@ -0,0 +1,166 @@
+"""
+policy.py
+
+Per-chat moderation policies compiled into a single-pass message matcher.
+(c) 2025 FrozenBots
+"""
+
+import os
+import re
+from collections import namedtuple
+
+from pyrogram.enums import MessageEntityType
+
+from FrozenMusic.infra.storage.kv_store import bot_store
+
+DEFAULT_PROFANITY = ("fuck", "bitch", "cunt", "chutiya", "randi")
+LINK_PATTERN = r"https?://\S+|t\.me/\S+"
+
+Verdict = namedtuple("Verdict", ["bad_link", "profanity", "restricted_file"])
+CLEAN = Verdict(False, False, False)
+
+
+def normalize_domain(raw: str) -> str:
+    """'https://Sub.Example.com/path' -> 'sub.example.com'"""
+    raw = raw.strip().lower()
+    if "://" in raw:
+        raw = raw.split("://", 1)[1]
+    raw = raw.split("/", 1)[0].split("?", 1)[0].split("#", 1)[0]
+    raw = raw.rsplit("@", 1)[-1].split(":", 1)[0]
+    return raw.strip(".")
+
+
+def _utf16_slice(encoded: bytes, offset: int, length: int) -> str:
+    # Telegram entity offsets count UTF-16 code units, not code points;
+    # `encoded` is the message text as UTF-16-LE, encoded once per message.
+    return encoded[offset * 2:(offset + length) * 2].decode("utf-16-le", errors="ignore")
+
+
+class ChatPolicy:
+    """
+    Whitelisted domains, restricted extensions and banned words for one chat.
+    The combined link/profanity regex is built on the first check after a
+    change, so every message is scanned exactly once.
+    """
+
+    def __init__(self, profanity=DEFAULT_PROFANITY):
+        self.whitelist = set()
+        self.restricted_extensions = set()
+        self.profanity = tuple(profanity)
+        self._matcher = None
+
+    def add_whitelist(self, domain: str) -> str:
+        domain = normalize_domain(domain)
+        self.whitelist.add(domain)
+        self._matcher = None
+        return domain
+
+    def restrict_extension(self, extension: str) -> str:
+        extension = extension.lower()
+        if not extension.startswith("."):
+            extension = "." + extension
+        self.restricted_extensions.add(extension)
+        self._matcher = None
+        return extension
+
+    def _compile(self):
+        words = sorted({w.lower() for w in self.profanity}, key=len, reverse=True)
+        alternatives = [f"(?P<link>{LINK_PATTERN})"]
+        if words:
+            alternatives.append("(?P<bad>" + "|".join(re.escape(w) for w in words) + ")")
+        return re.compile("|".join(alternatives), re.IGNORECASE)
+
+    def is_whitelisted(self, url: str) -> bool:
+        if not self.whitelist:
+            return False
+        domain = normalize_domain(url)
+        # Domain-suffix match: a.b.example.com is allowed by example.com.
+        while domain:
+            if domain in self.whitelist:
+                return True
+            if "." not in domain:
+                return False
+            domain = domain.split(".", 1)[1]
+        return False
+
+    def check(self, message) -> Verdict:
+        text = message.text or message.caption or ""
+        entities = message.entities or message.caption_entities or []
+
+        if self._matcher is None:
+            self._matcher = self._compile()
+
+        links = []
+        profanity = False
+        for match in self._matcher.finditer(text):
+            if match.lastgroup == "link":
+                links.append(match.group())
+            else:
+                profanity = True
+
+        encoded = None
+        for entity in entities:
+            if entity.type == MessageEntityType.TEXT_LINK and entity.url:
+                links.append(entity.url)
+            elif entity.type == MessageEntityType.URL:
+                if encoded is None:
+                    encoded = text.encode("utf-16-le")
+                links.append(_utf16_slice(encoded, entity.offset, entity.length))
+
+        bad_link = any(not self.is_whitelisted(link) for link in links)
+
+        restricted_file = False
+        if self.restricted_extensions and message.document and message.document.file_name:
+            extension = os.path.splitext(message.document.file_name.lower())[1]
+            restricted_file = extension in self.restricted_extensions
+
+        if not (bad_link or profanity or restricted_file):
+            return CLEAN
+        return Verdict(bad_link, profanity, restricted_file)
+
+
+class ModerationPolicies:
+    def __init__(self, store=bot_store):
+        self._policies = {}
+        self._default = ChatPolicy()
+        self._saved = store.dict("moderation_policies")
+        store.on_load(self._restore)
+
+    async def _restore(self) -> None:
+        await self._saved.warm()
+        self._policies = {}
+        for chat_id, saved in self._saved.items():
+            policy = self._policies[chat_id] = ChatPolicy()
+            policy.whitelist.update(saved.get("whitelist", []))
+            policy.restricted_extensions.update(saved.get("extensions", []))
+
+    def _save(self, chat_id: int, policy: ChatPolicy) -> None:
+        self._saved[chat_id] = {
+            "whitelist": sorted(policy.whitelist),
+            "extensions": sorted(policy.restricted_extensions),
+        }
+
+    def get(self, chat_id: int) -> ChatPolicy:
+        """Chats without their own rules share one default policy."""
+        return self._policies.get(chat_id, self._default)
+
+    def edit(self, chat_id: int) -> ChatPolicy:
+        policy = self._policies.get(chat_id)
+        if policy is None:
+            policy = self._policies[chat_id] = ChatPolicy()
+        return policy
+
+    def add_whitelist(self, chat_id: int, domain: str) -> str:
+        policy = self.edit(chat_id)
+        domain = policy.add_whitelist(domain)
+        self._save(chat_id, policy)
+        return domain
+
+    def restrict_extension(self, chat_id: int, extension: str) -> str:
+        policy = self.edit(chat_id)
+        extension = policy.restrict_extension(extension)
+        self._save(chat_id, policy)
+        return extension
+
+
+moderation_policies = ModerationPolicies()
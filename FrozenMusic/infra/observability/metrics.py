@@ -0,0 +1,209 @@
+"""
+metrics.py
+
+In-process counters, histograms and gauges rendered in the Prometheus text
+format, and the local aiohttp endpoint that serves them.
+(c) 2025 FrozenBots
+"""
+
+import logging
+import math
+import os
+from bisect import bisect_left
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9108"))
+METRICS_PATH = "/metrics"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Counter:
+    """Monotonic totals, one per tuple of label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(labelvalues, 0)
+
+    def collect(self):
+        for values, total in sorted(self._values.items()):
+            yield f"{self.name}{_labels(self.labelnames, values)} {_number(total)}"
+
+
+class Histogram:
+    """
+    Each series keeps per-bucket counts (the last slot is +Inf) and a
+    running sum; observe() is one bisect and two additions, and the
+    cumulative counts Prometheus expects are built only when scraped.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value: float, *labelvalues) -> None:
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def count(self, *labelvalues) -> int:
+        series = self._series.get(labelvalues)
+        return sum(series[0]) if series else 0
+
+    def collect(self):
+        bounds = self.buckets + (math.inf,)
+        for values, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = _labels(self.labelnames, values, f'le="{_number(bound)}"')
+                yield f"{self.name}_bucket{le} {cumulative}"
+            labels = _labels(self.labelnames, values)
+            yield f"{self.name}_sum{labels} {_number(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Gauge:
+    """
+    Read at scrape time from `read()`, which returns a number, or a dict of
+    label-value tuples to numbers when the gauge has labels. Nothing is
+    stored, so existing stats() methods can be exported as they are.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help_text: str, read, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.read = read
+        self.labelnames = tuple(labelnames)
+
+    def collect(self):
+        value = self.read()
+        if value is None:
+            return
+        if not isinstance(value, dict):
+            value = {(): value}
+        for values, number in sorted(value.items()):
+            if number is not None:
+                yield f"{self.name}{_labels(self.labelnames, values)} {_number(number)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if existing.kind != metric.kind:
+                raise ValueError(f"Metric {metric.name} already registered as a {existing.kind}")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames=()) -> Counter:
+        return self._register(Counter(name, help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labelnames, buckets))
+
+    def gauge(self, name: str, help_text: str, read, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, help_text, read, labelnames))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = list(metric.collect())
+            except Exception as e:
+                logger.warning(f"Collecting {metric.name} failed: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        lines.append("")
+        return "\n".join(lines)
+
+
+class MetricsServer:
+    """
+    Serves the registry on the bot's own event loop. A scrape only walks
+    in-memory series, so it never waits on Telegram, the database or the
+    network. METRICS_PORT=0 turns the endpoint off.
+    """
+
+    def __init__(self, registry, host: str = METRICS_HOST, port: int = METRICS_PORT):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._runner = None
+
+    async def start(self) -> None:
+        if not self.port or self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get(METRICS_PATH, self._handle)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError as e:
+            logger.warning(f"Metrics endpoint disabled, cannot bind {self.host}:{self.port}: {e}")
+            await runner.cleanup()
+            return
+        self._runner = runner
+        logger.info(f"Serving metrics on http://{self.host}:{self.port}{METRICS_PATH}")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def _handle(self, request):
+        return web.Response(body=self.registry.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+
+metrics = MetricsRegistry()
+metrics_server = MetricsServer(metrics)
@@ -0,0 +1,202 @@
+"""
+profiler.py
+
+On-demand sampling profiler: wall and CPU time per function for a fixed
+window, plus a dump of the pending asyncio tasks.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_INTERVAL = float(os.environ.get("PROFILE_INTERVAL", "0.005"))
+PROFILE_TOP = int(os.environ.get("PROFILE_TOP", "40"))
+PROFILE_DEFAULT_SECONDS = float(os.environ.get("PROFILE_DEFAULT_SECONDS", "10"))
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", "120"))
+
+_ROOT = os.getcwd() + os.sep
+
+
+class ProfilerBusy(Exception):
+    """Raised when a profile is requested while another one is running."""
+
+
+def _label(code) -> str:
+    path = code.co_filename
+    if path.startswith(_ROOT):
+        path = path[len(_ROOT):]
+    else:
+        path = os.sep.join(path.split(os.sep)[-2:])
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+def _cpu_clock(ident: int):
+    """Per-thread CPU clock where the platform has one, else None."""
+    try:
+        clock_id = time.pthread_getcpuclockid(ident)
+    except (AttributeError, OSError):
+        return None
+    return lambda: time.clock_gettime(clock_id)
+
+
+class _Sampler:
+    """
+    Runs in its own thread for one profile only. Every `interval` it reads
+    each thread's current stack; the event loop thread's stack counts one
+    wall sample, and every thread's stack is charged the CPU time that
+    thread used since the previous tick.
+    """
+
+    def __init__(self, loop_thread: int, interval: float):
+        self.loop_thread = loop_thread
+        self.interval = interval
+        self.stop = threading.Event()
+        self.samples = 0
+        self.elapsed = 0.0
+        self.wall_self = Counter()
+        self.wall_total = Counter()
+        self.cpu_self = Counter()
+        self.cpu_total = Counter()
+        self.cpu_threads = Counter()
+        self.thread_names = {}
+        self._clocks = {}
+        self._last_cpu = {}
+
+    def _cpu_delta(self, ident: int) -> float:
+        clock = self._clocks.get(ident, False)
+        if clock is False:
+            clock = self._clocks[ident] = _cpu_clock(ident)
+        if clock is None:
+            if ident != self.loop_thread:
+                return 0.0
+            # No per-thread clocks: charge the process CPU to the loop thread.
+            clock = time.process_time
+        try:
+            now = clock()
+        except OSError:
+            return 0.0
+        previous = self._last_cpu.get(ident)
+        self._last_cpu[ident] = now
+        return now - previous if previous is not None else 0.0
+
+    @staticmethod
+    def _charge(frame, weight, own: Counter, total: Counter) -> None:
+        own[frame.f_code] += weight
+        seen = set()
+        while frame is not None:
+            code = frame.f_code
+            if code not in seen:
+                seen.add(code)
+                total[code] += weight
+            frame = frame.f_back
+
+    def run(self) -> None:
+        me = threading.get_ident()
+        started = time.perf_counter()
+        while not self.stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if ident == self.loop_thread:
+                    self._charge(frame, 1, self.wall_self, self.wall_total)
+                if ident not in self.thread_names:
+                    self.thread_names.update((thread.ident, thread.name) for thread in threading.enumerate())
+                cpu = self._cpu_delta(ident)
+                if cpu > 0:
+                    self.cpu_threads[ident] += cpu
+                    self._charge(frame, cpu, self.cpu_self, self.cpu_total)
+            self.samples += 1
+        self.elapsed = time.perf_counter() - started
+
+    def report(self, top: int) -> str:
+        names = self.thread_names
+        samples = max(self.samples, 1)
+        lines = [
+            f"Sampling profile: {self.elapsed:.1f} s, {self.samples} samples every {self.interval * 1000:.0f} ms",
+            "CPU by thread: " + ", ".join(
+                f"{names.get(ident, ident)} {seconds:.3f} s" for ident, seconds in self.cpu_threads.most_common()
+            ),
+            "",
+            "Top functions by wall time (event loop thread)",
+            f"{'self %':>8} {'total %':>8}  function",
+        ]
+        for code, count in self.wall_total.most_common(top):
+            lines.append(f"{self.wall_self[code] / samples:8.1%} {count / samples:8.1%}  {_label(code)}")
+        lines += ["", "Top functions by CPU time (all threads)", f"{'self s':>8} {'total s':>8}  function"]
+        for code, seconds in self.cpu_total.most_common(top):
+            lines.append(f"{self.cpu_self[code]:8.3f} {seconds:8.3f}  {_label(code)}")
+        return "\n".join(lines)
+
+
+def _await_chain(coro):
+    """
+    Frames from the task's coroutine down to the innermost awaitable it is
+    suspended in. Task.get_stack() stops at the outer coroutine, which for
+    a helper sleeping three calls deep says very little.
+    """
+    frames = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+
+def task_dump(loop=None) -> str:
+    """Pending asyncio tasks grouped by await chain and the bot's own line each waits on."""
+    tasks = asyncio.all_tasks(loop)
+    groups = Counter()
+    for task in tasks:
+        frames = _await_chain(task.get_coro())
+        if not frames:
+            groups[(repr(task.get_coro()), "not started")] += 1
+            continue
+        chain = " > ".join(frame.f_code.co_name for frame in frames)
+        ours = [frame for frame in frames if frame.f_code.co_filename.startswith(_ROOT)]
+        frame = (ours or frames)[-1]
+        groups[(chain, f"{_label(frame.f_code)} line {frame.f_lineno}")] += 1
+    lines = [f"Pending asyncio tasks ({len(tasks)})", f"{'count':>6}  await chain -> waiting at"]
+    for (chain, where), count in groups.most_common():
+        lines.append(f"{count:6}  {chain} -> {where}")
+    return "\n".join(lines)
+
+
+class SamplingProfiler:
+    """
+    Nothing is installed while idle: no trace or profile hooks, no sampler
+    thread. A profile starts a sampler thread for its window and drops it
+    afterwards, so the bot only pays while someone is looking.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL, top: int = PROFILE_TOP):
+        self.interval = interval
+        self.top = top
+        self._running = False
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    async def profile(self, seconds: float) -> str:
+        if self._running:
+            raise ProfilerBusy()
+        self._running = True
+        sampler = _Sampler(threading.get_ident(), self.interval)
+        thread = threading.Thread(target=sampler.run, name="profiler", daemon=True)
+        try:
+            thread.start()
+            await asyncio.sleep(seconds)
+        finally:
+            sampler.stop.set()
+            await asyncio.to_thread(thread.join)
+            self._running = False
+        return sampler.report(self.top) + "\n\n" + task_dump()
+
+
+sampling_profiler = SamplingProfiler()
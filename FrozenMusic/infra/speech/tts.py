@@ -0,0 +1,152 @@
+"""
+tts.py
+
+Text-to-speech on a bounded worker pool, rendered into memory and cached
+by (text, language, speed).
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import io
+import logging
+import os
+import struct
+import wave
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTS_BACKEND = "gtts"
+TTS_BACKEND = os.environ.get("TTS_BACKEND", DEFAULT_TTS_BACKEND).strip().lower()
+TTS_WORKERS = int(os.environ.get("TTS_WORKERS", "4"))
+TTS_MAX_PENDING = int(os.environ.get("TTS_MAX_PENDING", "32"))
+TTS_CACHE_MAX_BYTES = int(os.environ.get("TTS_CACHE_MAX_BYTES", str(32 * 1024 ** 2)))
+
+SpeechAudio = namedtuple("SpeechAudio", ["data", "file_name"])
+
+
+class TTSBusy(Exception):
+    """Raised when more requests are waiting than TTS_MAX_PENDING allows."""
+
+
+class GTTSBackend:
+    """Google TTS over the network; gTTS is imported on first use."""
+
+    extension = "mp3"
+
+    def synthesize(self, text: str, lang: str, slow: bool) -> bytes:
+        from gtts import gTTS
+
+        buf = io.BytesIO()
+        gTTS(text=text, lang=lang, slow=slow).write_to_fp(buf)
+        return buf.getvalue()
+
+
+class SilentBackend:
+    """Offline stand-in: valid WAV silence, longer for longer or slower text."""
+
+    extension = "wav"
+    rate = 8000
+
+    def synthesize(self, text: str, lang: str, slow: bool) -> bytes:
+        seconds = min(30.0, 0.06 * len(text) * (1.5 if slow else 1.0)) or 0.1
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(self.rate)
+            out.writeframes(struct.pack("<h", 0) * int(self.rate * seconds))
+        return buf.getvalue()
+
+
+TTS_BACKENDS = {"gtts": GTTSBackend, "silent": SilentBackend}
+
+
+def backend_from_name(name: str):
+    """A misspelt TTS_BACKEND must not keep the bot from starting; fall back loudly."""
+    factory = TTS_BACKENDS.get(name)
+    if factory is None:
+        logger.warning(
+            f"Unknown TTS_BACKEND {name!r} (expected one of {', '.join(TTS_BACKENDS)}), "
+            f"using {DEFAULT_TTS_BACKEND!r}"
+        )
+        factory = TTS_BACKENDS[DEFAULT_TTS_BACKEND]
+    return factory()
+
+
+class TextToSpeech:
+    def __init__(self, backend=None, workers: int = TTS_WORKERS,
+                 max_pending: int = TTS_MAX_PENDING, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.backend = backend or backend_from_name(TTS_BACKEND)
+        self.max_pending = max_pending
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts")
+        self._cache = OrderedDict()
+        self._bytes = 0
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._inflight)
+
+    async def synthesize(self, text: str, lang: str = "hi", slow: bool = False) -> SpeechAudio:
+        """
+        Returns the rendered audio for (text, lang, slow). Identical requests
+        in flight share one synthesis; at most `workers` run at a time.
+        """
+        key = (text, lang, slow)
+        audio = self._cache.get(key)
+        if audio is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return audio
+
+        future = self._inflight.get(key)
+        if future is None:
+            if len(self._inflight) >= self.max_pending:
+                raise TTSBusy()
+            self.misses += 1
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, self.backend.synthesize, text, lang, slow)
+            self._inflight[key] = future
+            future.add_done_callback(lambda f, key=key: self._settle(key, f))
+        return SpeechAudio(await asyncio.shield(future), self.file_name)
+
+    @property
+    def file_name(self) -> str:
+        return f"tts.{self.backend.extension}"
+
+    def _settle(self, key, future) -> None:
+        self._inflight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        audio = SpeechAudio(future.result(), self.file_name)
+        self._cache[key] = audio
+        self._bytes += len(audio.data)
+        while self._bytes > self.max_bytes and self._cache:
+            _, evicted = self._cache.popitem(last=False)
+            self._bytes -= len(evicted.data)
+
+    @staticmethod
+    def as_file(audio: SpeechAudio) -> io.BytesIO:
+        """A fresh named buffer per send, since pyrogram reads it to the end."""
+        buf = io.BytesIO(audio.data)
+        buf.name = audio.file_name
+        return buf
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._cache),
+            "bytes": self._bytes,
+            "pending": self.pending,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+text_to_speech = TextToSpeech()
@@ -0,0 +1,229 @@
+"""
+vtt.py
+
+Voice-to-text off the event loop: a bounded job queue feeding a process
+pool that decodes OGG/Opus to PCM in memory and runs a pluggable recognizer.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VTT_BACKEND = "google"
+VTT_BACKEND = os.environ.get("VTT_BACKEND", DEFAULT_VTT_BACKEND).strip().lower()
+VTT_WORKERS = int(os.environ.get("VTT_WORKERS", "2"))
+VTT_MAX_QUEUE = int(os.environ.get("VTT_MAX_QUEUE", "16"))
+VTT_SAMPLE_RATE = 16000
+# VTT_BACKEND=vosk needs the optional `vosk` package and a model directory.
+VOSK_MODEL_PATH = os.environ.get("VOSK_MODEL_PATH", "models/vosk")
+FFMPEG_BIN = os.environ.get("FFMPEG_BIN", "ffmpeg")
+
+STAGES = ("download", "queue", "decode", "recognize")
+
+
+def _pool_context():
+    # The bot process runs the event loop, the TTS pool and pyrogram's
+    # threads; forking it can copy a held lock into the child and deadlock.
+    # Workers start from a clean forkserver (or spawn where there is none).
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class VTTBusy(Exception):
+    """Raised when the job queue already holds VTT_MAX_QUEUE voice notes."""
+
+
+class SpeechNotRecognized(Exception):
+    """The recognizer heard nothing it could turn into text."""
+
+
+# --- Worker-process side ---------------------------------------------------
+
+def decode_to_pcm(ogg: bytes, rate: int = VTT_SAMPLE_RATE) -> bytes:
+    """OGG/Opus in, 16-bit mono little-endian PCM out, both through pipes."""
+    proc = subprocess.run(
+        [FFMPEG_BIN, "-loglevel", "error", "-i", "pipe:0", "-f", "s16le", "-ac", "1", "-ar", str(rate), "pipe:1"],
+        input=ogg,
+        capture_output=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.decode(errors="replace").strip() or "ffmpeg failed")
+    return proc.stdout
+
+
+def recognize_google(pcm: bytes, rate: int, lang: str) -> str:
+    import speech_recognition as sr
+
+    try:
+        return sr.Recognizer().recognize_google(sr.AudioData(pcm, rate, 2), language=lang)
+    except sr.UnknownValueError:
+        raise SpeechNotRecognized()
+
+
+_vosk_model = None
+
+
+def recognize_vosk(pcm: bytes, rate: int, lang: str) -> str:
+    """Offline engine; the model directory decides the language."""
+    global _vosk_model
+    import vosk
+
+    if _vosk_model is None:
+        _vosk_model = vosk.Model(VOSK_MODEL_PATH)
+    recognizer = vosk.KaldiRecognizer(_vosk_model, rate)
+    recognizer.AcceptWaveform(pcm)
+    text = json.loads(recognizer.FinalResult()).get("text", "")
+    if not text:
+        raise SpeechNotRecognized()
+    return text
+
+
+RECOGNIZERS = {"google": recognize_google, "vosk": recognize_vosk}
+# Module each engine imports in the worker; checked up front instead.
+_RECOGNIZER_MODULES = {"google": "speech_recognition", "vosk": "vosk"}
+
+
+def recognizer_from_name(name: str) -> str:
+    """
+    A misspelt VTT_BACKEND, or one whose package is not installed, would
+    fail every job inside the worker; fall back loudly at startup instead.
+    """
+    if name not in RECOGNIZERS:
+        logger.warning(
+            f"Unknown VTT_BACKEND {name!r} (expected one of {', '.join(RECOGNIZERS)}), "
+            f"using {DEFAULT_VTT_BACKEND!r}"
+        )
+        return DEFAULT_VTT_BACKEND
+    if name != DEFAULT_VTT_BACKEND and importlib.util.find_spec(_RECOGNIZER_MODULES[name]) is None:
+        logger.warning(
+            f"VTT_BACKEND {name!r} needs the {_RECOGNIZER_MODULES[name]!r} package, "
+            f"using {DEFAULT_VTT_BACKEND!r}"
+        )
+        return DEFAULT_VTT_BACKEND
+    return name
+
+
+def transcribe_job(ogg: bytes, lang: str, backend: str):
+    """Runs in a pool process; returns (text, decode_seconds, recognize_seconds)."""
+    started = time.perf_counter()
+    pcm = decode_to_pcm(ogg)
+    decoded = time.perf_counter()
+    text = RECOGNIZERS[backend](pcm, VTT_SAMPLE_RATE, lang)
+    return text, decoded - started, time.perf_counter() - decoded
+
+
+# --- Event-loop side -------------------------------------------------------
+
+class StageLatency:
+    __slots__ = ("samples", "count")
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self) -> dict:
+        if not self.samples:
+            return {"count": self.count, "avg": 0.0, "p95": 0.0}
+        ordered = sorted(self.samples)
+        return {
+            "count": self.count,
+            "avg": sum(ordered) / len(ordered),
+            "p95": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+        }
+
+
+class VoiceToText:
+    def __init__(self, backend: str = VTT_BACKEND, workers: int = VTT_WORKERS, max_queue: int = VTT_MAX_QUEUE):
+        self.backend = recognizer_from_name(backend)
+        self.workers = workers
+        self.max_queue = max_queue
+        self.latency = {stage: StageLatency() for stage in STAGES}
+        self.failures = 0
+        self.unrecognized = 0
+        self._queue = None
+        self._pool = None
+        self._dispatchers = []
+        self._busy = 0
+
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=_pool_context())
+            self._dispatchers = [asyncio.ensure_future(self._dispatch()) for _ in range(self.workers)]
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            ogg, lang, enqueued, future = await self._queue.get()
+            if future.cancelled():
+                continue
+            self.latency["queue"].record(time.monotonic() - enqueued)
+            self._busy += 1
+            try:
+                text, decode_s, recognize_s = await loop.run_in_executor(
+                    self._pool, transcribe_job, ogg, lang, self.backend
+                )
+                self.latency["decode"].record(decode_s)
+                self.latency["recognize"].record(recognize_s)
+                if not future.done():
+                    future.set_result(text)
+            except SpeechNotRecognized as e:
+                # Silence or noise, not a backend fault: keep it out of failures.
+                self.unrecognized += 1
+                if not future.done():
+                    future.set_exception(e)
+            except Exception as e:
+                self.failures += 1
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                self._busy -= 1
+
+    def record_download(self, seconds: float) -> None:
+        self.latency["download"].record(seconds)
+
+    async def transcribe(self, ogg: bytes, lang: str = "hi-IN") -> str:
+        """Queues one voice note; raises VTTBusy when the queue is full."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((ogg, lang, time.monotonic(), future))
+        except asyncio.QueueFull:
+            raise VTTBusy()
+        return await future
+
+    async def stop(self) -> None:
+        for task in self._dispatchers:
+            task.cancel()
+        self._dispatchers = []
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._queue = None
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "busy": self._busy,
+            "failures": self.failures,
+            "unrecognized": self.unrecognized,
+            "latency": {stage: tracker.summary() for stage, tracker in self.latency.items()},
+        }
+
+
+voice_to_text = VoiceToText()
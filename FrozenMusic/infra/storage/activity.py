@@ -0,0 +1,152 @@
+"""
+activity.py
+
+Per-chat message counters with a maintained top-N leaderboard and
+write-behind persistence.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import os
+from array import array
+
+from FrozenMusic.infra.storage.kv_store import bot_store
+
+ACTIVITY_FLUSH_INTERVAL = float(os.environ.get("ACTIVITY_FLUSH_INTERVAL", "30"))
+LEADERBOARD_SIZE = 20
+
+
+class ChatActivity:
+    """
+    Counts live in a flat array indexed through a user -> slot dict. Counts
+    only grow, so a user can enter the top-N only by passing its current
+    floor, which keeps the leaderboard exact with an O(1) check per message.
+    """
+
+    __slots__ = ("slots", "users", "counts", "top", "floor")
+
+    def __init__(self):
+        self.slots = {}
+        self.users = array("q")
+        self.counts = array("L")
+        self.top = {}
+        self.floor = 0
+
+    def increment(self, user_id: int) -> int:
+        slot = self.slots.get(user_id)
+        if slot is None:
+            slot = self.slots[user_id] = len(self.counts)
+            self.users.append(user_id)
+            self.counts.append(0)
+        self.counts[slot] += 1
+        count = self.counts[slot]
+
+        if user_id in self.top:
+            self.top[user_id] = count
+        elif len(self.top) < LEADERBOARD_SIZE:
+            self.top[user_id] = count
+            self.floor = min(self.top.values())
+        elif count > self.floor:
+            self.top[user_id] = count
+            del self.top[min(self.top, key=self.top.get)]
+            self.floor = min(self.top.values())
+        return count
+
+    def count(self, user_id: int) -> int:
+        slot = self.slots.get(user_id)
+        return 0 if slot is None else self.counts[slot]
+
+    def leaders(self, n: int = 10):
+        return sorted(self.top.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def dump(self) -> dict:
+        return {"users": self.users.tolist(), "counts": self.counts.tolist()}
+
+    @classmethod
+    def restore(cls, data: dict) -> "ChatActivity":
+        chat = cls()
+        chat.users = array("q", data.get("users", []))
+        chat.counts = array("L", data.get("counts", []))
+        chat.slots = {user_id: slot for slot, user_id in enumerate(chat.users)}
+        ranked = sorted(range(len(chat.counts)), key=chat.counts.__getitem__, reverse=True)
+        chat.top = {chat.users[slot]: chat.counts[slot] for slot in ranked[:LEADERBOARD_SIZE]}
+        chat.floor = min(chat.top.values()) if len(chat.top) >= LEADERBOARD_SIZE else 0
+        return chat
+
+
+class ActivityStore:
+    """
+    Write-behind: messages only mark (chat, user) pairs dirty; every
+    ACTIVITY_FLUSH_INTERVAL seconds the dirty counters are upserted into the
+    activity table in one store batch.
+    """
+
+    def __init__(self, store=bot_store):
+        self.store = store
+        self._chats = {}
+        self._dirty = set()
+        self._flusher = None
+        store.add_schema(
+            "CREATE TABLE IF NOT EXISTS activity ("
+            " chat_id INTEGER NOT NULL, user_id INTEGER NOT NULL, count INTEGER NOT NULL,"
+            " PRIMARY KEY (chat_id, user_id)) WITHOUT ROWID"
+        )
+        store.on_load(self.load)
+
+    def record(self, chat_id: int, user_id: int) -> int:
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = ChatActivity()
+        self._dirty.add((chat_id, user_id))
+        return chat.increment(user_id)
+
+    def count(self, chat_id: int, user_id: int) -> int:
+        chat = self._chats.get(chat_id)
+        return chat.count(user_id) if chat else 0
+
+    def leaders(self, chat_id: int, n: int = 10):
+        chat = self._chats.get(chat_id)
+        return chat.leaders(n) if chat else []
+
+    @staticmethod
+    def _read_all(conn) -> dict:
+        grouped = {}
+        for chat_id, user_id, count in conn.execute("SELECT chat_id, user_id, count FROM activity"):
+            data = grouped.setdefault(chat_id, {"users": [], "counts": []})
+            data["users"].append(user_id)
+            data["counts"].append(count)
+        return {chat_id: ChatActivity.restore(data) for chat_id, data in grouped.items()}
+
+    async def load(self) -> None:
+        self._chats = await self.store.run(self._read_all)
+        self._dirty.clear()
+
+    async def flush(self) -> None:
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        for chat_id, user_id in dirty:
+            self.store.queue(
+                "INSERT INTO activity (chat_id, user_id, count) VALUES (?, ?, ?)"
+                " ON CONFLICT(chat_id, user_id) DO UPDATE SET count = excluded.count",
+                (chat_id, user_id, self._chats[chat_id].count(user_id)),
+            )
+        await self.store.flush()
+
+    async def _flush_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    def start(self, interval: float = ACTIVITY_FLUSH_INTERVAL) -> None:
+        if self._flusher is None:
+            self._flusher = asyncio.ensure_future(self._flush_loop(interval))
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+
+activity_store = ActivityStore()
@@ -0,0 +1,124 @@
+"""
+chat_registry.py
+
+Persistent registry of the chats the bot is in and its role in each, kept
+current from my_chat_member and service-message updates.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import logging
+import time
+
+from FrozenMusic.infra.storage.kv_store import bot_store
+
+logger = logging.getLogger(__name__)
+
+ADMIN_ROLES = ("owner", "administrator")
+GONE_ROLES = ("left", "banned")
+UNKNOWN_ROLE = "unknown"
+
+
+def _name(enum_value) -> str:
+    return enum_value.name.lower() if enum_value is not None else "unknown"
+
+
+class ChatRegistry:
+    """
+    A chat first seen through an ordinary message is stored as "unknown"
+    and role_lookup(chat_id) -> status name, set by the bot at startup, is
+    run once in the background to find out what the bot really is there.
+    """
+
+    def __init__(self, store=bot_store, role_lookup=None):
+        self.chats = store.dict("chat_registry")
+        store.on_load(self.chats.warm)
+        self.role_lookup = role_lookup
+        self._resolving = set()
+        self._checked = set()
+
+    def _put(self, chat, role: str) -> None:
+        entry = self.chats.get(chat.id)
+        title = chat.title or (entry or {}).get("title") or ""
+        chat_type = _name(chat.type) if chat.type is not None else (entry or {}).get("type", "unknown")
+        if entry and entry["role"] == role and entry["title"] == title and entry["type"] == chat_type:
+            return
+        self.chats[chat.id] = {"type": chat_type, "title": title, "role": role, "updated": int(time.time())}
+
+    def observe(self, chat) -> None:
+        """Registers a chat seen through an ordinary message; O(1) when known."""
+        entry = self.chats.get(chat.id)
+        if entry is None or entry["role"] in GONE_ROLES:
+            self._put(chat, UNKNOWN_ROLE)
+        elif entry["role"] != UNKNOWN_ROLE or chat.id in self._checked:
+            return
+        if self.role_lookup is not None and chat.id not in self._resolving:
+            self._resolving.add(chat.id)
+            asyncio.ensure_future(self._resolve(chat))
+
+    async def _resolve(self, chat) -> None:
+        try:
+            role = await self.role_lookup(chat.id)
+        except Exception as e:
+            logger.warning(f"Could not read the bot's role in {chat.id}: {e}")
+            role = None
+        finally:
+            self._resolving.discard(chat.id)
+            self._checked.add(chat.id)
+        # A my_chat_member update that landed meanwhile is newer; keep it.
+        if role and self.chats.get(chat.id, {}).get("role") == UNKNOWN_ROLE:
+            self._put(chat, role)
+
+    async def refresh(self) -> int:
+        """Re-reads the bot's role in every known chat; returns how many answered."""
+        refreshed = 0
+        for chat_id, entry in list(self.chats.items()):
+            if entry["role"] in GONE_ROLES:
+                continue
+            try:
+                role = await self.role_lookup(chat_id)
+            except Exception as e:
+                logger.warning(f"Could not read the bot's role in {chat_id}: {e}")
+                continue
+            if role != entry["role"]:
+                self.chats[chat_id] = dict(entry, role=role, updated=int(time.time()))
+            refreshed += 1
+        return refreshed
+
+    def apply_my_member_update(self, update) -> None:
+        member = update.new_chat_member
+        role = _name(member.status) if member else "left"
+        self._put(update.chat, role)
+
+    def apply_service_message(self, message, bot_id: int) -> None:
+        if message.new_chat_members and any(user.id == bot_id for user in message.new_chat_members):
+            self.observe(message.chat)
+        elif message.left_chat_member and message.left_chat_member.id == bot_id:
+            self._put(message.chat, "left")
+        elif message.migrate_to_chat_id:
+            # Basic group upgraded to a supergroup; the new id takes over.
+            old = self.chats.pop(message.chat.id, None)
+            if old:
+                self.chats[message.migrate_to_chat_id] = dict(old, type="supergroup", updated=int(time.time()))
+
+    def admin_chats(self, chat_types=("group", "supergroup")):
+        return [
+            chat_id for chat_id, entry in self.chats.items()
+            if entry["role"] in ADMIN_ROLES and entry["type"] in chat_types
+        ]
+
+    def summary(self) -> dict:
+        counts = {}
+        for entry in self.chats.values():
+            if entry["role"] in GONE_ROLES:
+                continue
+            if entry["role"] in ADMIN_ROLES:
+                role = "admin"
+            else:
+                role = UNKNOWN_ROLE if entry["role"] == UNKNOWN_ROLE else "member"
+            key = (entry["type"], role)
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+
+chat_registry = ChatRegistry()
@@ -0,0 +1,223 @@
+"""
+counters.py
+
+Per-(chat, user) counters for warns and reputation with an incrementally
+ranked index and write-behind persistence.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import os
+
+from FrozenMusic.infra.storage.kv_store import bot_store
+
+COUNTER_FLUSH_INTERVAL = float(os.environ.get("COUNTER_FLUSH_INTERVAL", "30"))
+
+
+class _Bucket:
+    __slots__ = ("count", "users", "higher", "lower")
+
+    def __init__(self, count: int):
+        self.count = count
+        self.users = set()
+        self.higher = None
+        self.lower = None
+
+
+class RankedCounter:
+    """
+    One chat's counts, indexed as a doubly linked list of buckets, one per
+    distinct count, highest first. Counts move in steps of one, so a user
+    only ever moves to an adjacent bucket: every update is O(1) and top(n)
+    reads n users from the head without sorting.
+    """
+
+    __slots__ = ("counts", "buckets", "head", "tail")
+
+    def __init__(self):
+        self.counts = {}
+        self.buckets = {}
+        self.head = None
+        self.tail = None
+
+    def get(self, user_id: int) -> int:
+        return self.counts.get(user_id, 0)
+
+    def _link(self, bucket: _Bucket, higher: _Bucket, lower: _Bucket) -> None:
+        bucket.higher, bucket.lower = higher, lower
+        if higher is None:
+            self.head = bucket
+        else:
+            higher.lower = bucket
+        if lower is None:
+            self.tail = bucket
+        else:
+            lower.higher = bucket
+
+    def _unlink(self, bucket: _Bucket) -> None:
+        if bucket.higher is None:
+            self.head = bucket.lower
+        else:
+            bucket.higher.lower = bucket.lower
+        if bucket.lower is None:
+            self.tail = bucket.higher
+        else:
+            bucket.lower.higher = bucket.higher
+        del self.buckets[bucket.count]
+
+    def _leave(self, bucket: _Bucket, user_id: int) -> None:
+        bucket.users.discard(user_id)
+        if not bucket.users:
+            self._unlink(bucket)
+
+    def step(self, user_id: int, up: bool = True) -> int:
+        """Adds or removes one; a count that reaches zero drops the user."""
+        old = self.counts.get(user_id, 0)
+        new = old + 1 if up else old - 1
+        if new < 0:
+            return 0
+        source = self.buckets.get(old) if old else None
+
+        if new:
+            target = self.buckets.get(new)
+            if target is None:
+                target = self.buckets[new] = _Bucket(new)
+                if source is None:
+                    self._link(target, self.tail, None)
+                elif up:
+                    self._link(target, source.higher, source)
+                else:
+                    self._link(target, source, source.lower)
+            target.users.add(user_id)
+            self.counts[user_id] = new
+        else:
+            del self.counts[user_id]
+
+        if source is not None:
+            self._leave(source, user_id)
+        return new
+
+    def remove(self, user_id: int) -> None:
+        old = self.counts.pop(user_id, 0)
+        if old:
+            self._leave(self.buckets[old], user_id)
+
+    def top(self, n: int = 10):
+        out = []
+        bucket = self.head
+        while bucket is not None and len(out) < n:
+            for user_id in bucket.users:
+                out.append((user_id, bucket.count))
+                if len(out) == n:
+                    break
+            bucket = bucket.lower
+        return out
+
+    @classmethod
+    def from_counts(cls, counts: dict) -> "RankedCounter":
+        ranked = cls()
+        lower = None
+        for count in sorted(set(counts.values())):
+            bucket = ranked.buckets[count] = _Bucket(count)
+            ranked._link(bucket, None, lower)
+            lower = bucket
+        for user_id, count in counts.items():
+            ranked.buckets[count].users.add(user_id)
+        ranked.counts = dict(counts)
+        return ranked
+
+
+class CounterStore:
+    """
+    Write-behind like ActivityStore: updates mark (chat, user) pairs dirty
+    and every COUNTER_FLUSH_INTERVAL seconds the changed rows of this
+    counter `kind` are upserted (or deleted at zero) in one store batch.
+    """
+
+    def __init__(self, kind: str, store=bot_store):
+        self.kind = kind
+        self.store = store
+        self._chats = {}
+        self._dirty = set()
+        self._flusher = None
+        store.add_schema(
+            "CREATE TABLE IF NOT EXISTS counters ("
+            " kind TEXT NOT NULL, chat_id INTEGER NOT NULL, user_id INTEGER NOT NULL, count INTEGER NOT NULL,"
+            " PRIMARY KEY (kind, chat_id, user_id)) WITHOUT ROWID"
+        )
+        store.on_load(self.load)
+
+    def _chat(self, chat_id: int) -> RankedCounter:
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            chat = self._chats[chat_id] = RankedCounter()
+        return chat
+
+    def incr(self, chat_id: int, user_id: int) -> int:
+        self._dirty.add((chat_id, user_id))
+        return self._chat(chat_id).step(user_id, up=True)
+
+    def decr(self, chat_id: int, user_id: int) -> int:
+        self._dirty.add((chat_id, user_id))
+        return self._chat(chat_id).step(user_id, up=False)
+
+    def reset(self, chat_id: int, user_id: int) -> None:
+        self._dirty.add((chat_id, user_id))
+        self._chat(chat_id).remove(user_id)
+
+    def get(self, chat_id: int, user_id: int) -> int:
+        chat = self._chats.get(chat_id)
+        return chat.get(user_id) if chat else 0
+
+    def top(self, chat_id: int, n: int = 10):
+        chat = self._chats.get(chat_id)
+        return chat.top(n) if chat else []
+
+    def _read_all(self, conn) -> dict:
+        grouped = {}
+        rows = conn.execute("SELECT chat_id, user_id, count FROM counters WHERE kind = ?", (self.kind,))
+        for chat_id, user_id, count in rows:
+            grouped.setdefault(chat_id, {})[user_id] = count
+        return {chat_id: RankedCounter.from_counts(counts) for chat_id, counts in grouped.items()}
+
+    async def load(self) -> None:
+        self._chats = await self.store.run(self._read_all)
+        self._dirty.clear()
+
+    async def flush(self) -> None:
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, set()
+        for chat_id, user_id in dirty:
+            count = self.get(chat_id, user_id)
+            if count:
+                self.store.queue(
+                    "INSERT INTO counters (kind, chat_id, user_id, count) VALUES (?, ?, ?, ?)"
+                    " ON CONFLICT(kind, chat_id, user_id) DO UPDATE SET count = excluded.count",
+                    (self.kind, chat_id, user_id, count),
+                )
+            else:
+                self.store.queue(
+                    "DELETE FROM counters WHERE kind = ? AND chat_id = ? AND user_id = ?",
+                    (self.kind, chat_id, user_id),
+                )
+        await self.store.flush()
+
+    async def _flush_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    def start(self, interval: float = COUNTER_FLUSH_INTERVAL) -> None:
+        if self._flusher is None:
+            self._flusher = asyncio.ensure_future(self._flush_loop(interval))
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+
+warn_store = CounterStore("warns")
+reputation_store = CounterStore("reputation")
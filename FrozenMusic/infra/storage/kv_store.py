@@ -0,0 +1,387 @@
+"""
+kv_store.py
+
+Embedded SQLite store for the bot's tables. Each table is read from the
+database on first use and served from memory afterwards; writes are
+coalesced and committed in batched transactions on a dedicated database
+thread so the event loop never writes to disk.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+BOT_DB_PATH = os.environ.get("BOT_DB_PATH", os.path.join("data", "bot.db"))
+STORE_FLUSH_INTERVAL = float(os.environ.get("STORE_FLUSH_INTERVAL", "1"))
+
+_DELETE = object()
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS kv ("
+    " namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+    " PRIMARY KEY (namespace, key)) WITHOUT ROWID",
+)
+
+
+def _encode_key(key) -> str:
+    return json.dumps(key)
+
+
+def _decode_key(raw: str):
+    key = json.loads(raw)
+    return tuple(key) if isinstance(key, list) else key
+
+
+def _legacy_key(key):
+    """JSON object keys are always strings; chat and user ids go back to int."""
+    if isinstance(key, str):
+        try:
+            return int(key)
+        except ValueError:
+            return key
+    return key
+
+
+def _unloaded(cls, methods):
+    """
+    Subclass of a table class whose first read or write fills the table
+    from the database and then swaps the instance back to `cls`, so a
+    loaded table costs nothing extra per access.
+    """
+
+    def wrap(name):
+        def method(self, *args, **kwargs):
+            self._store._fill(self)
+            return getattr(self, name)(*args, **kwargs)
+
+        method.__name__ = name
+        return method
+
+    return type("Unloaded" + cls.__name__, (cls,), {name: wrap(name) for name in methods})
+
+
+class PersistentDict(dict):
+    """
+    dict whose assignments and deletions are queued for the next batch.
+    Values are stored as JSON; after mutating a nested value in place call
+    touch(key) so the change is written.
+    """
+
+    def __init__(self, store: "BotStore", namespace: str):
+        super().__init__()
+        self._store = store
+        self.namespace = namespace
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._store._stage(self.namespace, key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._store._stage(self.namespace, key, _DELETE)
+
+    def pop(self, key, *default):
+        had = key in self
+        value = super().pop(key, *default)
+        if had:
+            self._store._stage(self.namespace, key, _DELETE)
+        return value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        for key in list(self):
+            del self[key]
+
+    def touch(self, key) -> None:
+        if key in self:
+            self._store._stage(self.namespace, key, self[key])
+
+    async def warm(self) -> None:
+        """Fills the table on the database thread instead of on first access."""
+        await self._store.warm(self)
+
+    def _replace(self, items: dict) -> None:
+        super().clear()
+        super().update(items)
+
+
+class PersistentSet(set):
+    def __init__(self, store: "BotStore", namespace: str):
+        super().__init__()
+        self._store = store
+        self.namespace = namespace
+
+    async def warm(self) -> None:
+        await self._store.warm(self)
+
+    def add(self, item):
+        if item not in self:
+            super().add(item)
+            self._store._stage(self.namespace, item, 1)
+
+    def discard(self, item):
+        if item in self:
+            super().discard(item)
+            self._store._stage(self.namespace, item, _DELETE)
+
+    def remove(self, item):
+        super().remove(item)
+        self._store._stage(self.namespace, item, _DELETE)
+
+    def update(self, *iterables):
+        for iterable in iterables:
+            for item in iterable:
+                self.add(item)
+
+    def _replace(self, items: dict) -> None:
+        super().clear()
+        super().update(items)
+
+
+_DICT_ACCESS = (
+    "__getitem__", "__setitem__", "__delitem__", "__contains__", "__iter__", "__len__", "__eq__", "__repr__",
+    "get", "keys", "values", "items", "copy", "pop", "popitem", "setdefault", "update", "clear", "touch",
+)
+_SET_ACCESS = (
+    "__contains__", "__iter__", "__len__", "__eq__", "__repr__", "copy",
+    "add", "discard", "remove", "pop", "update", "clear",
+)
+_UNLOADED = {
+    PersistentDict: _unloaded(PersistentDict, _DICT_ACCESS),
+    PersistentSet: _unloaded(PersistentSet, _SET_ACCESS),
+}
+_LOADED = {unloaded: loaded for loaded, unloaded in _UNLOADED.items()}
+
+
+class BotStore:
+    def __init__(self, path: str = BOT_DB_PATH):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bot-store")
+        self._conn = None
+        self._tables = {}
+        self._pending = {}
+        self._pending_sql = []
+        self._schema = list(SCHEMA)
+        self._load_hooks = []
+        self._flusher = None
+        self.commits = 0
+
+    # --- table registry ---
+    def _table(self, cls, namespace: str):
+        table = self._tables.get(namespace)
+        if table is None:
+            table = self._tables[namespace] = _UNLOADED[cls](self, namespace)
+        return table
+
+    def dict(self, namespace: str) -> PersistentDict:
+        return self._table(PersistentDict, namespace)
+
+    def set(self, namespace: str) -> PersistentSet:
+        return self._table(PersistentSet, namespace)
+
+    def add_schema(self, *statements: str) -> None:
+        """Extra tables for modules that need their own layout."""
+        self._schema.extend(statements)
+
+    def on_load(self, hook) -> None:
+        """hook() is awaited after every load(), including after a restore."""
+        self._load_hooks.append(hook)
+
+    # --- database thread ---
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            for statement in self._schema:
+                self._conn.execute(statement)
+            self._conn.commit()
+        return self._conn
+
+    async def run(self, fn, *args):
+        """Runs fn(connection, *args) on the database thread."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: fn(self._connect(), *args))
+
+    @staticmethod
+    def _read_namespace(conn, namespace: str) -> dict:
+        rows = conn.execute("SELECT key, value FROM kv WHERE namespace = ?", (namespace,))
+        return {_decode_key(k): json.loads(v) for k, v in rows}
+
+    @staticmethod
+    def loaded(table) -> bool:
+        return type(table) not in _LOADED
+
+    def _install(self, table, items: dict) -> None:
+        if not self.loaded(table):
+            table._replace(items)
+            table.__class__ = _LOADED[type(table)]
+
+    def _fill(self, table) -> None:
+        """
+        First access from synchronous code. The read still runs on the
+        database thread, behind any pending commit, and is a single range
+        scan of the table's primary-key prefix. On the event loop this
+        blocks, so tables read there should be warmed from a load hook.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            logger.warning(f"Table {table.namespace} read on the event loop before warm(); add it to a load hook")
+        future = self._executor.submit(lambda: self._read_namespace(self._connect(), table.namespace))
+        self._install(table, future.result())
+
+    async def warm(self, *tables) -> None:
+        """Fills the given tables without blocking the event loop."""
+        for table in tables:
+            if not self.loaded(table):
+                self._install(table, await self.run(self._read_namespace, table.namespace))
+
+    async def load(self) -> None:
+        """
+        Marks every table to be read again on first use, then runs the load
+        hooks. Nothing is read up front except what the hooks warm.
+        """
+        for table in self._tables.values():
+            if self.loaded(table):
+                table._replace({})
+                table.__class__ = _UNLOADED[type(table)]
+        for hook in self._load_hooks:
+            await hook()
+
+    async def import_json(self, path: str) -> bool:
+        """
+        One-time import of the old bot_data.json into the tables it names.
+        String keys that hold ids become ints, matching new writes, so a
+        chat is never stored under both forms. The file is renamed after.
+        """
+        if not os.path.exists(path):
+            return False
+
+        def _read():
+            with open(path, "r") as f:
+                return json.load(f)
+
+        data = await asyncio.get_running_loop().run_in_executor(None, _read)
+        for namespace, items in data.items():
+            table = self._tables.get(namespace)
+            if table is not None:
+                await self.warm(table)
+            if isinstance(table, PersistentDict):
+                table.update({_legacy_key(key): value for key, value in items.items()})
+            elif isinstance(table, PersistentSet):
+                table.update(_legacy_key(item) for item in items)
+        await self.flush()
+        os.replace(path, path + ".migrated")
+        return True
+
+    # --- write-behind ---
+    def _stage(self, namespace: str, key, value) -> None:
+        self._pending[(namespace, _encode_key(key))] = value
+
+    def queue(self, sql: str, params) -> None:
+        """Queues a raw write for the next batch, after the kv changes."""
+        self._pending_sql.append((sql, params))
+
+    def _commit(self, conn, kv_rows, sql_rows) -> None:
+        with conn:
+            for (namespace, key), value in kv_rows:
+                if value is _DELETE:
+                    conn.execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+                else:
+                    conn.execute(
+                        "INSERT INTO kv (namespace, key, value) VALUES (?, ?, ?)"
+                        " ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value",
+                        (namespace, key, value),
+                    )
+            for sql, params in sql_rows:
+                conn.execute(sql, params)
+
+    async def flush(self) -> None:
+        if not self._pending and not self._pending_sql:
+            return
+        # Serializing here snapshots the values before the thread sees them.
+        kv_rows = [
+            (key, value if value is _DELETE else json.dumps(value))
+            for key, value in self._pending.items()
+        ]
+        sql_rows = self._pending_sql
+        self._pending, self._pending_sql = {}, []
+        try:
+            await self.run(self._commit, kv_rows, sql_rows)
+            self.commits += 1
+        except Exception as e:
+            # Put the batch back underneath anything staged meanwhile.
+            for key, value in kv_rows:
+                self._pending.setdefault(key, value if value is _DELETE else json.loads(value))
+            self._pending_sql[:0] = sql_rows
+            logger.warning(f"Store flush failed: {e}")
+
+    async def _flush_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    def start(self, interval: float = STORE_FLUSH_INTERVAL) -> None:
+        if self._flusher is None:
+            self._flusher = asyncio.ensure_future(self._flush_loop(interval))
+
+    async def stop(self) -> None:
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+        await self.run(lambda conn: conn.close())
+        self._conn = None
+
+    # --- backup / restore ---
+    async def backup(self, path: str) -> None:
+        await self.flush()
+
+        def _backup(conn):
+            target = sqlite3.connect(path)
+            try:
+                conn.backup(target)
+            finally:
+                target.close()
+
+        await self.run(_backup)
+
+    async def restore(self, path: str) -> None:
+        """Replaces the live database with a backup and reloads every table."""
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        self._pending.clear()
+        self._pending_sql.clear()
+
+        def _restore(conn):
+            source = sqlite3.connect(path)
+            try:
+                source.backup(conn)
+            finally:
+                source.close()
+
+        await self.run(_restore)
+        await self.load()
+
+
+bot_store = BotStore()
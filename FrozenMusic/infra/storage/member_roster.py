@@ -0,0 +1,106 @@
+"""
+member_roster.py
+
+Per-chat member rosters for random picks, filled incrementally from joins,
+leaves and observed senders instead of listing the whole chat.
+(c) 2025 FrozenBots
+"""
+
+import os
+import random
+from datetime import datetime, timezone
+
+from FrozenMusic.infra.storage.kv_store import bot_store
+
+ROSTER_MAX_MEMBERS = int(os.environ.get("ROSTER_MAX_MEMBERS", "20000"))
+ROSTER_SEED_LIMIT = int(os.environ.get("ROSTER_SEED_LIMIT", "200"))
+
+
+class ChatRoster:
+    """
+    members/index give O(1) add, remove and uniform pick. Past `capacity`
+    the roster becomes a reservoir sample of every member ever offered, so
+    memory stays bounded while picks stay uniform.
+    """
+
+    __slots__ = ("members", "index", "seen", "capacity")
+
+    def __init__(self, capacity: int = ROSTER_MAX_MEMBERS):
+        self.members = []
+        self.index = {}
+        self.seen = 0
+        self.capacity = capacity
+
+    def add(self, user_id: int) -> None:
+        if user_id in self.index:
+            return
+        self.seen += 1
+        if len(self.members) < self.capacity:
+            self.index[user_id] = len(self.members)
+            self.members.append(user_id)
+            return
+        slot = random.randrange(self.seen)
+        if slot < self.capacity:
+            del self.index[self.members[slot]]
+            self.members[slot] = user_id
+            self.index[user_id] = slot
+
+    def remove(self, user_id: int) -> None:
+        slot = self.index.pop(user_id, None)
+        if slot is None:
+            return
+        last = self.members.pop()
+        if last != user_id:
+            self.members[slot] = last
+            self.index[last] = slot
+
+    def pick(self, k: int):
+        if len(self.members) < k:
+            return None
+        return random.sample(self.members, k)
+
+    def __len__(self):
+        return len(self.members)
+
+
+class MemberRosters:
+    def __init__(self, store=bot_store):
+        self._rosters = {}
+        self.daily = store.dict("couple_of_the_day")
+        store.on_load(self.daily.warm)
+
+    def roster(self, chat_id: int) -> ChatRoster:
+        roster = self._rosters.get(chat_id)
+        if roster is None:
+            roster = self._rosters[chat_id] = ChatRoster()
+        return roster
+
+    def observe(self, chat_id: int, user) -> None:
+        if user and not user.is_bot and not user.is_deleted:
+            self.roster(chat_id).add(user.id)
+
+    def forget(self, chat_id: int, user_id: int) -> None:
+        roster = self._rosters.get(chat_id)
+        if roster:
+            roster.remove(user_id)
+
+    async def seed(self, client, chat_id: int, limit: int = ROSTER_SEED_LIMIT) -> None:
+        """One bounded listing for chats the bot has not heard much from yet."""
+        async for member in client.get_chat_members(chat_id, limit=limit):
+            self.observe(chat_id, member.user)
+
+    @staticmethod
+    def today() -> str:
+        return datetime.now(timezone.utc).date().isoformat()
+
+    def couple_of_the_day(self, chat_id: int):
+        entry = self.daily.get(chat_id)
+        if entry and entry["date"] == self.today():
+            return entry["names"]
+        return None
+
+    def remember_couple(self, chat_id: int, names) -> None:
+        self.daily[chat_id] = {"date": self.today(), "names": list(names)}
+
+
+member_rosters = MemberRosters()
@@ -0,0 +1,213 @@
+"""
+hedged_search.py
+
+Search front-end that hedges slow primary lookups with the backup engine and
+keeps a circuit breaker per backend.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+from FrozenMusic.infra.observability.metrics import metrics
+from FrozenMusic.infra.vector.yt_backup_engine import yt_backup_engine
+from FrozenMusic.infra.vector.yt_vector_orchestrator import yt_vector_orchestrator
+
+logger = logging.getLogger(__name__)
+
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_DEFAULT_DELAY = float(os.environ.get("HEDGE_DEFAULT_DELAY", "2.0"))
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", "0.95"))
+BREAKER_FAILURES = int(os.environ.get("BREAKER_FAILURES", "5"))
+BREAKER_COOLDOWN = float(os.environ.get("BREAKER_COOLDOWN", "30"))
+
+search_seconds = metrics.histogram(
+    "frozen_search_duration_seconds",
+    "Search backend latency, by backend and outcome (ok, error, or cancelled when a hedge won).",
+    ("backend", "outcome"),
+)
+
+
+class LatencyTracker:
+    """
+    Rolling window of call latencies, in seconds: successful calls, plus
+    the elapsed time of a call cancelled because a hedge answered first.
+    That call took at least that long, and leaving it out would let the
+    window see only fast calls and drag the hedge delay down.
+    """
+
+    def __init__(self, window: int = 200):
+        self.samples = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def percentile(self, q: float):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failures` consecutive errors; after `cooldown`
+    seconds one probe call is let through (half-open) and its outcome decides
+    whether the breaker closes again or stays open.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.name = name
+        self.failures = failures
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def release(self) -> None:
+        """Gives back a probe slot whose call was cancelled before finishing."""
+        self.probe_in_flight = False
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info(f"{self.name} search backend recovered, closing breaker")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self.probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failures:
+            if self.state != self.OPEN:
+                logger.warning(f"{self.name} search backend failing, opening breaker")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class HedgedSearch:
+    def __init__(self, primary=yt_vector_orchestrator, backup=yt_backup_engine):
+        self.backends = {"primary": primary, "backup": backup}
+        self.breakers = {name: CircuitBreaker(name) for name in self.backends}
+        self.latency = {name: LatencyTracker() for name in self.backends}
+        self.hedges_fired = 0
+        self.hedges_won = 0
+
+    def hedge_delay(self) -> float:
+        tracker = self.latency["primary"]
+        if len(tracker.samples) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        return tracker.percentile(HEDGE_PERCENTILE)
+
+    async def _call(self, name: str, query: str):
+        started = time.monotonic()
+        try:
+            result = await self.backends[name](query)
+        except asyncio.CancelledError:
+            search_seconds.observe(time.monotonic() - started, name, "cancelled")
+            raise
+        except Exception:
+            search_seconds.observe(time.monotonic() - started, name, "error")
+            self.breakers[name].record_failure()
+            raise
+        elapsed = time.monotonic() - started
+        search_seconds.observe(elapsed, name, "ok")
+        self.latency[name].record(elapsed)
+        self.breakers[name].record_success()
+        return result
+
+    def _launch(self, name: str, query: str, holds_slot: bool):
+        """
+        Starts a backend call. A call that holds a breaker slot gives it back
+        from a done-callback when cancelled: that also covers a task
+        cancelled before its body ever ran, which no try/finally inside
+        _call would see.
+        """
+        task = asyncio.ensure_future(self._call(name, query))
+        if holds_slot:
+            task.add_done_callback(lambda t: t.cancelled() and self.breakers[name].release())
+        return task
+
+    async def search(self, query: str):
+        """
+        Returns the same single-track tuple or playlist payload as
+        yt_vector_orchestrator, from whichever backend answers first.
+        """
+        allowed = True
+        if self.breakers["primary"].allow():
+            first, hedge = "primary", "backup"
+        elif self.breakers["backup"].allow():
+            first, hedge = "backup", None
+        else:
+            # Both breakers are open; try the primary anyway rather than fail
+            # without a single attempt.
+            first, hedge, allowed = "primary", None, False
+
+        first_started = time.monotonic()
+        pending = {self._launch(first, query, allowed): first}
+        hedged = False
+        errors = []
+        try:
+            while pending:
+                timeout = self.hedge_delay() if hedge else None
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if self.breakers[hedge].allow():
+                        self.hedges_fired += 1
+                        hedged = True
+                        pending[self._launch(hedge, query, True)] = hedge
+                    hedge = None
+                    continue
+
+                for task in done:
+                    name = pending.pop(task)
+                    if task.exception() is None:
+                        if hedged and name != first:
+                            self.hedges_won += 1
+                            if first in pending.values():
+                                # Lower bound for the call about to be cancelled.
+                                self.latency[first].record(time.monotonic() - first_started)
+                        return task.result()
+                    errors.append(f"{name}: {task.exception()}")
+
+                # The only runner failed outright; fall over to the backend
+                # we were holding back instead of waiting out the delay.
+                if not pending and hedge:
+                    if self.breakers[hedge].allow():
+                        pending[self._launch(hedge, query, True)] = hedge
+                    hedge = None
+        finally:
+            for task in pending:
+                task.cancel()
+
+        raise Exception("All search backends failed: " + "; ".join(errors))
+
+    def stats(self) -> dict:
+        return {
+            "primary_p50": self.latency["primary"].percentile(0.5),
+            "primary_p95": self.latency["primary"].percentile(0.95),
+            "backup_p95": self.latency["backup"].percentile(0.95),
+            "hedge_delay": self.hedge_delay(),
+            "hedges_fired": self.hedges_fired,
+            "hedges_won": self.hedges_won,
+            "breakers": {name: breaker.state for name, breaker in self.breakers.items()},
+        }
+
+
+hedged_search = HedgedSearch()
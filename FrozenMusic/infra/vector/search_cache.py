@@ -0,0 +1,129 @@
+"""
+search_cache.py
+
+TTL + LRU cache in front of the hedged search, keyed by a normalized query.
+(c) 2025 FrozenBots
+"""
+
+import copy
+import os
+import re
+import time
+import urllib.parse
+from collections import OrderedDict
+
+from FrozenMusic.infra.observability.metrics import metrics
+from FrozenMusic.infra.vector.hedged_search import hedged_search
+
+SEARCH_CACHE_TTL = int(os.environ.get("SEARCH_CACHE_TTL", "3600"))
+SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", "5000"))
+
+YOUTUBE_HOSTS = {
+    "youtube.com", "www.youtube.com", "m.youtube.com", "music.youtube.com",
+    "youtu.be", "www.youtu.be", "youtube-nocookie.com", "www.youtube-nocookie.com",
+}
+VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _youtube_key(query: str):
+    candidate = query if "://" in query else "https://" + query
+    try:
+        parsed = urllib.parse.urlsplit(candidate)
+    except ValueError:
+        return None
+    host = (parsed.hostname or "").lower()
+    if host not in YOUTUBE_HOSTS:
+        return None
+
+    params = urllib.parse.parse_qs(parsed.query)
+    segments = [s for s in parsed.path.split("/") if s]
+    video_id = None
+    if host.endswith("youtu.be"):
+        video_id = segments[0] if segments else None
+    elif params.get("v"):
+        video_id = params["v"][0]
+    elif len(segments) >= 2 and segments[0] in ("shorts", "embed", "live", "v"):
+        video_id = segments[1]
+
+    if video_id and VIDEO_ID_RE.match(video_id):
+        return f"yt:{video_id}"
+    if params.get("list"):
+        return f"ytlist:{params['list'][0]}"
+    return None
+
+
+def normalize_query(query: str) -> str:
+    """
+    Maps equivalent queries onto one key: YouTube links of any flavour become
+    yt:<video id> / ytlist:<playlist id>, free text is case-folded with its
+    whitespace collapsed.
+    """
+    query = query.strip()
+    key = _youtube_key(query) if " " not in query else None
+    if key:
+        return key
+    return WHITESPACE_RE.sub(" ", query.casefold())
+
+
+class SearchCache:
+    def __init__(self, max_entries: int = SEARCH_CACHE_SIZE, ttl: int = SEARCH_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Playlist payloads are dicts; hand out a copy so callers can't edit
+        # the cached one.
+        return copy.deepcopy(entry[1]) if isinstance(entry[1], dict) else entry[1]
+
+    def put(self, key: str, result) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+search_cache = SearchCache()
+
+metrics.gauge(
+    "frozen_search_cache_lookups", "Search cache lookups by result.",
+    lambda: {("hit",): search_cache.hits, ("miss",): search_cache.misses}, ("result",),
+)
+metrics.gauge("frozen_search_cache_hit_ratio", "Share of search lookups served from the cache.",
+              lambda: search_cache.stats()["hit_rate"])
+metrics.gauge("frozen_search_cache_entries", "Queries held by the search cache.", lambda: len(search_cache._entries))
+
+
+async def cached_search(query: str):
+    """Cached entry point for /play lookups; same return shape as yt_vector_orchestrator."""
+    key = normalize_query(query)
+    result = search_cache.get(key)
+    if result is not None:
+        return result
+
+    result = await hedged_search.search(query)
+    if isinstance(result, dict) and "playlist" in result:
+        search_cache.put(key, copy.deepcopy(result))
+    elif isinstance(result, tuple) and result[0]:
+        search_cache.put(key, result)
+    return result
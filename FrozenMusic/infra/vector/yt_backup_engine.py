@@ -1,7 +1,9 @@
-import aiohttp
+import asyncio
 import urllib.parse
 import random
 
+from FrozenMusic.infra.concurrency.http_pool import SEARCH_TIMEOUT, get_http_session
+
 RETRY_SHARDS = [random.randint(1, 10) for _ in range(5)]
 THRESHOLD_LIMIT = 3.14
 BACKUP_STATE_POOL = {}
@@ -45,18 +47,18 @@ async def yt_backup_engine(query: str):
     )
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(backup_url, timeout=30) as resp:
-                if resp.status != 200:
-                    raise Exception(f"Backup API returned status {resp.status}")
-                data = await resp.json()
-                if "playlist" in data:
-                    return data
-                return (
-                    data.get("link"),
-                    data.get("title"),
-                    data.get("duration"),
-                    data.get("thumbnail")
-                )
+        session = get_http_session()
+        async with session.get(backup_url, timeout=SEARCH_TIMEOUT) as resp:
+            if resp.status != 200:
+                raise Exception(f"Backup API returned status {resp.status}")
+            data = await resp.json()
+            if "playlist" in data:
+                return data
+            return (
+                data.get("link"),
+                data.get("title"),
+                data.get("duration"),
+                data.get("thumbnail")
+            )
     except Exception as e:
         raise Exception(f"Backup Search API error: {e}")
@@ -1,7 +1,8 @@
-import aiohttp
 import asyncio
 import random
 
+from FrozenMusic.infra.concurrency.http_pool import SEARCH_TIMEOUT, get_http_session
+
 ASYNC_SHARD_POOL = [random.randint(50, 500) for _ in range(10)]
 VECTOR_THRESHOLD = 0.773
 LIMITER_STATE = {}
@@ -44,20 +45,20 @@ async def yt_vector_orchestrator(query: str):
     await sync_validator(engine, query)
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{API_URL}{query}") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if "playlist" in data:
-                        return data
-                    else:
-                        return (
-                            data.get("link"),
-                            data.get("title"),
-                            data.get("duration"),
-                            data.get("thumbnail")
-                        )
+        session = get_http_session()
+        async with session.get(f"{API_URL}{query}", timeout=SEARCH_TIMEOUT) as response:
+            if response.status == 200:
+                data = await response.json()
+                if "playlist" in data:
+                    return data
                 else:
-                    raise Exception(f"API returned status code {response.status}")
+                    return (
+                        data.get("link"),
+                        data.get("title"),
+                        data.get("duration"),
+                        data.get("thumbnail")
+                    )
+            else:
+                raise Exception(f"API returned status code {response.status}")
     except Exception as e:
         raise Exception(f"Vector resolution failure: {str(e)}")
@@ -0,0 +1,233 @@
+"""
+audio_cache.py
+
+Content-addressed, size-bounded on-disk cache for downloaded audio.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from collections import Counter, OrderedDict
+
+logger = logging.getLogger(__name__)
+
+AUDIO_CACHE_DIR = os.environ.get("AUDIO_CACHE_DIR", "audio_cache")
+AUDIO_CACHE_MAX_BYTES = int(os.environ.get("AUDIO_CACHE_MAX_BYTES", str(2 * 1024 ** 3)))
+INDEX_FILE = "index.json"
+BLOB_SUFFIX = ".mp3"
+PART_SUFFIX = ".part"
+# Only names this cache writes; AUDIO_CACHE_DIR may be shared with other files.
+_BLOB_NAME = re.compile(r"[0-9a-f]{64}" + re.escape(BLOB_SUFFIX))
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AudioCache:
+    """
+    Blobs are stored as <sha256>.mp3 inside the cache directory and kept in
+    LRU order. The url -> digest index is rewritten atomically after every
+    change so the cache survives restarts.
+
+    Urls being played are pinned with pin(url) and unpinned with
+    release(url); eviction skips any blob a pinned url points at, so a
+    stream never loses its file mid-playback.
+    """
+
+    def __init__(self, root: str = AUDIO_CACHE_DIR, max_bytes: int = AUDIO_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._blobs = OrderedDict()
+        self._urls = {}
+        self._verified = set()
+        self._pinned = Counter()
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest + BLOB_SUFFIX)
+
+    def _load(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        try:
+            with open(os.path.join(self.root, INDEX_FILE), "r") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+
+        blobs = sorted(data.get("blobs", {}).items(), key=lambda item: item[1].get("last_used", 0))
+        for digest, record in blobs:
+            path = self._blob_path(digest)
+            if not os.path.isfile(path) or os.path.getsize(path) != record.get("size"):
+                continue
+            self._blobs[digest] = {"size": record["size"], "last_used": record.get("last_used", 0)}
+            self.total_bytes += record["size"]
+        for url, digest in data.get("urls", {}).items():
+            if digest in self._blobs:
+                self._urls[url] = digest
+
+        # Part files and blobs the index does not know about are leftovers
+        # from an interrupted download or a crashed eviction. Anything else
+        # in the directory is not ours and stays.
+        for name in os.listdir(self.root):
+            stray_blob = _BLOB_NAME.fullmatch(name) and name[:-len(BLOB_SUFFIX)] not in self._blobs
+            if not (stray_blob or name.endswith(PART_SUFFIX)):
+                continue
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError:
+                pass
+        self._loaded = True
+
+    def _write_index(self, snapshot: dict) -> None:
+        path = os.path.join(self.root, INDEX_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, path)
+
+    async def _save_index(self) -> None:
+        snapshot = {"blobs": {d: dict(r) for d, r in self._blobs.items()}, "urls": dict(self._urls)}
+        await asyncio.to_thread(self._write_index, snapshot)
+
+    async def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            await asyncio.to_thread(self._load)
+
+    def _drop(self, digest: str) -> None:
+        record = self._blobs.pop(digest, None)
+        if record is None:
+            return
+        self.total_bytes -= record["size"]
+        self._verified.discard(digest)
+        for url in [u for u, d in self._urls.items() if d == digest]:
+            del self._urls[url]
+        try:
+            os.remove(self._blob_path(digest))
+        except OSError:
+            pass
+
+    async def lookup(self, url: str):
+        """Returns the cached file path for url, or None."""
+        async with self._lock:
+            await self._ensure_loaded()
+            digest = self._urls.get(url)
+            if digest is None:
+                self.misses += 1
+                return None
+            path = self._blob_path(digest)
+            ok = os.path.isfile(path) and os.path.getsize(path) == self._blobs[digest]["size"]
+            verify = ok and digest not in self._verified
+
+        if verify:
+            # Hashing a large blob takes a while; other lookups and commits
+            # must not queue behind it, so it runs outside the lock.
+            try:
+                ok = await asyncio.to_thread(_hash_file, path) == digest
+            except OSError:
+                ok = False
+
+        async with self._lock:
+            if self._urls.get(url) != digest:
+                # Evicted or replaced while we were hashing.
+                self.misses += 1
+                return None
+            if not ok:
+                logger.warning(f"Dropping corrupt cache entry {digest} for {url}")
+                self._drop(digest)
+                await self._save_index()
+                self.misses += 1
+                return None
+            if verify:
+                self._verified.add(digest)
+            self._blobs.move_to_end(digest)
+            self._blobs[digest]["last_used"] = time.time()
+            self.hits += 1
+            return path
+
+    def pin(self, url: str) -> None:
+        """Protects whatever url resolves to, now or once downloaded, from eviction."""
+        self._pinned[url] += 1
+
+    def release(self, url: str) -> None:
+        """Drops one pin taken with pin(url), trimming the cache if it ran over meanwhile."""
+        if self._pinned[url] <= 1:
+            del self._pinned[url]
+        else:
+            self._pinned[url] -= 1
+        if self.total_bytes > self.max_bytes:
+            asyncio.ensure_future(self._trim_later())
+
+    def _trim(self, keep: str = None) -> bool:
+        pinned = {self._urls[url] for url in self._pinned if url in self._urls}
+        trimmed = False
+        for digest in list(self._blobs):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if digest == keep or digest in pinned:
+                continue
+            self._drop(digest)
+            trimmed = True
+        return trimmed
+
+    async def _trim_later(self) -> None:
+        async with self._lock:
+            if self._trim():
+                await self._save_index()
+
+    async def new_part_path(self) -> str:
+        """Scratch path inside the cache dir for an in-progress download."""
+        # Loading sweeps stray .part files, so it has to happen before any
+        # download of this process starts writing one.
+        async with self._lock:
+            await self._ensure_loaded()
+        return os.path.join(self.root, uuid.uuid4().hex + PART_SUFFIX)
+
+    async def commit(self, url: str, part_path: str, digest: str) -> str:
+        """Moves a finished download into the cache and returns its final path."""
+        async with self._lock:
+            await self._ensure_loaded()
+            path = self._blob_path(digest)
+            size = os.path.getsize(part_path)
+            if digest in self._blobs:
+                os.remove(part_path)
+            else:
+                os.replace(part_path, path)
+                self._blobs[digest] = {"size": size, "last_used": time.time()}
+                self.total_bytes += size
+            self._blobs.move_to_end(digest)
+            self._verified.add(digest)
+            self._urls[url] = digest
+
+            self._trim(keep=digest)
+            await self._save_index()
+            return path
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._blobs),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "pinned": sum(self._pinned.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
+
+
+audio_cache = AudioCache()
@@ -0,0 +1,36 @@
+"""
+bot_identity.py
+
+The bot's own user record, resolved once at startup.
+(c) 2025 FrozenBots
+"""
+
+import os
+
+
+class BotIdentity:
+    def __init__(self):
+        self.id = None
+        self.username = None
+        self.first_name = None
+        self._link_override = os.environ.get("BOT_LINK")
+
+    async def resolve(self, client) -> None:
+        """Called once after client.start(); every later read is a plain attribute."""
+        me = client.me or await client.get_me()
+        self.id = me.id
+        self.username = me.username
+        self.first_name = me.first_name
+
+    @property
+    def link(self) -> str:
+        """BOT_LINK if set (e.g. a custom domain or a renamed bot), else the t.me link."""
+        return (self._link_override or f"https://t.me/{self.username}").rstrip("/")
+
+    @property
+    def startgroup_url(self) -> str:
+        link = self.link
+        return link + ("&" if "?" in link else "?") + "startgroup=true"
+
+
+bot_identity = BotIdentity()
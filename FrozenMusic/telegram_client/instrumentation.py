@@ -0,0 +1,90 @@
+"""
+instrumentation.py
+
+Handler latency and outbound Telegram API metrics for the pyrogram client.
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import time
+from functools import wraps
+
+from pyrogram.errors import FloodWait
+
+from FrozenMusic.infra.observability.metrics import metrics
+
+API_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+handler_seconds = metrics.histogram(
+    "frozen_handler_duration_seconds",
+    "Time spent handling one update, by the handler or pipeline step that finished it.",
+    ("handler",),
+)
+api_calls = metrics.counter(
+    "frozen_telegram_api_calls_total", "Outbound Telegram API calls, by raw method.", ("method",)
+)
+api_errors = metrics.counter(
+    "frozen_telegram_api_errors_total", "Telegram API calls that raised, by raw method and error.", ("method", "error")
+)
+api_seconds = metrics.histogram(
+    "frozen_telegram_api_duration_seconds", "Telegram API call latency, by raw method.", ("method",), API_BUCKETS
+)
+flood_waits = metrics.counter(
+    "frozen_telegram_flood_waits_total", "FloodWait errors returned by Telegram, by raw method.", ("method",)
+)
+flood_wait_seconds = metrics.counter(
+    "frozen_telegram_flood_wait_seconds_total", "Seconds Telegram asked the bot to wait, by raw method.", ("method",)
+)
+
+
+def timed_handler(handler):
+    """Records the duration of a pyrogram handler under its function name."""
+    name = handler.__name__
+
+    @wraps(handler)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await handler(*args, **kwargs)
+        finally:
+            handler_seconds.observe(time.perf_counter() - started, name)
+
+    return wrapper
+
+
+def instrument_client(client) -> None:
+    """
+    Wraps client.invoke, which every high-level pyrogram method goes
+    through. pyrogram normally sleeps out short FloodWaits inside the
+    session where they cannot be seen, so the wrapper asks it to raise
+    every FloodWait and does the same sleep-or-raise itself against the
+    client's sleep_threshold, counting each one on the way.
+
+    File parts are sent by pyrogram's media sessions directly and are not
+    counted here.
+    """
+    invoke = client.invoke
+
+    @wraps(invoke)
+    async def instrumented_invoke(query, *args, sleep_threshold=None, **kwargs):
+        method = type(query).__name__
+        threshold = client.sleep_threshold if sleep_threshold is None else sleep_threshold
+        while True:
+            api_calls.inc(method)
+            started = time.perf_counter()
+            try:
+                return await invoke(query, *args, sleep_threshold=0, **kwargs)
+            except FloodWait as e:
+                wait = e.value
+                flood_waits.inc(method)
+                flood_wait_seconds.inc(method, amount=wait)
+                if wait > threshold >= 0:
+                    raise
+            except Exception as e:
+                api_errors.inc(method, type(e).__name__)
+                raise
+            finally:
+                api_seconds.observe(time.perf_counter() - started, method)
+            await asyncio.sleep(wait)
+
+    client.invoke = instrumented_invoke
@@ -0,0 +1,106 @@
+"""
+media_cache.py
+
+Persistent source -> file_id map so media is uploaded or fetched by
+Telegram once and re-sent by reference afterwards, plus size-aware
+downloads that stay in memory unless the file is large.
+(c) 2025 FrozenBots
+"""
+
+import logging
+import os
+import tempfile
+from contextlib import asynccontextmanager
+
+from pyrogram.errors import BadRequest
+
+from FrozenMusic.infra.storage.kv_store import bot_store
+
+logger = logging.getLogger(__name__)
+
+MEDIA_IN_MEMORY_MAX_BYTES = int(os.environ.get("MEDIA_IN_MEMORY_MAX_BYTES", str(20 * 1024 ** 2)))
+
+
+@asynccontextmanager
+async def downloaded_media(message, media, file_name: str = None):
+    """
+    Yields an upload-ready source for `media` (an attribute of `message`):
+    a named BytesIO when it fits under MEDIA_IN_MEMORY_MAX_BYTES, otherwise
+    the path of a spool file streamed chunk by chunk. The spool file is
+    removed on exit, errors included.
+    """
+    file_name = file_name or getattr(media, "file_name", None) or media.file_unique_id
+    if (media.file_size or 0) <= MEDIA_IN_MEMORY_MAX_BYTES:
+        buf = await message.download(in_memory=True)
+        buf.name = file_name
+        buf.seek(0)
+        yield buf
+        return
+
+    with tempfile.TemporaryDirectory(prefix="media-") as spool_dir:
+        path = os.path.join(spool_dir, file_name)
+        with open(path, "wb") as spool:
+            async for chunk in message._client.stream_media(message):
+                spool.write(chunk)
+        yield path
+
+
+class MediaFileCache:
+    def __init__(self, store=bot_store):
+        self.file_ids = store.dict("media_file_ids")
+        store.on_load(self.file_ids.warm)
+        self.hits = 0
+        self.misses = 0
+
+    async def _send_cached(self, send, kind: str, key: str, **kwargs):
+        file_id = self.file_ids.get(key)
+        if not file_id:
+            return None
+        try:
+            sent = await send(**{kind: file_id}, **kwargs)
+            self.hits += 1
+            return sent
+        except BadRequest as e:
+            logger.info(f"Cached file_id for {key} rejected, re-sending: {e}")
+            self.file_ids.pop(key, None)
+            return None
+
+    def _remember(self, key: str, kind: str, sent) -> None:
+        media = getattr(sent, kind, None)
+        if media is not None:
+            self.file_ids[key] = media.file_id
+
+    async def send(self, send, kind: str, source: str, **kwargs):
+        """
+        Calls send(**{kind: ...}, **kwargs), e.g. message.reply_animation with
+        kind="animation". A cached file_id is tried first; if Telegram rejects
+        it the entry is dropped and the original source is sent instead.
+        """
+        sent = await self._send_cached(send, kind, source, **kwargs)
+        if sent is not None:
+            return sent
+        self.misses += 1
+        sent = await send(**{kind: source}, **kwargs)
+        self._remember(source, kind, sent)
+        return sent
+
+    async def send_once(self, send, kind: str, key: str, open_source, **kwargs):
+        """
+        Like send(), for sources that are costly to produce: open_source() is
+        an async context manager yielding the upload source and is only
+        entered on a cache miss.
+        """
+        sent = await self._send_cached(send, kind, key, **kwargs)
+        if sent is not None:
+            return sent
+        self.misses += 1
+        async with open_source() as source:
+            sent = await send(**{kind: source}, **kwargs)
+        self._remember(key, kind, sent)
+        return sent
+
+    def stats(self) -> dict:
+        return {"entries": len(self.file_ids), "hits": self.hits, "misses": self.misses}
+
+
+media_cache = MediaFileCache()
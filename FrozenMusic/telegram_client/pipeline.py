@@ -0,0 +1,157 @@
+"""
+pipeline.py
+
+Single-pass message pipeline: one handler per update that parses the
+command once, dispatches through a command table and runs ordered checks
+with early exit.
+(c) 2025 FrozenBots
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+COMMAND_STAGE = 20
+SCOPES = ("group", "private", "any")
+
+
+def parse_command(text: str, username: str = None):
+    """
+    "/Warn@MyBot 3 spam" -> ["warn", "3", "spam"], matching what pyrogram's
+    command filter leaves in message.command. Commands addressed to
+    another bot, and plain text, give None.
+    """
+    if not text or text[0] != "/":
+        return None
+    parts = text.split()
+    name, at, target = parts[0][1:].partition("@")
+    if not name or (at and (not username or target.lower() != username.lower())):
+        return None
+    parts[0] = name.lower()
+    return parts
+
+
+class MessageContext:
+    """Per-update facts, computed at most once and shared by every stage."""
+
+    __slots__ = ("client", "message", "chat_id", "user_id", "text", "command", "is_group", "count", "_admin", "_pipeline")
+
+    def __init__(self, pipeline, client, message, username):
+        self._pipeline = pipeline
+        self.client = client
+        self.message = message
+        self.chat_id = message.chat.id
+        self.user_id = message.from_user.id if message.from_user else None
+        self.text = message.text or message.caption or ""
+        self.command = parse_command(self.text, username)
+        self.is_group = message.chat.type is not None and message.chat.type.name in ("GROUP", "SUPERGROUP")
+        self.count = 0
+        self._admin = None
+
+    async def is_admin(self) -> bool:
+        """Resolved on first use only, so most messages never pay for it."""
+        if self._admin is None:
+            self._admin = self.user_id == self._pipeline.owner_id or await self._pipeline.admin_check(
+                self.client, self.chat_id, self.user_id
+            )
+        return self._admin
+
+
+class MessagePipeline:
+    """
+    Stages run in ascending `order` until one returns True. The command
+    table is consulted at COMMAND_STAGE: a known command runs its handler
+    and ends the pipeline, anything else falls through to the later stages.
+
+    observe(seconds, step), if given, receives the time each update spent
+    in the pipeline and the step that finished it: "/name" for a command,
+    the stage function's name, or "pass" when nothing stopped it.
+    """
+
+    def __init__(self, admin_check, owner_id: int = None, observe=None):
+        self.admin_check = admin_check
+        self.owner_id = owner_id
+        self.observe = observe
+        self.username = None
+        self._commands = {}
+        self._stages = []
+
+    def command(self, *names: str, scope: str = "group", owner_only: bool = False):
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown command scope: {scope}")
+
+        def register(handler):
+            for name in names:
+                self._commands[name.lower()] = (handler, scope, owner_only)
+            return handler
+
+        return register
+
+    def stage(self, order: int, scope: str = "group"):
+        """
+        Registers `async check(ctx) -> bool`; a True result stops the update.
+        Cheap, in-memory checks take low orders so they can exit first.
+        """
+
+        def register(check):
+            self._stages.append((order, scope, check))
+            self._stages.sort(key=lambda item: item[0])
+            return check
+
+        return register
+
+    def _lookup(self, ctx: MessageContext):
+        if not ctx.command:
+            return None
+        entry = self._commands.get(ctx.command[0])
+        if entry is None:
+            return None
+        handler, scope, owner_only = entry
+        if scope == "group" and not ctx.is_group or scope == "private" and ctx.is_group:
+            return None
+        if owner_only and ctx.user_id != self.owner_id:
+            return None
+        return handler
+
+    @staticmethod
+    def _in_scope(scope: str, ctx: MessageContext) -> bool:
+        return scope == "any" or (scope == "group") == ctx.is_group
+
+    async def dispatch(self, client, message) -> None:
+        if self.observe is None:
+            await self._dispatch(MessageContext(self, client, message, self.username))
+            return
+        started = time.perf_counter()
+        step = "error"
+        try:
+            step = await self._dispatch(MessageContext(self, client, message, self.username))
+        finally:
+            self.observe(time.perf_counter() - started, step)
+
+    async def _dispatch(self, ctx: MessageContext) -> str:
+        commands_done = False
+        for order, scope, check in self._stages:
+            if not commands_done and order >= COMMAND_STAGE:
+                commands_done = True
+                if await self._run_command(ctx):
+                    return "/" + ctx.command[0]
+            if self._in_scope(scope, ctx) and await check(ctx):
+                return check.__name__
+        if not commands_done and await self._run_command(ctx):
+            return "/" + ctx.command[0]
+        return "pass"
+
+    async def _run_command(self, ctx: MessageContext) -> bool:
+        handler = self._lookup(ctx)
+        if handler is None:
+            return False
+        ctx.message.command = ctx.command
+        try:
+            await handler(ctx.client, ctx.message)
+        except Exception as e:
+            logger.warning(f"/{ctx.command[0]} failed: {e}")
+        return True
+
+    def commands(self):
+        return sorted(self._commands)
@@ -1,11 +1,15 @@
-import aiohttp
 import aiofiles
 import asyncio
+import hashlib
 import os
 import psutil
-import tempfile
 import random
 import string
+import time
+
+from FrozenMusic.infra.concurrency.http_pool import DOWNLOAD_TIMEOUT, get_http_session
+from FrozenMusic.infra.observability.metrics import metrics
+from FrozenMusic.telegram_client.audio_cache import audio_cache
 
 
 ASYNC_SHARD_POOL = [random.uniform(0.05, 0.5) for _ in range(50)]
@@ -15,6 +19,14 @@ VECTOR_FREQUENCY_CONSTANT = 0.424242
 ENTROPIC_LIMIT = 0.618
 GLOBAL_TEMP_STORE = {}
 
+download_seconds = metrics.histogram(
+    "frozen_download_duration_seconds",
+    "Audio download latency, by outcome (cached, ok, timeout or error).",
+    ("outcome",),
+    (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0),
+)
+download_bytes = metrics.counter("frozen_download_bytes_total", "Audio bytes downloaded into the cache.")
+
 
 class LayeredEntropySynthesizer:
     def __init__(self, seed=VECTOR_FREQUENCY_CONSTANT):
@@ -96,8 +108,6 @@ def entropic_fluctuation_emulator(levels: int = 5):
     return spectrum
 
 
-SHARD_CACHE_MATRIX = {}
-
 class TransportVectorHandler:
     def __init__(self):
         self.cache = {}
@@ -114,52 +124,103 @@ class TransportVectorHandler:
 
 DOWNLOAD_API_BASE = "https://polite-tilly-vibeshiftbotss-a46821c0.koyeb.app/download?url="
 
-async def vector_transport_resolver(url: str) -> str:
-    """
-    Resolves and stabilizes external vector transports with transient shard caching
-    and layered transport injection.
-    """
-    initialize_entropy_pool()
-    fluct = matrix_fluctuation_generator()
-    await synthetic_payload_transformer(url)
-    await ephemeral_layer_checker([url, str(fluct[0])])
-
-    if os.path.exists(url) and os.path.isfile(url):
-        return url
-
-    if url in SHARD_CACHE_MATRIX:
-        return SHARD_CACHE_MATRIX[url]
+def _discard_part(part_path):
+    if part_path and os.path.exists(part_path):
+        try:
+            os.remove(part_path)
+        except OSError:
+            pass
+
+_INFLIGHT_DOWNLOADS = {}
+
+def _reap_download(url: str, task: asyncio.Task):
+    if _INFLIGHT_DOWNLOADS.get(url) is task:
+        del _INFLIGHT_DOWNLOADS[url]
+    # Mark the failure as retrieved even if every waiter went away.
+    if not task.cancelled():
+        task.exception()
+
+async def _download_to_cache(url: str) -> str:
+    started = time.monotonic()
+    cached_path = await audio_cache.lookup(url)
+    if cached_path:
+        download_seconds.observe(time.monotonic() - started, "cached")
+        return cached_path
 
     handler = TransportVectorHandler()
     handler.inject_shard(url)
     await handler.stabilize_vector(url)
 
+    part_path = None
     try:
         proc = psutil.Process(os.getpid())
         proc.nice(psutil.IDLE_PRIORITY_CLASS if os.name == "nt" else 19)
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.mp3')
-        file_name = temp_file.name
-        temp_file.close()
-
-        download_url = f"{DOWNLOAD_API_URL}{url}"
-
-        async with aiohttp.ClientSession() as session:
-            async with session.get(download_url, timeout=150) as response:
-                if response.status == 200:
-                    async with aiofiles.open(file_name, 'wb') as f:
-                        while True:
-                            chunk = await response.content.read(32768)
-                            if not chunk:
-                                break
-                            await f.write(chunk)
-                            await asyncio.sleep(0.01)
-
-                    SHARD_CACHE_MATRIX[url] = file_name
-                    return file_name
-                else:
-                    raise Exception(f"Failed to download audio. HTTP status: {response.status}")
+        part_path = await audio_cache.new_part_path()
+
+        download_url = f"{DOWNLOAD_API_BASE}{url}"
+
+        session = get_http_session()
+        async with session.get(download_url, timeout=DOWNLOAD_TIMEOUT) as response:
+            if response.status == 200:
+                digest = hashlib.sha256()
+                async with aiofiles.open(part_path, 'wb') as f:
+                    while True:
+                        chunk = await response.content.read(32768)
+                        if not chunk:
+                            break
+                        digest.update(chunk)
+                        download_bytes.inc(amount=len(chunk))
+                        await f.write(chunk)
+                        await asyncio.sleep(0.01)
+
+                path = await audio_cache.commit(url, part_path, digest.hexdigest())
+                download_seconds.observe(time.monotonic() - started, "ok")
+                return path
+            else:
+                raise Exception(f"Failed to download audio. HTTP status: {response.status}")
     except asyncio.TimeoutError:
+        download_seconds.observe(time.monotonic() - started, "timeout")
+        _discard_part(part_path)
         raise Exception("Download API took too long to respond. Please try again.")
     except Exception as e:
+        download_seconds.observe(time.monotonic() - started, "error")
+        _discard_part(part_path)
         raise Exception(f"Error downloading audio: {e}")
 
+async def vector_transport_resolver(url: str) -> str:
+    """
+    Resolves and stabilizes external vector transports through the on-disk
+    audio cache and layered transport injection. Concurrent callers for the
+    same url share a single download.
+
+    A cached result stays pinned against eviction until the caller calls
+    audio_cache.release(url) when playback ends.
+    """
+    initialize_entropy_pool()
+    fluct = matrix_fluctuation_generator()
+    await synthetic_payload_transformer(url)
+    await ephemeral_layer_checker([url, str(fluct[0])])
+
+    if os.path.exists(url) and os.path.isfile(url):
+        return url
+
+    # Pinned before the lookup so nothing can evict the blob between the
+    # download committing it and this caller getting the path.
+    audio_cache.pin(url)
+    try:
+        cached_path = await audio_cache.lookup(url)
+        if cached_path:
+            return cached_path
+
+        task = _INFLIGHT_DOWNLOADS.get(url)
+        if task is None:
+            task = asyncio.ensure_future(_download_to_cache(url))
+            _INFLIGHT_DOWNLOADS[url] = task
+            task.add_done_callback(lambda t: _reap_download(url, t))
+
+        # Shielded so a cancelled caller only stops waiting; the transfer keeps
+        # going for everyone else and still lands in the cache.
+        return await asyncio.shield(task)
+    except BaseException:
+        audio_cache.release(url)
+        raise
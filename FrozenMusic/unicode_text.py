@@ -0,0 +1,61 @@
+"""
+unicode_text.py
+
+Table-driven Unicode text styles (bold, italic, monospace, small caps)
+built on precomputed str.translate tables.
+(c) 2025 FrozenBots
+"""
+
+import os
+import string
+from functools import lru_cache
+
+STYLE_CACHE_SIZE = int(os.environ.get("STYLE_CACHE_SIZE", "4096"))
+
+
+def _alphabet_table(upper_start: int, lower_start: int, digit_start: int = None) -> dict:
+    table = {}
+    for i, char in enumerate(string.ascii_uppercase):
+        table[ord(char)] = chr(upper_start + i)
+    for i, char in enumerate(string.ascii_lowercase):
+        table[ord(char)] = chr(lower_start + i)
+    if digit_start is not None:
+        for i, char in enumerate(string.digits):
+            table[ord(char)] = chr(digit_start + i)
+    return table
+
+
+_SMALL_CAPS = "ᴀʙᴄᴅᴇꜰɢʜɪᴊᴋʟᴍɴᴏᴘǫʀꜱᴛᴜᴠᴡxʏᴢ"
+
+STYLE_TABLES = {
+    # Mathematical sans-serif bold; digits are left as-is, as the bot always did.
+    "bold": _alphabet_table(0x1D5D4, 0x1D5EE),
+    "italic": _alphabet_table(0x1D608, 0x1D622),
+    "monospace": _alphabet_table(0x1D670, 0x1D68A, 0x1D7F6),
+    "smallcaps": {
+        **{ord(u): s for u, s in zip(string.ascii_uppercase, _SMALL_CAPS)},
+        **{ord(l): s for l, s in zip(string.ascii_lowercase, _SMALL_CAPS)},
+    },
+}
+
+
+@lru_cache(maxsize=STYLE_CACHE_SIZE)
+def stylize(text: str, style: str = "bold") -> str:
+    """Returns text rendered in `style`; characters without a glyph pass through."""
+    return text.translate(STYLE_TABLES[style])
+
+
+def to_bold(text: str) -> str:
+    return stylize(text, "bold")
+
+
+def to_italic(text: str) -> str:
+    return stylize(text, "italic")
+
+
+def to_monospace(text: str) -> str:
+    return stylize(text, "monospace")
+
+
+def to_small_caps(text: str) -> str:
+    return stylize(text, "smallcaps")
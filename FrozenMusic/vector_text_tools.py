@@ -1,6 +1,8 @@
 import random
 import asyncio
 
+from FrozenMusic.unicode_text import to_bold
+
 SHARD_NOISE_SEED = [random.uniform(0.1, 0.9) for _ in range(12)]
 TEXTUAL_STATE_POOL = {}
 
@@ -23,21 +25,14 @@ def entropy_pool_initializer(seed: int = 1337):
     TEXTUAL_STATE_POOL["matrix"] = pool
     return pool
 
+def unicode_boldifier(payload: str) -> str:
+    """
+    Synchronous, sleep-free bold rendering backed by the shared translate tables.
+    """
+    return to_bold(payload)
+
 async def vectorized_unicode_boldifier(payload: str) -> str:
     """
-    Generates a full-width Unicode glyph matrix for advanced text rendering and entropic stabilization.
+    Kept for async callers; renders in one str.translate pass without yielding.
     """
-    synth = GlyphMatrixSynthesizer()
-    synth.encode_payload(payload)
-    await synth.stabilize_matrix(payload)
-
-    glyph_matrix = ""
-    for shard in payload:
-        if 'A' <= shard <= 'Z':
-            glyph_matrix += chr(ord('𝗔') + (ord(shard) - ord('A')))
-        elif 'a' <= shard <= 'z':
-            glyph_matrix += chr(ord('𝗮') + (ord(shard) - ord('a')))
-        else:
-            glyph_matrix += shard
-
-    return glyph_matrix
+    return to_bold(payload)
@@ -0,0 +1,246 @@
+"""
+bench_message_pipeline.py
+
+CPU cost per group message of the old handler set (one pyrogram handler
+per command, each re-parsing the text through its own command filter,
+followed by a catch-all anti-abuse handler that awaited an admin lookup
+first) against the single-pass MessagePipeline.
+
+pyrogram's filter classes are reproduced here so the benchmark runs
+without a client; the command filter mirrors pyrogram 2.x's regex-based
+implementation. Moderation work is stubbed identically on both sides, so
+the difference is routing and check ordering only.
+Run from the repository root: python benchmarks/bench_message_pipeline.py
+(c) 2025 FrozenBots
+"""
+
+import asyncio
+import os
+import random
+import re
+import sys
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from FrozenMusic.telegram_client.pipeline import MessagePipeline  # noqa: E402
+
+MESSAGES = 50000
+BOT_USERNAME = "FrozenHelpBot"
+COMMANDS = [
+    "start", "help", "setwelcome", "setphotowelcome", "mute", "unmute", "tmute", "kick", "ban", "unban",
+    "warn", "resetwarns", "warns", "rep", "reps", "del", "stats", "cachestats", "setflood", "whitelist",
+    "restrictfiletype", "truth", "dare", "trivia", "poll", "couple", "dice", "schedule", "unschedule",
+    "autodelete", "tts", "vtt", "getfile", "settitle", "setphoto",
+]
+# Handlers registered before the catch-all anti-abuse handler in the old main.py.
+COMMANDS_BEFORE_CATCH_ALL = 17
+COMMAND_RE = re.compile(r"([\"'])(.*?)(?<!\\)\1|(\S+)")
+
+
+# --- pyrogram 2.x filter semantics -----------------------------------------
+
+class Filter:
+    def __and__(self, other):
+        return AndFilter(self, other)
+
+    def __invert__(self):
+        return InvertFilter(self)
+
+
+class AndFilter(Filter):
+    def __init__(self, base, other):
+        self.base, self.other = base, other
+
+    async def __call__(self, client, message):
+        return await self.base(client, message) and await self.other(client, message)
+
+
+class InvertFilter(Filter):
+    def __init__(self, base):
+        self.base = base
+
+    async def __call__(self, client, message):
+        return not await self.base(client, message)
+
+
+class Simple(Filter):
+    def __init__(self, fn):
+        self.fn = fn
+
+    async def __call__(self, client, message):
+        return self.fn(message)
+
+
+class Command(Filter):
+    def __init__(self, *commands):
+        self.commands = commands
+
+    async def __call__(self, client, message):
+        username = client.me.username or ""
+        text = message.text or message.caption
+        message.command = None
+        if not text or not text.startswith("/"):
+            return False
+        without_prefix = text[1:]
+        for cmd in self.commands:
+            if not re.match(rf"^(?:{cmd}(?:@?{username})?)(?:\s|$)", without_prefix, flags=re.IGNORECASE):
+                continue
+            without_command = re.sub(rf"{cmd}(?:@?{username})?\s?", "", without_prefix, count=1, flags=re.IGNORECASE)
+            message.command = [cmd] + [m.group(2) or m.group(3) or "" for m in COMMAND_RE.finditer(without_command)]
+            return True
+        return False
+
+
+class Regex(Filter):
+    def __init__(self, pattern):
+        self.pattern = re.compile(pattern)
+
+    async def __call__(self, client, message):
+        return bool(message.text and self.pattern.search(message.text))
+
+
+group = Simple(lambda m: m.chat.type.name in ("GROUP", "SUPERGROUP"))
+me = Simple(lambda m: m.outgoing)
+via_bot = Simple(lambda m: m.via_bot is not None)
+new_chat_members = Simple(lambda m: m.new_chat_members)
+text = Simple(lambda m: m.text is not None)
+reply = Simple(lambda m: m.reply_to_message is not None)
+
+
+# --- shared stand-ins for the bot's state ----------------------------------
+
+class Work:
+    """The moderation bookkeeping both variants perform per message."""
+
+    def __init__(self):
+        self.counts = {}
+        self.admins = {(1, 42)}
+        self.gban = {999}
+        self.flood = {}
+        self.handled = 0
+
+    def record(self, chat_id, user_id):
+        key = (chat_id, user_id)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        return self.counts[key]
+
+    async def is_admin(self, client, chat_id, user_id):
+        return (chat_id, user_id) in self.admins
+
+    def flood_hit(self, chat_id, user_id):
+        self.flood[(chat_id, user_id)] = self.flood.get((chat_id, user_id), 0) + 1
+        return None
+
+    def policy(self, message):
+        return False
+
+
+async def noop_handler(client, message):
+    pass
+
+
+def build_legacy(work):
+    handlers = [(group & Command(cmd), noop_handler) for cmd in COMMANDS[:COMMANDS_BEFORE_CATCH_ALL]]
+    handlers[0] = (Command("start", "help"), noop_handler)
+    handlers.insert(1, (new_chat_members, noop_handler))
+
+    async def anti_abuse(client, message):
+        if message.from_user.id in work.gban:
+            return
+        count = work.record(message.chat.id, message.from_user.id)
+        if await work.is_admin(client, message.chat.id, message.from_user.id):
+            return
+        if work.flood_hit(message.chat.id, message.from_user.id):
+            return
+        if count < 5:
+            return
+        work.policy(message)
+
+    handlers.append((group & ~me & ~via_bot, anti_abuse))
+    for cmd in COMMANDS[COMMANDS_BEFORE_CATCH_ALL:]:
+        handlers.append((group & Command(cmd), noop_handler))
+    handlers.append((group & text & ~via_bot & Regex(r"(?i)^(hi|hello|namaste|rules|help)$"), noop_handler))
+    handlers.append((group & text & reply & Regex(r"(?i)^\S+"), noop_handler))
+
+    async def dispatch(client, message):
+        # pyrogram's dispatcher: the first matching handler in the group wins.
+        for check, handler in handlers:
+            if await check(client, message):
+                await handler(client, message)
+                return
+
+    return dispatch
+
+
+def build_pipeline(work):
+    pipeline = MessagePipeline(admin_check=work.is_admin, owner_id=1)
+    pipeline.username = BOT_USERNAME
+    for cmd in COMMANDS:
+        pipeline.command(cmd)(noop_handler)
+
+    @pipeline.stage(0)
+    async def gban(ctx):
+        return ctx.user_id in work.gban
+
+    @pipeline.stage(10)
+    async def count(ctx):
+        ctx.count = work.record(ctx.chat_id, ctx.user_id)
+        return False
+
+    @pipeline.stage(12)
+    async def flood(ctx):
+        return bool(work.flood_hit(ctx.chat_id, ctx.user_id)) and not await ctx.is_admin()
+
+    @pipeline.stage(14)
+    async def low_activity(ctx):
+        return ctx.count < 5 and not await ctx.is_admin()
+
+    @pipeline.stage(16)
+    async def policy(ctx):
+        return work.policy(ctx.message) and not await ctx.is_admin()
+
+    return pipeline.dispatch
+
+
+def make_messages(n):
+    rng = random.Random(1337)
+    chat = SimpleNamespace(id=1, type=SimpleNamespace(name="SUPERGROUP"))
+    words = "namaste bhai kya haal hai aaj ka plan song chalao group me sab log".split()
+    messages = []
+    for _ in range(n):
+        roll = rng.random()
+        if roll < 0.10:
+            body = f"/{rng.choice(COMMANDS)} {rng.choice(words)}"
+        elif roll < 0.15:
+            body = rng.choice(["hi", "hello", "rules"])
+        else:
+            body = " ".join(rng.choice(words) for _ in range(rng.randint(3, 15)))
+        messages.append(SimpleNamespace(
+            chat=chat, text=body, caption=None, command=None, outgoing=False, via_bot=None,
+            new_chat_members=None, reply_to_message=None,
+            from_user=SimpleNamespace(id=rng.randint(1, 5000)),
+        ))
+    return messages
+
+
+async def measure(dispatch, messages):
+    client = SimpleNamespace(me=SimpleNamespace(username=BOT_USERNAME))
+    started = time.process_time()
+    for message in messages:
+        await dispatch(client, message)
+    return (time.process_time() - started) / len(messages)
+
+
+def main():
+    messages = make_messages(MESSAGES)
+    print(f"{MESSAGES} group messages (10% commands, 5% automation triggers)")
+    for label, build in (("legacy handler set", build_legacy), ("single-pass pipeline", build_pipeline)):
+        dispatch = build(Work())
+        best = min(asyncio.run(measure(dispatch, messages)) for _ in range(3))
+        print(f"  {label:<22} {best * 1e6:8.2f} us CPU/message")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+bench_unicode_text.py
+
+Per-call cost of styling long display names: the old per-character +=
+loop against the translate-table module, cold and cached.
+Run from the repository root: python benchmarks/bench_unicode_text.py
+(c) 2025 FrozenBots
+"""
+
+import os
+import random
+import string
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from FrozenMusic.unicode_text import STYLE_TABLES, stylize  # noqa: E402
+
+NAME_LENGTH = 64
+NAMES = 1000
+ROUNDS = 20
+
+
+def legacy_bold(text: str) -> str:
+    bold_text = ""
+    for char in text:
+        if 'A' <= char <= 'Z':
+            bold_text += chr(ord('𝗔') + (ord(char) - ord('A')))
+        elif 'a' <= char <= 'z':
+            bold_text += chr(ord('𝗮') + (ord(char) - ord('a')))
+        else:
+            bold_text += char
+    return bold_text
+
+
+def main():
+    rng = random.Random(1337)
+    alphabet = string.ascii_letters + string.digits + " _-" + "नमस्ते"
+    names = ["".join(rng.choice(alphabet) for _ in range(NAME_LENGTH)) for _ in range(NAMES)]
+    assert all(legacy_bold(n) == stylize(n, "bold") for n in names)
+
+    bold = STYLE_TABLES["bold"]
+    cases = {
+        "legacy += loop": lambda: [legacy_bold(n) for n in names],
+        "str.translate (uncached)": lambda: [n.translate(bold) for n in names],
+        "stylize (LRU warm)": lambda: [stylize(n, "bold") for n in names],
+    }
+    print(f"{NAMES} names x {NAME_LENGTH} chars, best of {ROUNDS} rounds")
+    for label, fn in cases.items():
+        best = min(timeit.repeat(fn, number=1, repeat=ROUNDS))
+        print(f"  {label:<26} {best / NAMES * 1e6:8.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
+import io
 import os
-import re
 import sys
 import time
 import json
@@ -9,17 +9,45 @@ import random
 import requests
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
-from flask import Flask, request
-from pyrogram import Client, filters, errors
-from pyrogram.enums import ChatType, ChatMemberStatus, ParseMode
+from pyrogram import Client, filters, errors, idle
+from pyrogram.enums import ParseMode
 from pyrogram.types import (
     Message,
     CallbackQuery,
     InlineKeyboardButton,
     InlineKeyboardMarkup,
     ChatPermissions,
-    ChatMember,
 )
+from FrozenMusic.infra.concurrency.admin_roster import admin_roster
+from FrozenMusic.telegram_client.audio_cache import audio_cache
+from FrozenMusic.infra.concurrency.http_pool import close_http_session
+from FrozenMusic.infra.concurrency.fanout import fan_out
+from FrozenMusic.infra.concurrency.broadcast import broadcast_engine
+from FrozenMusic.infra.concurrency.rate_limit import send_limiter
+from FrozenMusic.infra.chrono.scheduler import format_duration, job_scheduler, parse_duration
+from FrozenMusic.infra.moderation.policy import moderation_policies
+from FrozenMusic.infra.moderation.flood import FLOOD_STAGE, flood_check, flood_detector
+from FrozenMusic.infra.storage.kv_store import bot_store
+from FrozenMusic.infra.storage.activity import activity_store
+from FrozenMusic.infra.storage.counters import reputation_store, warn_store
+from FrozenMusic.infra.storage.chat_registry import chat_registry
+from FrozenMusic.infra.storage.member_roster import member_rosters
+from FrozenMusic.infra.games.trivia import TriviaBusy, trivia_engine
+from FrozenMusic.infra.vector.search_cache import search_cache
+from FrozenMusic.infra.observability.metrics import metrics, metrics_server
+from FrozenMusic.infra.observability.profiler import (
+    PROFILE_DEFAULT_SECONDS,
+    PROFILE_MAX_SECONDS,
+    ProfilerBusy,
+    sampling_profiler,
+)
+from FrozenMusic.infra.speech.tts import TTSBusy, text_to_speech
+from FrozenMusic.infra.speech.vtt import SpeechNotRecognized, VTTBusy, voice_to_text
+from FrozenMusic.telegram_client.bot_identity import bot_identity
+from FrozenMusic.telegram_client.instrumentation import handler_seconds, instrument_client, timed_handler
+from FrozenMusic.telegram_client.media_cache import downloaded_media, media_cache
+from FrozenMusic.telegram_client.pipeline import MessagePipeline
+from FrozenMusic.unicode_text import to_bold
 
 
 # Load environment variables
@@ -35,50 +63,49 @@ LOG_CHANNEL_ID = int(os.getenv("-1002107533268", None))
 # Initialize the bot client
 session_name = os.environ.get("SESSION_NAME", "help_bot")
 bot = Client(session_name, bot_token=BOT_TOKEN, api_id=API_ID, api_hash=API_HASH)
+instrument_client(bot)
+pipeline = MessagePipeline(admin_check=admin_roster.is_admin, owner_id=OWNER_ID, observe=handler_seconds.observe)
 
 # Define bot name for dynamic use
 BOT_NAME = os.environ.get("BOT_NAME", "Frozen Help Bot")
-BOT_LINK = os.environ.get("BOT_LINK", f"https://t.me/{bot.get_me().username}")
 
-# In-memory storage for various data
-user_stats = {}
-premium_users = set()
+# Persistent tables (served from memory, written behind to data/bot.db)
+premium_users = bot_store.set("premium_users")
 FAQ_DATA = {
     "rules": "ग्रुप के नियम:\n1. कोई स्पैमिंग नहीं\n2. कोई गाली-गलौज नहीं\n3. केवल ग्रुप से संबंधित बातें।",
     "help": "मैं आपकी मदद कैसे कर सकता हूँ? `/help` कमांड का प्रयोग करें या नीचे दिए गए बटन पर क्लिक करें।",
     "contact": "एडमिन से संपर्क करने के लिए @Frozensupport1 पर मैसेज करें।",
 }
-warn_counts = {}
-user_message_timestamps = {}
-scheduled_messages = []
-user_reputation = {}
-auto_delete_timers = {}
-notes_data = {}
-gban_list = set()
-custom_welcome_messages = {}
-link_whitelist = set()
-restricted_file_types = set()
-
-# Load data from file if it exists
-def load_data():
-    global notes_data, gban_list
+auto_delete_timers = bot_store.dict("auto_delete_timers")
+notes_data = bot_store.dict("notes_data")
+gban_list = bot_store.set("gban_list")
+custom_welcome_messages = bot_store.dict("custom_welcome_messages")
+
+async def warm_main_tables():
+    # Read from handlers; fill them with every load, /restore included,
+    # rather than blocking the loop on the first message.
+    await bot_store.warm(gban_list, auto_delete_timers, custom_welcome_messages)
+
+bot_store.on_load(warm_main_tables)
+
+LEGACY_DATA_FILE = "bot_data.json"
+BACKUP_DB_PATH = os.environ.get("BACKUP_DB_PATH", os.path.join("data", "bot_backup.db"))
+
+# Open the store, importing the old bot_data.json once
+async def load_data():
+    await bot_store.load()
     try:
-        with open("bot_data.json", "r") as f:
-            data = json.load(f)
-            notes_data = data.get("notes_data", {})
-            gban_list.update(data.get("gban_list", []))
-            print("Data loaded successfully.")
-    except (FileNotFoundError, json.JSONDecodeError):
-        print("No existing data file found or file is empty.")
-
-# Save data to file
-def save_data():
-    data = {
-        "notes_data": notes_data,
-        "gban_list": list(gban_list)
-    }
-    with open("bot_data.json", "w") as f:
-        json.dump(data, f, indent=4)
+        if await bot_store.import_json(LEGACY_DATA_FILE):
+            print("Legacy data migrated successfully.")
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Could not migrate {LEGACY_DATA_FILE}: {e}")
+
+# Snapshot the store to the backup file
+async def save_data():
+    await activity_store.flush()
+    await warn_store.flush()
+    await reputation_store.flush()
+    await bot_store.backup(BACKUP_DB_PATH)
     print("Data saved successfully.")
 
 # Auto-mute on low messages settings
@@ -88,38 +115,16 @@ LOW_MSG_MUTE_TIME = 300 # 5 minutes
 # Pre-defined game data
 TRUTH_QUESTIONS = ["क्या आपने कभी अपने दोस्त को झूठ बोला है?", "आपकी सबसे अजीब आदत क्या है?", "आपकी सबसे बड़ी डर क्या है?", "आपने अपने जीवन में सबसे अजीब काम क्या किया है?"]
 DARE_CHALLENGES = ["अपनी प्रोफ़ाइल फ़ोटो 1 घंटे के लिए बदलें।", "ग्रुप में एक जोक सुनाएं।", "1 मिनट तक अपनी नाक पर अपनी उंगली रखें।", "ग्रुप में एक अजीबोगरीब आवाज़ निकालें।"]
-TRIVIA_QUESTIONS = {
-    "भारत की राजधानी क्या है?": "दिल्ली",
-    "सूर्य से सबसे निकटतम ग्रह कौन सा है?": "बुध",
-    "राष्ट्रीय गान किसने लिखा था?": "रवींद्रनाथ टैगोर",
-    "सबसे बड़ा महासागर कौन सा है?": "प्रशांत महासागर",
-}
-trivia_game = {}
 
 # --- Helper functions ---
 async def is_admin_or_owner(message: Message):
     if message.from_user.id == OWNER_ID:
         return True
     
-    try:
-        chat_member: ChatMember = await message._client.get_chat_member(
-            chat_id=message.chat.id,
-            user_id=message.from_user.id
-        )
-        return chat_member.status in [ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]
-    except Exception:
-        return False
+    return await admin_roster.is_admin(message._client, message.chat.id, message.from_user.id)
 
 def to_bold_unicode(text: str) -> str:
-    bold_text = ""
-    for char in text:
-        if 'A' <= char <= 'Z':
-            bold_text += chr(ord('𝗔') + (ord(char) - ord('A')))
-        elif 'a' <= char <= 'z':
-            bold_text += chr(ord('𝗮') + (ord(char) - ord('a')))
-        else:
-            bold_text += char
-    return bold_text
+    return to_bold(text)
 
 async def extract_target_user(message: Message):
     if message.reply_to_message:
@@ -149,51 +154,62 @@ async def log_admin_action(action: str, admin: str, target: str):
             print(f"Failed to send log to channel: {e}")
 
 # --- New Enhanced UI for Start/Help ---
-@bot.on_message(filters.command(["start", "help"]))
-async def start_and_help_handler(_, message):
-    user_id = message.from_user.id
-    raw_name = message.from_user.first_name or ""
-    styled_name = to_bold_unicode(raw_name)
+START_ANIMATION_URL = os.environ.get(
+    "START_ANIMATION_URL",
+    "https://frozen-imageapi.lagendplayersyt.workers.dev/file/2e483e17-05cb-45e2-b166-1ea476ce9521.mp4",
+)
 
-    caption = (
-        f"👋 **नमस्ते {styled_name}!**\n\n"
-        f"मैं एक एडवांस ग्रुप मैनेजमेंट असिस्टेंट हूँ।\n"
-        f"मैं आपके ग्रुप को साफ, सुरक्षित और व्यवस्थित रखने में मदद करता हूँ।\n\n"
-        f"मेरे सभी फ़ीचर्स को एक्सप्लोर करने के लिए, नीचे दिए गए **Help** बटन पर क्लिक करें।\n\n"
-        f"**Developer:** [Shubham](tg://user?id={OWNER_ID})"
-    )
-    buttons = [
+# Keyboards are built once; the start keyboard waits for the bot username.
+HELP_MENU_KEYBOARD = InlineKeyboardMarkup([
+    [InlineKeyboardButton("🛡️ एडमिन कमांड्स", callback_data="help_admin"),
+     InlineKeyboardButton("🚀 यूटिलिटी कमांड्स", callback_data="help_utility")],
+    [InlineKeyboardButton("😄 मनोरंजन कमांड्स", callback_data="help_fun"),
+     InlineKeyboardButton("ℹ️ जानकारी कमांड्स", callback_data="help_info")],
+    [InlineKeyboardButton("🏠 मुख्य पेज पर वापस", callback_data="go_back")]
+])
+HELP_BACK_KEYBOARD = InlineKeyboardMarkup([[InlineKeyboardButton("🔙 वापस", callback_data="show_help")]])
+START_KEYBOARD = None
+
+def build_start_keyboard():
+    global START_KEYBOARD
+    START_KEYBOARD = InlineKeyboardMarkup([
         [
-            InlineKeyboardButton("➕ मुझे ग्रुप में जोड़ें", url=f"https://t.me/{bot.get_me().username}?startgroup=true"),
+            InlineKeyboardButton("➕ मुझे ग्रुप में जोड़ें", url=bot_identity.startgroup_url),
             InlineKeyboardButton("📢 अपडेट्स", url="https://t.me/vibeshiftbots")
         ],
         [
             InlineKeyboardButton("❓ Help", callback_data="show_help"),
             InlineKeyboardButton("💬 सपोर्ट", url="https://t.me/Frozensupport1")
         ]
-    ]
-    reply_markup = InlineKeyboardMarkup(buttons)
-    await message.reply_animation(
-        animation="https://frozen-imageapi.lagendplayersyt.workers.dev/file/2e483e17-05cb-45e2-b166-1ea476ce9521.mp4",
-        caption=caption,
+    ])
+
+def start_caption(first_name):
+    styled_name = to_bold_unicode(first_name or "")
+    return (
+        f"👋 **नमस्ते {styled_name}!**\n\n"
+        f"मैं एक एडवांस ग्रुप मैनेजमेंट असिस्टेंट हूँ।\n"
+        f"मैं आपके ग्रुप को साफ, सुरक्षित और व्यवस्थित रखने में मदद करता हूँ।\n\n"
+        f"मेरे सभी फ़ीचर्स को एक्सप्लोर करने के लिए, नीचे दिए गए **Help** बटन पर क्लिक करें।\n\n"
+        f"**Developer:** [Shubham](tg://user?id={OWNER_ID})"
+    )
+
+@pipeline.command("start", "help", scope="any")
+async def start_and_help_handler(_, message):
+    await media_cache.send(
+        message.reply_animation, "animation", START_ANIMATION_URL,
+        caption=start_caption(message.from_user.first_name),
         parse_mode=ParseMode.MARKDOWN,
-        reply_markup=reply_markup
+        reply_markup=START_KEYBOARD
     )
 
 @bot.on_callback_query(filters.regex("show_help"))
+@timed_handler
 async def show_help_callback(_, callback_query):
     text = "**📚 कमांड्स का मेनू**\n\nनीचे दिए गए बटन्स से आप कमांड्स को कैटेगरी के अनुसार देख सकते हैं।"
-    buttons = [
-        [InlineKeyboardButton("🛡️ एडमिन कमांड्स", callback_data="help_admin"),
-         InlineKeyboardButton("🚀 यूटिलिटी कमांड्स", callback_data="help_utility")],
-        [InlineKeyboardButton("😄 मनोरंजन कमांड्स", callback_data="help_fun"),
-         InlineKeyboardButton("ℹ️ जानकारी कमांड्स", callback_data="help_info")],
-        [InlineKeyboardButton("🏠 मुख्य पेज पर वापस", callback_data="go_back")]
-    ]
-    reply_markup = InlineKeyboardMarkup(buttons)
-    await callback_query.message.edit_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+    await callback_query.message.edit_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=HELP_MENU_KEYBOARD)
 
 @bot.on_callback_query(filters.regex("help_admin"))
+@timed_handler
 async def help_admin_callback(_, callback_query):
     text = (
         "🛡️ **एडमिन और मॉडरेसन कमांड्स**\n\n"
@@ -209,11 +225,10 @@ async def help_admin_callback(_, callback_query):
         "`/setwelcome`: कस्टम वेलकम मैसेज सेट करें।\n"
         "`/autodelete <time>`: मैसेज को ऑटो-डिलीट करें।"
     )
-    buttons = [[InlineKeyboardButton("🔙 वापस", callback_data="show_help")]]
-    reply_markup = InlineKeyboardMarkup(buttons)
-    await callback_query.message.edit_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+    await callback_query.message.edit_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=HELP_BACK_KEYBOARD)
 
 @bot.on_callback_query(filters.regex("help_utility"))
+@timed_handler
 async def help_utility_callback(_, callback_query):
     text = (
         "🚀 **यूटिलिटी कमांड्स**\n\n"
@@ -224,11 +239,10 @@ async def help_utility_callback(_, callback_query):
         "`/gban <reply>`: सदस्य को बॉट के सभी ग्रुप्स से बैन करें (केवल मालिक)।\n"
         "`/ungban <reply>`: सदस्य को बॉट के सभी ग्रुप्स से अनबैन करें (केवल मालिक)।"
     )
-    buttons = [[InlineKeyboardButton("🔙 वापस", callback_data="show_help")]]
-    reply_markup = InlineKeyboardMarkup(buttons)
-    await callback_query.message.edit_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+    await callback_query.message.edit_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=HELP_BACK_KEYBOARD)
 
 @bot.on_callback_query(filters.regex("help_fun"))
+@timed_handler
 async def help_fun_callback(_, callback_query):
     text = (
         "😄 **मनोरंजन कमांड्स**\n\n"
@@ -239,11 +253,10 @@ async def help_fun_callback(_, callback_query):
         "`/reps`: सबसे ज़्यादा प्रतिष्ठा वाले सदस्यों को देखें।\n"
         "`/quote`: एक प्रेरणादायक कोट पाएं।"
     )
-    buttons = [[InlineKeyboardButton("🔙 वापस", callback_data="show_help")]]
-    reply_markup = InlineKeyboardMarkup(buttons)
-    await callback_query.message.edit_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+    await callback_query.message.edit_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=HELP_BACK_KEYBOARD)
 
 @bot.on_callback_query(filters.regex("help_info"))
+@timed_handler
 async def help_info_callback(_, callback_query):
     text = (
         "ℹ️ **जानकारी कमांड्स**\n\n"
@@ -253,42 +266,20 @@ async def help_info_callback(_, callback_query):
         "`/chatinfo`: ग्रुप के बारे में जानकारी पाएं।\n"
         "`/ping`: बॉट की गति (speed) को चेक करें।"
     )
-    buttons = [[InlineKeyboardButton("🔙 वापस", callback_data="show_help")]]
-    reply_markup = InlineKeyboardMarkup(buttons)
-    await callback_query.message.edit_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=reply_markup)
+    await callback_query.message.edit_text(text, parse_mode=ParseMode.MARKDOWN, reply_markup=HELP_BACK_KEYBOARD)
 
 @bot.on_callback_query(filters.regex("go_back"))
+@timed_handler
 async def go_back_callback(_, callback_query):
-    user_id = callback_query.from_user.id
-    raw_name = callback_query.from_user.first_name or ""
-    styled_name = to_bold_unicode(raw_name)
-
-    caption = (
-        f"👋 **नमस्ते {styled_name}!**\n\n"
-        f"मैं एक एडवांस ग्रुप मैनेजमेंट असिस्टेंट हूँ।\n"
-        f"मैं आपके ग्रुप को साफ, सुरक्षित और व्यवस्थित रखने में मदद करता हूँ।\n\n"
-        f"मेरे सभी फ़ीचर्स को एक्सप्लोर करने के लिए, नीचे दिए गए **Help** बटन पर क्लिक करें।\n\n"
-        f"**Developer:** [Shubham](tg://user?id={OWNER_ID})"
-    )
-    buttons = [
-        [
-            InlineKeyboardButton("➕ मुझे ग्रुप में जोड़ें", url=f"https://t.me/{bot.get_me().username}?startgroup=true"),
-            InlineKeyboardButton("📢 अपडेट्स", url="https://t.me/vibeshiftbots")
-        ],
-        [
-            InlineKeyboardButton("❓ Help", callback_data="show_help"),
-            InlineKeyboardButton("💬 सपोर्ट", url="https://t.me/Frozensupport1")
-        ]
-    ]
-    reply_markup = InlineKeyboardMarkup(buttons)
     await callback_query.message.edit_caption(
-        caption=caption,
+        caption=start_caption(callback_query.from_user.first_name),
         parse_mode=ParseMode.MARKDOWN,
-        reply_markup=reply_markup
+        reply_markup=START_KEYBOARD
     )
 
 # --- Welcome/Onboarding Feature ---
 @bot.on_message(filters.new_chat_members)
+@timed_handler
 async def welcome_new_member(client, message):
     chat_id = message.chat.id
     for member in message.new_chat_members:
@@ -309,9 +300,12 @@ async def welcome_new_member(client, message):
         keyboard = InlineKeyboardMarkup([
             [InlineKeyboardButton("✅ मैंने नियम पढ़ लिए हैं", callback_data="rules_accepted")]
         ])
-        await client.send_message(chat_id, welcome_text, reply_markup=keyboard)
+        if isinstance(welcome_text, dict):
+            await client.send_photo(chat_id, welcome_text["photo"], caption=welcome_text["caption"], reply_markup=keyboard)
+        else:
+            await client.send_message(chat_id, welcome_text, reply_markup=keyboard)
 
-@bot.on_message(filters.group & filters.command("setwelcome"))
+@pipeline.command("setwelcome")
 async def set_welcome_message(client, message):
     if not await is_admin_or_owner(message):
         return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते।")
@@ -323,7 +317,7 @@ async def set_welcome_message(client, message):
     custom_welcome_messages[message.chat.id] = parts[1]
     await message.reply("✅ कस्टम वेलकम मैसेज सेट हो गया है।")
 
-@bot.on_message(filters.group & filters.command("setphotowelcome"))
+@pipeline.command("setphotowelcome")
 async def set_photo_welcome(client, message):
     if not await is_admin_or_owner(message):
         return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते।")
@@ -339,6 +333,7 @@ async def set_photo_welcome(client, message):
     await message.reply("✅ फ़ोटो के साथ वेलकम मैसेज सेट हो गया है।")
 
 @bot.on_callback_query(filters.regex("rules_accepted"))
+@timed_handler
 async def handle_rules_accepted(client, callback_query):
     user_id = callback_query.from_user.id
     message = callback_query.message
@@ -356,7 +351,7 @@ async def handle_rules_accepted(client, callback_query):
         print(f"Error deleting welcome message: {e}")
 
 # --- Moderation Commands ---
-@bot.on_message(filters.group & filters.command("mute"))
+@pipeline.command("mute")
 async def mute_user(client, message):
     if not await is_admin_or_owner(message):
         return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते, क्योंकि आप एडमिन नहीं हैं।")
@@ -375,7 +370,7 @@ async def mute_user(client, message):
     except Exception as e:
         await message.reply(f"❌ यूज़र को म्यूट करने में एक समस्या आई।\nError: {e}")
 
-@bot.on_message(filters.group & filters.command("unmute"))
+@pipeline.command("unmute")
 async def unmute_user(client, message):
     if not await is_admin_or_owner(message):
         return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते, क्योंकि आप एडमिन नहीं हैं।")
@@ -390,7 +385,7 @@ async def unmute_user(client, message):
     except Exception as e:
         await message.reply(f"❌ यूज़र को अनम्यूट करने में एक समस्या आई।\nError: {e}")
 
-@bot.on_message(filters.group & filters.command("tmute"))
+@pipeline.command("tmute")
 async def tmute_user(client, message):
     if not await is_admin_or_owner(message):
         return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते, क्योंकि आप एडमिन नहीं हैं।")
@@ -419,7 +414,7 @@ async def tmute_user(client, message):
     except Exception as e:
         await message.reply(f"❌ यूज़र को अस्थायी रूप से म्यूट करने में एक समस्या आई।\nError: {e}")
 
-@bot.on_message(filters.group & filters.command("kick"))
+@pipeline.command("kick")
 async def kick_user(client, message):
     if not await is_admin_or_owner(message):
         return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते, क्योंकि आप एडमिन नहीं हैं।")
@@ -434,7 +429,7 @@ async def kick_user(client, message):
     except Exception as e:
         await message.reply(f"❌ यूज़र को किक करने में एक समस्या आई।\nError: {e}")
 
-@bot.on_message(filters.group & filters.command("ban"))
+@pipeline.command("ban")
 async def ban_user(client, message):
     if not await is_admin_or_owner(message):
         return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते, क्योंकि आप एडमिन नहीं हैं।")
@@ -449,7 +444,7 @@ async def ban_user(client, message):
     except Exception as e:
         await message.reply(f"❌ यूज़र को बैन करने में एक समस्या आई।\nError: {e}")
 
-@bot.on_message(filters.group & filters.command("unban"))
+@pipeline.command("unban")
 async def unban_user(client, message):
     if not await is_admin_or_owner(message):
         return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते, क्योंकि आप एडमिन नहीं हैं।")
@@ -464,7 +459,121 @@ async def unban_user(client, message):
     except Exception as e:
         await message.reply(f"❌ यूज़र को अनबैन करने में एक समस्या आई।\nError: {e}")
 
-@bot.on_message(filters.group & filters.command("del"))
+# --- Warnings and reputation ---
+WARN_LIMIT = 3
+WARN_EXPIRY = int(os.getenv("WARN_EXPIRY", str(7 * 86400)))
+REP_COOLDOWN = 60
+rep_cooldowns = {}
+
+async def resolve_names(client, user_ids):
+    try:
+        users = {user.id: user for user in await client.get_users(list(user_ids))}
+    except Exception:
+        users = {}
+    return {user_id: users[user_id].first_name if user_id in users else str(user_id) for user_id in user_ids}
+
+async def expire_warns(payloads):
+    for job in payloads:
+        warn_store.decr(job["chat_id"], job["user_id"])
+
+job_scheduler.register("warn_expiry", expire_warns)
+job_scheduler.index("warn_expiry", lambda job: (job["chat_id"], job["user_id"]))
+
+def reset_warns(chat_id: int, user_id: int):
+    # The cleared warns must not expire a second time later.
+    job_scheduler.cancel_key("warn_expiry", (chat_id, user_id))
+    warn_store.reset(chat_id, user_id)
+
+@pipeline.command("warn")
+async def warn_user(client, message):
+    if not await is_admin_or_owner(message):
+        return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते, क्योंकि आप एडमिन नहीं हैं।")
+
+    target_user = await extract_target_user(message)
+    if not target_user:
+        return
+    if await admin_roster.is_admin(client, message.chat.id, target_user.id):
+        return await message.reply("❌ एडमिन को चेतावनी नहीं दी जा सकती।")
+
+    count = warn_store.incr(message.chat.id, target_user.id)
+    job_scheduler.schedule(WARN_EXPIRY, "warn_expiry", {
+        "chat_id": message.chat.id, "user_id": target_user.id,
+    })
+    await log_admin_action(f"Warn ({count}/{WARN_LIMIT})", message.from_user.first_name, target_user.first_name)
+
+    if count < WARN_LIMIT:
+        return await message.reply(f"⚠️ **{target_user.first_name}** को चेतावनी दी गई है। ({count}/{WARN_LIMIT})")
+
+    try:
+        await client.ban_chat_member(message.chat.id, target_user.id)
+        reset_warns(message.chat.id, target_user.id)
+        await message.reply(f"🚫 **{target_user.first_name}** को {WARN_LIMIT} चेतावनियों के बाद बैन कर दिया गया है।")
+        await log_admin_action("Ban (warn limit)", message.from_user.first_name, target_user.first_name)
+    except Exception as e:
+        await message.reply(f"❌ यूज़र को बैन करने में एक समस्या आई।\nError: {e}")
+
+@pipeline.command("resetwarns")
+async def reset_warns_command(client, message):
+    if not await is_admin_or_owner(message):
+        return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते, क्योंकि आप एडमिन नहीं हैं।")
+
+    target_user = await extract_target_user(message)
+    if not target_user:
+        return
+    reset_warns(message.chat.id, target_user.id)
+    await message.reply(f"✅ **{target_user.first_name}** की सभी चेतावनियाँ हटा दी गई हैं।")
+    await log_admin_action("Reset Warns", message.from_user.first_name, target_user.first_name)
+
+@pipeline.command("warns")
+async def warns_command(client, message):
+    if message.reply_to_message or len(message.command) > 1:
+        target_user = await extract_target_user(message)
+        if not target_user:
+            return
+        count = warn_store.get(message.chat.id, target_user.id)
+        return await message.reply(f"⚠️ **{target_user.first_name}** की चेतावनियाँ: {count}/{WARN_LIMIT}")
+
+    leaders = warn_store.top(message.chat.id, 10)
+    if not leaders:
+        return await message.reply("✅ इस ग्रुप में किसी को कोई चेतावनी नहीं है।")
+    names = await resolve_names(client, [user_id for user_id, _ in leaders])
+    lines = ["⚠️ **सबसे ज़्यादा चेतावनियाँ**\n"]
+    for rank, (user_id, count) in enumerate(leaders, start=1):
+        lines.append(f"{rank}. **{names[user_id]}** — {count}/{WARN_LIMIT}")
+    await message.reply("\n".join(lines))
+
+@pipeline.command("rep")
+async def give_reputation(client, message):
+    if not message.reply_to_message or not message.reply_to_message.from_user:
+        return await message.reply("❌ कृपया उस सदस्य के मैसेज पर रिप्लाई करें जिसकी प्रतिष्ठा बढ़ानी है।")
+    target_user = message.reply_to_message.from_user
+    if target_user.id == message.from_user.id or target_user.is_bot:
+        return await message.reply("❌ आप अपनी या किसी बॉट की प्रतिष्ठा नहीं बढ़ा सकते।")
+
+    now = time.monotonic()
+    key = (message.chat.id, message.from_user.id)
+    if now - rep_cooldowns.get(key, -REP_COOLDOWN) < REP_COOLDOWN:
+        return await message.reply(f"⏳ आप हर {REP_COOLDOWN} सेकंड में एक बार ही प्रतिष्ठा दे सकते हैं।")
+    rep_cooldowns[key] = now
+    if len(rep_cooldowns) > 10000:
+        for stale in [k for k, t in rep_cooldowns.items() if now - t >= REP_COOLDOWN]:
+            del rep_cooldowns[stale]
+
+    count = reputation_store.incr(message.chat.id, target_user.id)
+    await message.reply(f"👍 **{target_user.first_name}** की प्रतिष्ठा अब {count} है।")
+
+@pipeline.command("reps")
+async def reputation_leaderboard(client, message):
+    leaders = reputation_store.top(message.chat.id, 10)
+    if not leaders:
+        return await message.reply("❌ इस ग्रुप में अभी किसी की प्रतिष्ठा नहीं है।")
+    names = await resolve_names(client, [user_id for user_id, _ in leaders])
+    lines = ["🏆 **टॉप प्रतिष्ठा**\n"]
+    for rank, (user_id, count) in enumerate(leaders, start=1):
+        lines.append(f"{rank}. **{names[user_id]}** — {count}")
+    await message.reply("\n".join(lines))
+
+@pipeline.command("del")
 async def delete_message(client, message):
     if not await is_admin_or_owner(message):
         return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते।")
@@ -477,75 +586,201 @@ async def delete_message(client, message):
     except Exception as e:
         await message.reply(f"❌ मैसेज डिलीट करने में एक समस्या आई।\nError: {e}")
 
+@pipeline.command("stats")
+async def stats_command(client, message):
+    leaders = activity_store.leaders(message.chat.id, 10)
+    if not leaders:
+        return await message.reply("❌ इस ग्रुप के लिए अभी कोई आँकड़े नहीं हैं।")
+
+    names = await resolve_names(client, [user_id for user_id, _ in leaders])
+    lines = ["📊 **टॉप मैसेज सेंडर्स**\n"]
+    for rank, (user_id, count) in enumerate(leaders, start=1):
+        lines.append(f"{rank}. **{names[user_id]}** — {count} मैसेज")
+    await message.reply("\n".join(lines))
+
 # --- Anti-Abuse & Security ---
-@bot.on_message(filters.group & ~filters.me & ~filters.via_bot)
-async def anti_abuse_filter(client, message):
-    if message.from_user and message.from_user.id in gban_list:
+async def punish_flood(client, message, action: str):
+    chat_id = message.chat.id
+    user = message.from_user
+    try:
+        await message.delete()
+        if action == "warn":
+            await client.send_message(chat_id, f"⚠️ **{user.first_name}**, कृपया फ्लड न करें। अगली बार म्यूट कर दिया जाएगा।")
+        elif action == "tmute":
+            mute_seconds = flood_detector.config(chat_id).mute_seconds
+            await client.restrict_chat_member(
+                chat_id=chat_id,
+                user_id=user.id,
+                permissions=ChatPermissions(can_send_messages=False),
+                until_date=datetime.now(timezone.utc) + timedelta(seconds=mute_seconds)
+            )
+            await client.send_message(chat_id, f"🔇 **{user.first_name}** को फ्लडिंग के लिए {mute_seconds // 60} मिनट के लिए म्यूट कर दिया गया है।")
+        else:
+            await client.ban_chat_member(chat_id, user.id)
+            flood_detector.forget(chat_id, user.id)
+            await client.send_message(chat_id, f"🚫 **{user.first_name}** को बार-बार फ्लडिंग के लिए बैन कर दिया गया है।")
+        await log_admin_action(f"Anti-Flood ({action})", BOT_NAME, user.first_name)
+    except Exception as e:
+        print(f"Failed to apply flood action {action}: {e}")
+
+# --- Message pipeline ---
+# Every non-service message goes through one handler. Stages run cheapest
+# first; admin status (possibly an RPC) is only resolved once a stage is
+# about to act on a member.
+@pipeline.stage(0)
+async def enforce_gban(ctx):
+    if ctx.user_id is None:
+        # Channel posts and anonymous admins: nothing to count or moderate.
+        return True
+    if ctx.user_id not in gban_list:
+        return False
+    try:
+        await ctx.client.ban_chat_member(ctx.chat_id, ctx.user_id)
+        return True
+    except Exception:
+        return False
+
+@pipeline.stage(10)
+async def count_activity(ctx):
+    ctx.count = activity_store.record(ctx.chat_id, ctx.user_id)
+    return False
+
+# Flood, low-activity and content checks run before commands dispatch
+# (COMMAND_STAGE = 20), so a command is throttled like any other message.
+# Anti-flood: warn -> tmute -> ban on repeated bursts.
+check_flood = pipeline.stage(FLOOD_STAGE)(flood_check(flood_detector, punish_flood))
+
+@pipeline.stage(14)
+async def mute_low_activity(ctx):
+    # Auto-mute for low message count
+    if ctx.count >= LOW_MSG_MUTE_THRESHOLD or await ctx.is_admin():
+        return False
+    client, message = ctx.client, ctx.message
+    try:
+        await client.restrict_chat_member(
+            chat_id=ctx.chat_id,
+            user_id=ctx.user_id,
+            permissions=ChatPermissions(can_send_messages=False),
+            until_date=datetime.now(timezone.utc) + timedelta(seconds=LOW_MSG_MUTE_TIME)
+        )
+        await message.reply(f"🔇 **{message.from_user.first_name}** को कुछ देर के लिए म्यूट कर दिया गया है, क्योंकि आपके मैसेज बहुत कम हैं। ग्रुप में भाग लेने के लिए और मैसेज भेजें।")
+    except Exception:
+        pass
+    return True
+
+@pipeline.stage(16)
+async def enforce_content_policy(ctx):
+    # Links, restricted file types and profanity in one pass over the message
+    client, message = ctx.client, ctx.message
+    verdict = moderation_policies.get(ctx.chat_id).check(message)
+    forwarded = message.forward_from or message.forward_from_chat
+    if not (verdict.bad_link or verdict.restricted_file or verdict.profanity or forwarded):
+        return False
+    if await ctx.is_admin():
+        return False
+
+    if verdict.bad_link:
         try:
-            await client.ban_chat_member(message.chat.id, message.from_user.id)
-            return
+            await message.delete()
+            await client.send_message(message.chat.id, f"❌ **{message.from_user.first_name}**, ग्रुप में लिंक भेजने की अनुमति नहीं है।")
         except Exception:
             pass
 
-    user_status = (await client.get_chat_member(message.chat.id, message.from_user.id)).status
-    if user_status in [ChatMemberStatus.ADMINISTRATOR, ChatMemberStatus.OWNER]:
-        return
-
-    # Auto-mute for low message count
-    user_id = message.from_user.id
-    if user_id not in user_stats or user_stats[user_id].get('messages', 0) < LOW_MSG_MUTE_THRESHOLD:
+    if verdict.restricted_file:
         try:
-            await client.restrict_chat_member(
-                chat_id=message.chat.id,
-                user_id=user_id,
-                permissions=ChatPermissions(can_send_messages=False),
-                until_date=datetime.now(timezone.utc) + timedelta(seconds=LOW_MSG_MUTE_TIME)
-            )
-            await message.reply(f"🔇 **{message.from_user.first_name}** को कुछ देर के लिए म्यूट कर दिया गया है, क्योंकि आपके मैसेज बहुत कम हैं। ग्रुप में भाग लेने के लिए और मैसेज भेजें।")
+            await message.delete()
+            await client.send_message(message.chat.id, f"❌ **{message.from_user.first_name}**, इस प्रकार की फ़ाइलें भेजने की अनुमति नहीं है।")
         except Exception:
             pass
-        return
 
-    # Link filter with whitelist
-    if message.text and re.search(r'(https?://\S+|t\.me/\S+)', message.text):
-        is_whitelisted = False
-        for domain in link_whitelist:
-            if domain in message.text:
-                is_whitelisted = True
-                break
-        
-        if not is_whitelisted:
-            try:
-                await message.delete()
-                await client.send_message(message.chat.id, f"❌ **{message.from_user.first_name}**, ग्रुप में लिंक भेजने की अनुमति नहीं है।")
-            except Exception:
-                pass
-    
-    # File type restriction
-    if message.document:
-        file_name, file_extension = os.path.splitext(message.document.file_name.lower())
-        if file_extension in restricted_file_types:
-            try:
-                await message.delete()
-                await client.send_message(message.chat.id, f"❌ **{message.from_user.first_name}**, इस प्रकार की फ़ाइलें भेजने की अनुमति नहीं है।")
-            except Exception:
-                pass
-
-    if message.forward_from or message.forward_from_chat:
+    if forwarded:
         try:
             await message.delete()
         except Exception:
             pass
 
-    profanity_list = ["fuck", "bitch", "cunt", "chutiya", "randi"]
-    if any(word in (message.text or '').lower() for word in profanity_list):
+    if verdict.profanity:
         try:
             await message.delete()
             await client.send_message(message.chat.id, f"❌ **{message.from_user.first_name}**, ग्रुप में ऐसी भाषा का प्रयोग न करें।")
         except Exception:
             pass
+    return True
+
+@bot.on_message((filters.group | filters.private) & ~filters.service & ~filters.me & ~filters.via_bot)
+async def message_pipeline(client, message):
+    await pipeline.dispatch(client, message)
+
+@bot.on_chat_member_updated()
+@timed_handler
+async def track_admin_changes(client, update):
+    admin_roster.apply_member_update(update)
+    member = update.new_chat_member or update.old_chat_member
+    if member and member.user and member.user.id == bot_identity.id:
+        chat_registry.apply_my_member_update(update)
+
+async def bot_role_in(chat_id):
+    member = await bot.get_chat_member(chat_id, bot_identity.id)
+    return member.status.name.lower()
+
+chat_registry.role_lookup = bot_role_in
+
+@bot.on_message(filters.group | filters.channel, group=-1)
+@timed_handler
+async def track_chat_registry(client, message):
+    if message.service:
+        chat_registry.apply_service_message(message, bot_identity.id)
+        for member in message.new_chat_members or []:
+            member_rosters.observe(message.chat.id, member)
+        if message.left_chat_member:
+            member_rosters.forget(message.chat.id, message.left_chat_member.id)
+    else:
+        chat_registry.observe(message.chat)
+        member_rosters.observe(message.chat.id, message.from_user)
+
+    delay = auto_delete_timers.get(message.chat.id)
+    if delay:
+        job_scheduler.schedule(delay, "delete", {"chat_id": message.chat.id, "message_id": message.id})
+
+@pipeline.command("cachestats", scope="any", owner_only=True)
+async def cache_stats_command(_, message):
+    roster = admin_roster.stats()
+    audio = audio_cache.stats()
+    media = media_cache.stats()
+    search = search_cache.stats()
+    await message.reply(
+        "📊 **कैश आँकड़े**\n\n"
+        f"**एडमिन रोस्टर:** {roster['chats']} चैट, हिट {roster['hits']}, मिस {roster['misses']}, "
+        f"RPC {roster['rpc_calls']} (हिट रेट {roster['hit_rate']:.1%})\n"
+        f"**ऑडियो कैश:** {audio['entries']} फ़ाइलें, {audio['bytes'] / 1024 ** 2:.1f}/{audio['max_bytes'] / 1024 ** 2:.0f} MB "
+        f"(हिट रेट {audio['hit_rate']:.1%})\n"
+        f"**मीडिया file_id:** {media['entries']} एंट्री, हिट {media['hits']}, मिस {media['misses']}\n"
+        f"**सर्च कैश:** {search['entries']} क्वेरी, हिट {search['hits']}, मिस {search['misses']} "
+        f"(हिट रेट {search['hit_rate']:.1%})"
+    )
 
-@bot.on_message(filters.group & filters.command("whitelist"))
+@pipeline.command("setflood")
+async def set_flood_limit(client, message):
+    if not await is_admin_or_owner(message):
+        return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते।")
+
+    parts = message.text.split()
+    if len(parts) == 2 and parts[1].lower() == "off":
+        flood_detector.configure(message.chat.id, enabled=False)
+        return await message.reply("✅ एंटी-फ्लड बंद कर दिया गया है।")
+
+    try:
+        limit = int(parts[1])
+        window = float(parts[2]) if len(parts) > 2 else None
+        if limit < 1 or (window is not None and window <= 0):
+            raise ValueError
+    except (IndexError, ValueError):
+        return await message.reply("❌ सही इस्तेमाल: `/setflood <messages> [seconds]` या `/setflood off`")
+
+    cfg = flood_detector.configure(message.chat.id, limit=limit, window=window)
+    await message.reply(f"✅ एंटी-फ्लड: {cfg.window:g} सेकंड में अधिकतम {cfg.limit} मैसेज।")
+
+@pipeline.command("whitelist")
 async def add_whitelist_domain(client, message):
     if not await is_admin_or_owner(message):
         return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते।")
@@ -554,11 +789,10 @@ async def add_whitelist_domain(client, message):
     if len(parts) < 2:
         return await message.reply("❌ सही इस्तेमाल: `/whitelist <domain>`")
     
-    domain = parts[1].replace('https://', '').replace('http://', '').strip('/')
-    link_whitelist.add(domain)
+    domain = moderation_policies.add_whitelist(message.chat.id, parts[1])
     await message.reply(f"✅ `{domain}` को लिंक की अनुमति वाली लिस्ट में जोड़ा गया है।")
 
-@bot.on_message(filters.group & filters.command("restrictfiletype"))
+@pipeline.command("restrictfiletype")
 async def restrict_file_type(client, message):
     if not await is_admin_or_owner(message):
         return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते।")
@@ -567,70 +801,82 @@ async def restrict_file_type(client, message):
     if len(parts) < 2:
         return await message.reply("❌ सही इस्तेमाल: `/restrictfiletype <.ext>`")
         
-    file_extension = parts[1].lower()
-    if not file_extension.startswith('.'):
-        file_extension = '.' + file_extension
-        
-    restricted_file_types.add(file_extension)
+    file_extension = moderation_policies.restrict_extension(message.chat.id, parts[1])
     await message.reply(f"✅ `{file_extension}` फ़ाइल टाइप को प्रतिबंधित कर दिया गया है।")
 
 # --- Automations & Workflows ---
-@bot.on_message(filters.group & filters.text & ~filters.via_bot & filters.regex(r'(?i)^(hi|hello|namaste|rules|help)$'))
-async def automation_handler(client, message):
-    if not message.text:
-        return
-    
-    text = message.text.lower()
-    
-    if "hi" in text or "hello" in text or "namaste" in text:
+AUTOMATION_TRIGGERS = {"hi": "greet", "hello": "greet", "namaste": "greet", "rules": "rules", "help": "help"}
+
+@pipeline.stage(70)
+async def automation_handler(ctx):
+    trigger = AUTOMATION_TRIGGERS.get(ctx.text.lower()) if ctx.message.text else None
+    if trigger is None:
+        return False
+    message = ctx.message
+
+    if trigger == "greet":
         await message.reply(f"नमस्ते, **{message.from_user.first_name}**! 👋\nग्रुप में आपका स्वागत है।")
 
-    elif "rules" in text:
+    elif trigger == "rules":
         await message.reply("ग्रुप के नियम जानने के लिए `/help` कमांड का प्रयोग करें।")
 
-    elif "help" in text:
+    else:
         await message.reply("मैं आपकी मदद कैसे कर सकता हूँ? `/help` कमांड का प्रयोग करें या नीचे दिए गए बटन पर क्लिक करें।",
                             reply_markup=InlineKeyboardMarkup([[InlineKeyboardButton("❓ Help Menu", callback_data="show_help")]]))
+    return True
 
 # --- New Games and Fun ---
-@bot.on_message(filters.group & filters.command("truth"))
+@pipeline.command("truth")
 async def truth_game(_, message):
     question = random.choice(TRUTH_QUESTIONS)
     await message.reply(f"💡 **Truth**: {question}")
 
-@bot.on_message(filters.group & filters.command("dare"))
+@pipeline.command("dare")
 async def dare_game(_, message):
     challenge = random.choice(DARE_CHALLENGES)
     await message.reply(f"🔥 **Dare**: {challenge}")
 
-@bot.on_message(filters.group & filters.command("trivia"))
+@pipeline.command("trivia")
 async def start_trivia(_, message):
-    if message.chat.id in trivia_game:
+    async def post_question(entry):
+        sent = await message.reply(f"🧠 **Trivia**: {entry['q']}\n\nआपका उत्तर इस पर रिप्लाई करके दें।")
+        return sent.id
+
+    try:
+        game = await trivia_engine.begin(message.chat.id, post_question)
+    except TriviaBusy:
         return await message.reply("❌ एक क्विज़ पहले से ही चल रही है।")
-    
-    question = random.choice(list(TRIVIA_QUESTIONS.keys()))
-    trivia_game[message.chat.id] = {"question": question, "answer": TRIVIA_QUESTIONS[question]}
-    
-    await message.reply(f"🧠 **Trivia**: {question}\n\nआपका उत्तर इस पर रिप्लाई करके दें।")
+    if game is None:
+        await message.reply("❌ अभी कोई सवाल उपलब्ध नहीं है।")
 
-@bot.on_message(filters.group & filters.text & filters.reply & filters.regex(r'^(?i)\S+'))
-async def check_trivia_answer(_, message):
-    if not message.reply_to_message or message.chat.id not in trivia_game:
-        return
-    
-    if message.reply_to_message.from_user.id != bot.me.id:
-        return
-        
-    if "Trivia" not in message.reply_to_message.text:
-        return
-        
-    if message.text.lower() == trivia_game[message.chat.id]["answer"].lower():
+async def announce_trivia_timeout(game):
+    try:
+        await bot.send_message(
+            game.chat_id,
+            f"⌛ **समय समाप्त!** सही उत्तर था: **{game.answer}**",
+            reply_to_message_id=game.message_id,
+        )
+    except Exception as e:
+        print(f"Failed to announce trivia timeout: {e}")
+
+trivia_engine.on_expire = announce_trivia_timeout
+
+@pipeline.stage(60)
+async def check_trivia_answer(ctx):
+    message = ctx.message
+    if not message.reply_to_message_id or not message.text:
+        return False
+    result = trivia_engine.answer(ctx.chat_id, message.reply_to_message_id, message.text)
+    if result is None:
+        return False
+
+    if result[1]:
         await message.reply(f"🎉 **सही जवाब!** **{message.from_user.first_name}** ने सही जवाब दिया।")
-        del trivia_game[message.chat.id]
     else:
         await message.reply("❌ **गलत जवाब।** फिर से कोशिश करें।")
+    return True
 
-@bot.on_message(filters.group & filters.command("poll"))
+@pipeline.command("poll")
 async def poll_command(_, message):
     args = message.text.split()[1:]
     if len(args) < 3:
@@ -651,119 +897,271 @@ async def poll_command(_, message):
     except Exception as e:
         await message.reply(f"❌ पोल बनाने में एक समस्या आई।\nError: {e}")
 
-@bot.on_message(filters.group & filters.command("couple"))
+@pipeline.command("couple")
 async def couple_command(client, message):
+    chat_id = message.chat.id
     try:
-        members = []
-        async for member in client.get_chat_members(message.chat.id):
-            if not member.user.is_bot:
-                members.append(member.user)
-        
-        if len(members) < 2:
-            await message.reply("❌ इस कमांड के लिए कम से कम 2 सदस्य होने चाहिए।")
-            return
+        couple = member_rosters.couple_of_the_day(chat_id)
+        if couple is None:
+            roster = member_rosters.roster(chat_id)
+            if len(roster) < 2:
+                await member_rosters.seed(client, chat_id)
+            picked = roster.pick(2)
+            if not picked:
+                await message.reply("❌ इस कमांड के लिए कम से कम 2 सदस्य होने चाहिए।")
+                return
+
+            couple = [user.first_name for user in await client.get_users(picked)]
+            member_rosters.remember_couple(chat_id, couple)
 
-        couple = random.sample(members, 2)
-        
         caption = (
             f"❤️ **Group Couple of the Day** ❤️\n\n"
-            f"**{couple[0].first_name}** 💘 **{couple[1].first_name}**"
+            f"**{couple[0]}** 💘 **{couple[1]}**"
         )
         
         await message.reply(caption)
     except Exception as e:
         await message.reply(f"❌ इस कमांड को चलाने में एक समस्या आई।\nError: {e}")
 
-@bot.on_message(filters.group & filters.command("dice"))
+@pipeline.command("dice")
 async def dice_command(client, message):
     await client.send_dice(message.chat.id)
 
-@bot.on_message(filters.group & filters.command("tts"))
+# --- Scheduled messages and auto-delete ---
+AUTO_DELETE_MAX_SECONDS = 48 * 3600  # bots cannot delete group messages older than this
+
+async def run_scheduled_sends(payloads):
+    async def send(job):
+        await send_limiter.acquire(job["chat_id"])
+        await bot.send_message(job["chat_id"], job["text"])
+
+    await fan_out(payloads, send)
+
+async def run_scheduled_deletes(payloads):
+    # One delete_messages call per chat and 100 ids instead of one per message.
+    by_chat = {}
+    for job in payloads:
+        by_chat.setdefault(job["chat_id"], []).append(job["message_id"])
+    chunks = [(chat_id, ids[i:i + 100]) for chat_id, ids in by_chat.items() for i in range(0, len(ids), 100)]
+    await fan_out(chunks, lambda chunk: bot.delete_messages(*chunk))
+
+job_scheduler.register("send", run_scheduled_sends)
+job_scheduler.register("delete", run_scheduled_deletes)
+
+@pipeline.command("schedule")
+async def schedule_message(client, message):
+    if not await is_admin_or_owner(message):
+        return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते।")
+
+    parts = message.text.split(" ", 2)
+    delay = parse_duration(parts[1]) if len(parts) == 3 else None
+    if not delay:
+        return await message.reply("❌ सही इस्तेमाल: `/schedule <time> <text>`\nउदाहरण: `/schedule 1h30m नमस्ते!`")
+
+    job_id = job_scheduler.schedule(delay, "send", {"chat_id": message.chat.id, "text": parts[2]})
+    await message.reply(f"✅ मैसेज {format_duration(delay)} बाद भेजा जाएगा।\nरद्द करने के लिए: `/unschedule {job_id}`")
+
+@pipeline.command("unschedule")
+async def unschedule_message(client, message):
+    if not await is_admin_or_owner(message):
+        return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते।")
+
+    parts = message.text.split()
+    job = job_scheduler.get(int(parts[1])) if len(parts) == 2 and parts[1].isdigit() else None
+    if not job or job[1] != "send" or job[2]["chat_id"] != message.chat.id:
+        return await message.reply("❌ इस ID का कोई शेड्यूल्ड मैसेज नहीं मिला।")
+
+    job_scheduler.cancel(int(parts[1]))
+    await message.reply("✅ शेड्यूल्ड मैसेज रद्द कर दिया गया है।")
+
+@pipeline.command("autodelete")
+async def set_auto_delete(client, message):
+    if not await is_admin_or_owner(message):
+        return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते।")
+
+    parts = message.text.split()
+    if len(parts) == 2 and parts[1].lower() == "off":
+        auto_delete_timers.pop(message.chat.id, None)
+        return await message.reply("✅ ऑटो-डिलीट बंद कर दिया गया है।")
+
+    delay = parse_duration(parts[1]) if len(parts) == 2 else None
+    if not delay or delay > AUTO_DELETE_MAX_SECONDS:
+        return await message.reply("❌ सही इस्तेमाल: `/autodelete <time>` (अधिकतम 48h) या `/autodelete off`")
+
+    auto_delete_timers[message.chat.id] = delay
+    await message.reply(f"✅ अब हर नया मैसेज {format_duration(delay)} बाद अपने-आप डिलीट हो जाएगा।")
+
+@pipeline.command("tts")
 async def tts_command(client, message):
     text = " ".join(message.command[1:])
     if not text:
         return await message.reply("❌ कृपया कोई टेक्स्ट दें।\nसही इस्तेमाल: `/tts नमस्ते, आप कैसे हैं?`")
     
     try:
-        tts = gTTS(text=text, lang='hi', slow=False)
-        tts.save("tts.mp3")
-        await client.send_audio(chat_id=message.chat.id, audio="tts.mp3", caption=f"टेक्स्ट-टू-स्पीच द्वारा भेजा गया:\n`{text}`")
-        os.remove("tts.mp3")
+        speech = await text_to_speech.synthesize(text, lang="hi")
+        await client.send_audio(chat_id=message.chat.id, audio=text_to_speech.as_file(speech), caption=f"टेक्स्ट-टू-स्पीच द्वारा भेजा गया:\n`{text}`")
+    except TTSBusy:
+        await message.reply("⏳ अभी बहुत सारे ऑडियो बन रहे हैं, कृपया थोड़ी देर बाद कोशिश करें।")
     except Exception as e:
         await message.reply(f"❌ ऑडियो बनाने में एक समस्या आई।\nError: {e}")
 
-@bot.on_message(filters.group & filters.command("vtt"))
+@pipeline.command("vtt")
 async def voice_to_text_command(client, message):
     if not message.reply_to_message or not message.reply_to_message.voice:
         return await message.reply("❌ कृपया एक वॉइस मैसेज पर रिप्लाई करें।")
 
     try:
         await message.reply("🔄 ट्रांसक्राइब किया जा रहा है... कृपया प्रतीक्षा करें।")
-        voice_file_path = await message.reply_to_message.download()
-
-        audio = AudioSegment.from_ogg(voice_file_path)
-        audio.export("voice.wav", format="wav")
-
-        recognizer = sr.Recognizer()
-        with sr.AudioFile("voice.wav") as source:
-            audio_data = recognizer.record(source)
-            text = recognizer.recognize_google(audio_data, language="hi-IN")
-            await message.reply(f"🎤 **टेक्स्ट:** `{text}`")
-
-    except sr.UnknownValueError:
+        started = time.monotonic()
+        voice = await message.reply_to_message.download(in_memory=True)
+        voice_to_text.record_download(time.monotonic() - started)
+
+        text = await voice_to_text.transcribe(voice.getvalue(), lang="hi-IN")
+        await message.reply(f"🎤 **टेक्स्ट:** `{text}`")
+    except VTTBusy:
+        await message.reply("⏳ अभी बहुत सारे वॉइस मैसेज कतार में हैं, कृपया थोड़ी देर बाद कोशिश करें।")
+    except SpeechNotRecognized:
         await message.reply("❌ वॉइस को टेक्स्ट में बदल नहीं सका। कृपया स्पष्ट बोलें।")
     except Exception as e:
         await message.reply(f"❌ वॉइस को टेक्स्ट में बदलने में एक समस्या आई।\nError: {e}")
-    finally:
-        if os.path.exists(voice_file_path):
-            os.remove(voice_file_path)
-        if os.path.exists("voice.wav"):
-            os.remove("voice.wav")
 
-@bot.on_message(filters.group & filters.command("getfile"))
+@pipeline.command("speechstats", scope="any", owner_only=True)
+async def speech_stats_command(_, message):
+    tts = text_to_speech.stats()
+    vtt = voice_to_text.stats()
+    stages = "\n".join(
+        f"  • {stage}: औसत {lat['avg'] * 1000:.0f} ms, p95 {lat['p95'] * 1000:.0f} ms ({lat['count']})"
+        for stage, lat in vtt["latency"].items()
+    )
+    await message.reply(
+        "🎙️ **स्पीच आँकड़े**\n\n"
+        f"**TTS:** {tts['entries']} कैश्ड, {tts['pending']} चल रहे, हिट रेट {tts['hit_rate']:.1%}\n"
+        f"**VTT ({vtt['backend']}):** कतार {vtt['queued']}, चल रहे {vtt['busy']}, विफल {vtt['failures']}, अस्पष्ट {vtt['unrecognized']}\n"
+        f"{stages}"
+    )
+
+@pipeline.command("profile", scope="any", owner_only=True)
+async def profile_command(_, message):
+    try:
+        seconds = float(message.command[1]) if len(message.command) > 1 else PROFILE_DEFAULT_SECONDS
+        if not 0 < seconds <= PROFILE_MAX_SECONDS:
+            raise ValueError
+    except ValueError:
+        return await message.reply(f"❌ सही इस्तेमाल: `/profile [seconds]` (अधिकतम {PROFILE_MAX_SECONDS:.0f})")
+
+    if sampling_profiler.running:
+        return await message.reply("⏳ एक प्रोफाइल पहले से चल रही है।")
+    status = await message.reply(f"🔬 {seconds:.0f} सेकंड के लिए प्रोफाइलिंग चल रही है...")
+    try:
+        report = await sampling_profiler.profile(seconds)
+    except ProfilerBusy:
+        return await status.edit_text("⏳ एक प्रोफाइल पहले से चल रही है।")
+
+    document = io.BytesIO(report.encode())
+    document.name = f"profile-{int(time.time())}.txt"
+    await message.reply_document(document, caption=f"🔬 {seconds:.0f} सेकंड की प्रोफाइल: वॉल/CPU टॉप फ़ंक्शन और asyncio टास्क")
+    await status.delete()
+
+def sticker_file_name(sticker) -> str:
+    extension = "tgs" if sticker.is_animated else "webm" if sticker.is_video else "webp"
+    return f"{sticker.file_unique_id}.{extension}"
+
+@pipeline.command("getfile")
 async def get_file_from_sticker(client, message):
     if not message.reply_to_message or not message.reply_to_message.sticker:
         return await message.reply("❌ कृपया एक स्टिकर पर रिप्लाई करें।")
 
     try:
-        file_path = await message.reply_to_message.download()
-        await message.reply_document(document=file_path)
-        os.remove(file_path)
+        sticker = message.reply_to_message.sticker
+        await media_cache.send_once(
+            message.reply_document, "document", f"sticker:{sticker.file_unique_id}",
+            lambda: downloaded_media(message.reply_to_message, sticker, sticker_file_name(sticker)),
+        )
     except Exception as e:
         await message.reply(f"❌ स्टिकर को फ़ाइल में बदलने में समस्या आई।\nError: {e}")
 
-@bot.on_message(filters.group & filters.command("gadminbroadcast") & filters.user(OWNER_ID))
+@pipeline.command("gadminbroadcast", owner_only=True)
 async def group_admin_broadcast(client, message):
     broadcast_text = message.text.split(" ", 1)
     if len(broadcast_text) < 2:
         return await message.reply("❌ कृपया वह मैसेज दें जिसे आप ब्रॉडकास्ट करना चाहते हैं।")
     
-    success_count = 0
-    failure_count = 0
-    
-    async for dialog in client.get_dialogs():
-        if dialog.chat.type in [ChatType.GROUP, ChatType.SUPERGROUP, ChatType.CHANNEL]:
-            try:
-                chat_member = await client.get_chat_member(dialog.chat.id, bot.me.id)
-                if chat_member.status == ChatMemberStatus.ADMINISTRATOR:
-                    await client.send_message(dialog.chat.id, broadcast_text[1])
-                    success_count += 1
-            except Exception:
-                failure_count += 1
-    
-    await message.reply(f"✅ मैसेज सफलतापूर्वक भेजा गया।\nसफलता: {success_count}\nविफलता: {failure_count}")
+    status = await message.reply("⏳ ब्रॉडकास्ट के लिए ग्रुप्स खोजे जा रहे हैं...")
+    targets = chat_registry.admin_chats(("group", "supergroup", "channel"))
+    broadcast_engine.submit(broadcast_text[1], targets, status.chat.id, status.id)
+    queued = broadcast_engine.pending()
+    await status.edit_text(
+        f"📣 ब्रॉडकास्ट कतार में है: {len(targets)} चैट्स"
+        + (f" ({queued} जॉब आगे हैं)" if queued > 1 else "")
+    )
+
+@pipeline.command("syncchats", scope="any", owner_only=True)
+async def sync_chat_registry(client, message):
+    # Re-reads the bot's role in every registered chat. Bots cannot list
+    # their dialogs, so chats join the registry as they are seen and are
+    # kept current from my_chat_member and service-message updates.
+    status = await message.reply("⏳ चैट रजिस्ट्री सिंक हो रही है...")
+    scanned = await chat_registry.refresh()
+    await status.edit_text(f"✅ {scanned} चैट्स सिंक की गईं।")
+
+@pipeline.command("chats", scope="any", owner_only=True)
+async def chat_registry_report(_, message):
+    summary = chat_registry.summary()
+    if not summary:
+        return await message.reply("❌ रजिस्ट्री खाली है। चैट्स उनमें पहला मैसेज आने पर जुड़ती हैं।")
+    lines = ["📋 **चैट रजिस्ट्री**\n"]
+    for (chat_type, role), count in sorted(summary.items()):
+        lines.append(f"**{chat_type}** ({role}): {count}")
+    await message.reply("\n".join(lines))
+
+async def run_global_action(client, message, target_user, action, title: str):
+    status = await message.reply(f"⏳ **{title}** शुरू हो रहा है...")
+    chat_ids = chat_registry.admin_chats()
+
+    async def show_progress(result):
+        await status.edit_text(
+            f"⏳ **{title}**: {result.done + result.failed}/{result.total} ग्रुप्स\n"
+            f"सफलता: {result.done} | विफलता: {result.failed} | FloodWait: {result.flood_waits}"
+        )
+
+    result = await fan_out(chat_ids, lambda chat_id: action(chat_id, target_user.id), on_progress=show_progress)
+    await status.edit_text(
+        f"✅ **{title}** पूरा हुआ ({result.elapsed:.0f}s)\n"
+        f"कुल ग्रुप्स: {result.total}\nसफलता: {result.done}\nविफलता: {result.failed}"
+    )
+    await log_admin_action(title, message.from_user.first_name, target_user.first_name)
+
+@pipeline.command("gban", scope="any", owner_only=True)
+async def global_ban(client, message):
+    target_user = await extract_target_user(message)
+    if not target_user:
+        return
+    # The lookup set keeps enforcing the ban in chats the fan-out missed.
+    gban_list.add(target_user.id)
+    await run_global_action(client, message, target_user, client.ban_chat_member, "Global Ban")
 
-@bot.on_message(filters.group & filters.command("backup") & filters.user(OWNER_ID))
+@pipeline.command("ungban", scope="any", owner_only=True)
+async def global_unban(client, message):
+    target_user = await extract_target_user(message)
+    if not target_user:
+        return
+    gban_list.discard(target_user.id)
+    await run_global_action(client, message, target_user, client.unban_chat_member, "Global Unban")
+
+@pipeline.command("backup", owner_only=True)
 async def backup_data(_, message):
-    save_data()
+    await save_data()
     await message.reply("✅ डेटा का बैकअप सफलतापूर्वक ले लिया गया है।")
 
-@bot.on_message(filters.group & filters.command("restore") & filters.user(OWNER_ID))
+@pipeline.command("restore", owner_only=True)
 async def restore_data(_, message):
-    load_data()
+    try:
+        await bot_store.restore(BACKUP_DB_PATH)
+    except FileNotFoundError:
+        return await message.reply("❌ कोई बैकअप नहीं मिला।")
     await message.reply("✅ डेटा सफलतापूर्वक रीस्टोर कर दिया गया है।")
 
-@bot.on_message(filters.group & filters.command("settitle"))
+@pipeline.command("settitle")
 async def set_group_title(client, message):
     if not await is_admin_or_owner(message):
         return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते।")
@@ -778,7 +1176,7 @@ async def set_group_title(client, message):
     except Exception as e:
         await message.reply(f"❌ शीर्षक बदलने में एक समस्या आई।\nError: {e}")
 
-@bot.on_message(filters.group & filters.command("setphoto"))
+@pipeline.command("setphoto")
 async def set_group_photo(client, message):
     if not await is_admin_or_owner(message):
         return await message.reply("❌ आप यह कमांड इस्तेमाल नहीं कर सकते।")
@@ -787,15 +1185,55 @@ async def set_group_photo(client, message):
         return await message.reply("❌ कृपया एक फ़ोटो पर रिप्लाई करें।")
 
     try:
-        photo_path = await message.reply_to_message.download()
-        await client.set_chat_photo(message.chat.id, photo=photo_path)
+        photo = message.reply_to_message.photo
+        try:
+            # An existing photo can be reused by reference, with no transfer at all.
+            await client.set_chat_photo(message.chat.id, photo=photo.file_id)
+        except errors.BadRequest:
+            async with downloaded_media(message.reply_to_message, photo, "photo.jpg") as source:
+                await client.set_chat_photo(message.chat.id, photo=source)
         await message.reply("✅ ग्रुप की फ़ोटो बदल दी गई है।")
-        os.remove(photo_path)
     except Exception as e:
         await message.reply(f"❌ फ़ोटो बदलने में एक समस्या आई।\nError: {e}")
 
+# Queue depths and cache sizes, read from the owning objects at scrape time.
+metrics.gauge("frozen_scheduled_jobs", "Jobs waiting in the scheduler.", job_scheduler.pending)
+metrics.gauge("frozen_broadcast_jobs_queued", "Broadcast jobs waiting to run.", broadcast_engine.pending)
+metrics.gauge("frozen_vtt_queued", "Voice messages waiting for transcription.", lambda: voice_to_text.stats()["queued"])
+metrics.gauge("frozen_audio_cache_bytes", "Bytes held by the on-disk audio cache.", lambda: audio_cache.stats()["bytes"])
+metrics.gauge(
+    "frozen_admin_roster_lookups", "Admin roster lookups by result.",
+    lambda: {("hit",): admin_roster.hits, ("miss",): admin_roster.misses}, ("result",),
+)
+
+async def run_bot():
+    await load_data()
+    await bot.start()
+    await bot_identity.resolve(bot)
+    pipeline.username = bot_identity.username
+    build_start_keyboard()
+    bot_store.start()
+    activity_store.start()
+    warn_store.start()
+    reputation_store.start()
+    broadcast_engine.start(bot)
+    job_scheduler.start()
+    await metrics_server.start()
+    print("Bot started. Press Ctrl+C to stop.")
+    try:
+        await idle()
+    finally:
+        await metrics_server.stop()
+        await job_scheduler.stop()
+        await broadcast_engine.stop()
+        await voice_to_text.stop()
+        await bot.stop()
+        await activity_store.stop()
+        await warn_store.stop()
+        await reputation_store.stop()
+        await bot_store.stop()
+        await close_http_session()
+
 # The bot will now start and load the data.
 if __name__ == "__main__":
-    load_data()
-    print("Bot started. Press Ctrl+C to stop.")
-    bot.run()
+    bot.run(run_bot())
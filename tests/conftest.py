@@ -0,0 +1,14 @@
+import pytest
+
+from FrozenMusic.infra.storage.kv_store import BotStore
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    return str(tmp_path / "bot.db")
+
+
+@pytest.fixture
+def store(store_path):
+    """A fresh BotStore; tests that reopen it use BotStore(store_path)."""
+    return BotStore(store_path)
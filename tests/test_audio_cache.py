@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+import os
+import threading
+
+from FrozenMusic.telegram_client import audio_cache as audio_cache_module
+from FrozenMusic.telegram_client.audio_cache import AudioCache
+
+
+async def put(cache, url, payload: bytes) -> str:
+    part = await cache.new_part_path()
+    with open(part, "wb") as f:
+        f.write(payload)
+    return await cache.commit(url, part, hashlib.sha256(payload).hexdigest())
+
+
+def test_pinned_blob_survives_eviction(tmp_path):
+    async def main():
+        cache = AudioCache(str(tmp_path), max_bytes=25)
+        playing = await put(cache, "a", b"a" * 10)
+        cache.pin("a")
+        await put(cache, "b", b"b" * 10)
+        await put(cache, "c", b"c" * 10)
+
+        assert os.path.exists(playing)
+        assert await cache.lookup("a") == playing
+        assert await cache.lookup("b") is None
+        assert cache.total_bytes == 20
+
+        cache.pin("c")
+        await put(cache, "d", b"d" * 10)
+        assert cache.total_bytes == 30
+        cache.release("a")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert not os.path.exists(playing)
+        assert cache.total_bytes == 20
+        assert cache.stats()["pinned"] == 1
+
+    asyncio.run(main())
+
+
+def test_lookup_hashes_outside_the_lock(tmp_path, monkeypatch):
+    async def main():
+        cache = AudioCache(str(tmp_path))
+        await put(cache, "big", b"x" * 100)
+        await put(cache, "small", b"y" * 10)
+        # A fresh instance has verified nothing yet, so "big" will be hashed.
+        cache = AudioCache(str(tmp_path))
+        await cache.lookup("small")
+
+        started, proceed = threading.Event(), threading.Event()
+        real_hash = audio_cache_module._hash_file
+
+        def slow_hash(path):
+            if path.endswith(hashlib.sha256(b"x" * 100).hexdigest() + ".mp3"):
+                started.set()
+                proceed.wait(5)
+            return real_hash(path)
+
+        monkeypatch.setattr(audio_cache_module, "_hash_file", slow_hash)
+        big = asyncio.ensure_future(cache.lookup("big"))
+        await asyncio.to_thread(started.wait, 5)
+        assert await asyncio.wait_for(cache.lookup("small"), 1)
+        proceed.set()
+        assert await big
+
+    asyncio.run(main())
+
+
+def test_corrupt_blob_is_dropped(tmp_path):
+    async def main():
+        cache = AudioCache(str(tmp_path))
+        path = await put(cache, "a", b"a" * 10)
+        with open(path, "wb") as f:
+            f.write(b"b" * 10)
+        cache = AudioCache(str(tmp_path))
+        assert await cache.lookup("a") is None
+        assert not os.path.exists(path)
+
+    asyncio.run(main())
+
+
+def test_load_sweeps_only_its_own_leftovers(tmp_path):
+    stray_blob = tmp_path / ("ab" * 32 + ".mp3")
+    part = tmp_path / "0123abcd.part"
+    foreign = ["important.txt", "notes.md", "song.mp3", "AB" * 32 + ".mp3"]
+    for path in [stray_blob, part] + [tmp_path / name for name in foreign]:
+        path.write_bytes(b"x")
+
+    async def main():
+        cache = AudioCache(str(tmp_path))
+        assert await cache.lookup("missing") is None
+
+    asyncio.run(main())
+    assert not stray_blob.exists()
+    assert not part.exists()
+    assert sorted(os.listdir(tmp_path)) == sorted(foreign)
@@ -0,0 +1,30 @@
+import asyncio
+from types import SimpleNamespace
+
+from FrozenMusic.telegram_client.bot_identity import BotIdentity
+
+
+def resolved(monkeypatch, link=None):
+    if link is None:
+        monkeypatch.delenv("BOT_LINK", raising=False)
+    else:
+        monkeypatch.setenv("BOT_LINK", link)
+    identity = BotIdentity()
+    client = SimpleNamespace(me=SimpleNamespace(id=1, username="FrozenHelpBot", first_name="Frozen"))
+    asyncio.run(identity.resolve(client))
+    return identity
+
+
+def test_links_default_to_username(monkeypatch):
+    identity = resolved(monkeypatch)
+    assert identity.link == "https://t.me/FrozenHelpBot"
+    assert identity.startgroup_url == "https://t.me/FrozenHelpBot?startgroup=true"
+
+
+def test_bot_link_overrides_start_group_url(monkeypatch):
+    identity = resolved(monkeypatch, "https://t.me/FrozenMirrorBot/")
+    assert identity.link == "https://t.me/FrozenMirrorBot"
+    assert identity.startgroup_url == "https://t.me/FrozenMirrorBot?startgroup=true"
+    assert resolved(monkeypatch, "https://example.com/bot?ref=1").startgroup_url == (
+        "https://example.com/bot?ref=1&startgroup=true"
+    )
@@ -0,0 +1,65 @@
+import asyncio
+from types import SimpleNamespace
+
+from FrozenMusic.infra.storage.chat_registry import ChatRegistry
+
+
+def group(chat_id, title="Group"):
+    return SimpleNamespace(id=chat_id, title=title, type=SimpleNamespace(name="SUPERGROUP"))
+
+
+def test_new_chat_role_is_looked_up_once(store):
+    lookups = []
+
+    async def role_lookup(chat_id):
+        lookups.append(chat_id)
+        return "administrator"
+
+    registry = ChatRegistry(store, role_lookup=role_lookup)
+
+    async def main():
+        registry.observe(group(-1))
+        assert registry.chats[-1]["role"] == "unknown"
+        registry.observe(group(-1))
+        await asyncio.sleep(0)
+        registry.observe(group(-1))
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert lookups == [-1]
+    assert registry.admin_chats() == [-1]
+
+
+def test_failed_lookup_leaves_role_unknown(store):
+    async def role_lookup(chat_id):
+        raise RuntimeError("CHAT_ADMIN_REQUIRED")
+
+    registry = ChatRegistry(store, role_lookup=role_lookup)
+
+    async def main():
+        registry.observe(group(-1))
+        await asyncio.sleep(0)
+
+    asyncio.run(main())
+    assert registry.chats[-1]["role"] == "unknown"
+    assert registry.admin_chats() == []
+    assert registry.summary() == {("supergroup", "unknown"): 1}
+
+
+def test_refresh_rereads_known_chats(store):
+    roles = {-1: "member", -2: "administrator"}
+
+    async def role_lookup(chat_id):
+        return roles[chat_id]
+
+    registry = ChatRegistry(store, role_lookup=role_lookup)
+
+    async def main():
+        registry.observe(group(-1))
+        registry.observe(group(-2))
+        await asyncio.sleep(0)
+        roles[-1] = "administrator"
+        return await registry.refresh()
+
+    assert asyncio.run(main()) == 2
+    assert sorted(registry.admin_chats()) == [-2, -1]
@@ -0,0 +1,122 @@
+import asyncio
+import random
+
+from FrozenMusic.infra.storage.counters import CounterStore, RankedCounter
+from FrozenMusic.infra.storage.kv_store import BotStore
+
+
+def assert_consistent(ranked: RankedCounter, reference: dict) -> None:
+    assert ranked.counts == reference
+    bucket, previous, seen = ranked.head, None, 0
+    while bucket is not None:
+        assert bucket.users, "empty bucket left linked"
+        assert previous is None or previous.count > bucket.count
+        assert bucket.higher is previous
+        assert all(reference[user] == bucket.count for user in bucket.users)
+        previous, bucket, seen = bucket, bucket.lower, seen + 1
+    assert ranked.tail is previous
+    assert seen == len(ranked.buckets)
+
+
+def test_ranked_counter_matches_plain_dict():
+    rng = random.Random(1)
+    ranked, reference = RankedCounter(), {}
+    for step in range(200000):
+        user = rng.randrange(300)
+        op = rng.random()
+        if op < 0.6:
+            assert ranked.step(user, up=True) == reference.get(user, 0) + 1
+            reference[user] = reference.get(user, 0) + 1
+        elif op < 0.95:
+            expected = max(reference.get(user, 0) - 1, 0)
+            assert ranked.step(user, up=False) == expected
+            if expected:
+                reference[user] = expected
+            else:
+                reference.pop(user, None)
+        else:
+            ranked.remove(user)
+            reference.pop(user, None)
+        if step % 10000 == 0:
+            assert_consistent(ranked, reference)
+
+    assert_consistent(ranked, reference)
+    for n in (1, 10, 50, 1000):
+        assert [count for _, count in ranked.top(n)] == sorted(reference.values(), reverse=True)[:n]
+        assert all(reference[user] == count for user, count in ranked.top(n))
+
+
+def test_from_counts_builds_the_same_index():
+    counts = {1: 5, 2: 5, 3: 1, 4: 9}
+    ranked = RankedCounter.from_counts(counts)
+    assert_consistent(ranked, counts)
+    ranked.step(3)
+    ranked.step(4, up=False)
+    assert_consistent(ranked, {1: 5, 2: 5, 3: 2, 4: 8})
+    assert ranked.top(1) == [(4, 8)]
+
+
+def test_empty_counter():
+    ranked = RankedCounter()
+    assert ranked.step(1, up=False) == 0
+    ranked.remove(1)
+    assert ranked.top(5) == [] and ranked.head is None and ranked.tail is None
+
+
+def test_counter_stores_flush_and_reload(store_path):
+
+    def open_stores():
+        store = BotStore(store_path)
+        return store, CounterStore("warns", store), CounterStore("reputation", store)
+
+    async def write():
+        store, warns, reps = open_stores()
+        await store.load()
+        warns.incr(-1, 5)
+        warns.incr(-1, 5)
+        warns.incr(-1, 6)
+        warns.decr(-1, 6)
+        warns.incr(-2, 5)
+        reps.incr(-1, 5)
+        reps.incr(-1, 7)
+        reps.reset(-1, 7)
+        await warns.flush()
+        await reps.flush()
+        # Nothing dirty: a second flush queues no writes.
+        await warns.flush()
+        await store.stop()
+
+    async def read():
+        store, warns, reps = open_stores()
+        await store.load()
+        assert warns.top(-1) == [(5, 2)]
+        assert warns.get(-1, 6) == 0
+        assert warns.get(-2, 5) == 1
+        assert reps.top(-1) == [(5, 1)]
+        assert reps.get(-1, 7) == 0
+        rows = await store.run(lambda conn: conn.execute("SELECT COUNT(*) FROM counters").fetchone()[0])
+        assert rows == 3
+        await store.stop()
+
+    asyncio.run(write())
+    asyncio.run(read())
+
+
+def test_stop_flushes_pending_counts(store_path):
+
+    async def main():
+        store = BotStore(store_path)
+        warns = CounterStore("warns", store)
+        await store.load()
+        warns.start(interval=3600)
+        warns.incr(-1, 1)
+        await warns.stop()
+        await store.stop()
+
+        store = BotStore(store_path)
+        warns = CounterStore("warns", store)
+        await store.load()
+        assert warns.get(-1, 1) == 1
+        await store.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,83 @@
+from FrozenMusic.infra.moderation.flood import FloodDetector
+
+CHAT, USER = -100, 7
+
+
+def detector(store, limit=3, window=6.0, **kwargs):
+    flood = FloodDetector(store=store, **kwargs)
+    flood.configure(CHAT, limit=limit, window=window)
+    return flood
+
+
+def burst(flood, count, now, user=USER):
+    return [flood.hit(CHAT, user, now=now) for _ in range(count)]
+
+
+def test_limit_messages_pass_then_warn(store):
+    flood = detector(store)
+    assert burst(flood, 3, now=0.0) == [None, None, None]
+    assert flood.hit(CHAT, USER, now=0.0) == "warn"
+    # The rest of the same burst is not punished twice.
+    assert burst(flood, 5, now=1.0) == [None] * 5
+
+
+def test_bucket_refills_at_limit_per_window(store):
+    flood = detector(store)
+    burst(flood, 3, now=0.0)
+    # 3 tokens per 6 s: one token is back after exactly 2 s, not before.
+    assert flood.hit(CHAT, USER, now=1.999) == "warn"
+    flood = detector(store)
+    burst(flood, 3, now=0.0)
+    assert flood.hit(CHAT, USER, now=2.0) is None
+
+
+def test_quiet_window_boundary(store):
+    flood = detector(store, limit=1, window=10.0)
+    assert flood.hit(CHAT, USER, now=0.0) is None
+    assert flood.hit(CHAT, USER, now=0.0) == "warn"
+    # Dry again inside the quiet window: same burst, no new strike.
+    assert flood.hit(CHAT, USER, now=9.0) is None
+    # At quiet_until the refilled token passes and the next dry hit is a
+    # fresh strike.
+    assert flood.hit(CHAT, USER, now=10.0) is None
+    assert flood.hit(CHAT, USER, now=10.0) == "tmute"
+
+
+def test_escalation_warn_tmute_ban(store):
+    flood = detector(store, limit=1, window=1.0)
+    steps = []
+    for round_start in (0.0, 1.0, 2.0, 3.0):
+        steps.append(burst(flood, 2, now=round_start)[-1])
+    assert steps == ["warn", "tmute", "ban", "ban"]
+
+
+def test_strikes_decay_after_strike_ttl(store):
+    flood = detector(store, limit=1, window=1.0, strike_ttl=100.0)
+    assert burst(flood, 2, now=0.0)[-1] == "warn"
+    # Exactly strike_ttl later the strike still counts...
+    assert burst(flood, 2, now=100.0)[-1] == "tmute"
+    # ...but a gap longer than strike_ttl starts over.
+    assert burst(flood, 2, now=200.5)[-1] == "warn"
+
+
+def test_users_and_chats_are_independent(store):
+    flood = detector(store, limit=1)
+    assert flood.hit(CHAT, USER, now=0.0) is None
+    assert flood.hit(CHAT, USER + 1, now=0.0) is None
+    assert flood.hit(CHAT - 1, USER, now=0.0) is None
+    assert flood.hit(CHAT, USER, now=0.0) == "warn"
+
+
+def test_disabled_chat_is_never_flagged(store):
+    flood = detector(store, limit=1)
+    flood.configure(CHAT, enabled=False)
+    assert burst(flood, 10, now=0.0) == [None] * 10
+
+
+def test_idle_users_expire(store):
+    flood = detector(store, idle_ttl=60.0)
+    flood.hit(CHAT, USER, now=0.0)
+    flood.hit(CHAT, USER + 1, now=30.0)
+    assert len(flood) == 2
+    flood.hit(CHAT, USER + 2, now=61.0)
+    assert len(flood) == 2
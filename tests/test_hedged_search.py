@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from FrozenMusic.infra.vector.hedged_search import CircuitBreaker, HedgedSearch  # noqa: E402
+
+
+def half_open(breaker: CircuitBreaker) -> None:
+    breaker.state = CircuitBreaker.OPEN
+    breaker.opened_at = -breaker.cooldown
+
+
+def test_probe_slot_released_when_cancelled_before_start():
+    async def never(query):
+        await asyncio.Event().wait()
+
+    async def main():
+        search = HedgedSearch(primary=never, backup=never)
+        breaker = search.breakers["primary"]
+        half_open(breaker)
+        assert breaker.allow()
+        task = search._launch("primary", "song", True)
+        # Cancelled before the task's first step, so _call's body never runs.
+        task.cancel()
+        await asyncio.sleep(0.01)
+        assert task.cancelled()
+        assert not breaker.probe_in_flight
+        assert breaker.allow()
+
+    asyncio.run(main())
+
+
+def test_losing_hedge_gives_back_its_probe():
+    async def slow(query):
+        await asyncio.sleep(0.05)
+        return "primary"
+
+    async def never(query):
+        await asyncio.Event().wait()
+
+    async def main():
+        search = HedgedSearch(primary=slow, backup=never)
+        for _ in range(20):
+            search.latency["primary"].record(0.001)
+        half_open(search.breakers["backup"])
+        assert await search.search("song") == "primary"
+        await asyncio.sleep(0.01)
+        assert search.hedges_fired == 1
+        assert not search.breakers["backup"].probe_in_flight
+
+    asyncio.run(main())
+
+
+def test_primary_cut_short_by_a_hedge_still_counts():
+    async def never(query):
+        await asyncio.Event().wait()
+
+    async def fast(query):
+        return "backup"
+
+    async def main():
+        search = HedgedSearch(primary=never, backup=fast)
+        tracker = search.latency["primary"]
+        for _ in range(20):
+            tracker.record(0.02)
+        assert await search.search("song") == "backup"
+        assert search.hedges_won == 1
+        # The cancelled primary ran for at least the hedge delay.
+        assert len(tracker.samples) == 21
+        assert tracker.samples[-1] >= 0.02
+
+    asyncio.run(main())
+
+
+def test_breaker_opens_and_recovers():
+    breaker = CircuitBreaker("test", failures=2, cooldown=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+from FrozenMusic.infra.storage.kv_store import BotStore, PersistentDict, PersistentSet
+
+
+def test_round_trip_is_lazy(store_path):
+
+    async def write():
+        store = BotStore(store_path)
+        await store.load()
+        notes = store.dict("notes")
+        gbans = store.set("gbans")
+        notes[-100123] = {"rules": "be nice"}
+        notes[(1, 2)] = [3]
+        notes["gone"] = 1
+        del notes["gone"]
+        gbans.update([5, 6])
+        gbans.discard(6)
+        await store.stop()
+
+    async def read():
+        store = BotStore(store_path)
+        await store.load()
+        notes = store.dict("notes")
+        gbans = store.set("gbans")
+        untouched = store.dict("untouched")
+        assert not store.loaded(notes) and not store.loaded(gbans)
+
+        assert notes[-100123] == {"rules": "be nice"}
+        assert store.loaded(notes) and type(notes) is PersistentDict
+        assert notes[(1, 2)] == [3]
+        assert "gone" not in notes
+
+        await gbans.warm()
+        assert type(gbans) is PersistentSet
+        assert gbans == {5}
+        assert not store.loaded(untouched)
+        await store.stop()
+
+    asyncio.run(write())
+    asyncio.run(read())
+
+
+def test_write_before_first_read_keeps_stored_rows(store_path):
+
+    async def main():
+        store = BotStore(store_path)
+        store.dict("warns")[1] = 2
+        await store.stop()
+
+        store = BotStore(store_path)
+        await store.load()
+        warns = store.dict("warns")
+        warns[3] = 4
+        assert dict(warns) == {1: 2, 3: 4}
+        await store.stop()
+
+    asyncio.run(main())
+
+
+def test_restore_reloads_tables(tmp_path, store):
+    backup = str(tmp_path / "backup.db")
+
+    async def main():
+        await store.load()
+        table = store.dict("t")
+        table["a"] = 1
+        await store.backup(backup)
+        table["a"] = 2
+        await store.flush()
+        await store.restore(backup)
+        assert not store.loaded(table)
+        assert table["a"] == 1
+        await store.stop()
+
+    asyncio.run(main())
+
+
+def test_legacy_json_import_uses_int_ids(tmp_path, store_path):
+    legacy = tmp_path / "bot_data.json"
+    legacy.write_text(json.dumps({
+        "notes_data": {"-100123": {"rules": "old"}, "-100456": {"faq": "x"}},
+        "gban_list": [42, "43"],
+        "not_a_table": {"1": 1},
+    }))
+
+    async def main():
+        store = BotStore(store_path)
+        await store.load()
+        notes = store.dict("notes_data")
+        gbans = store.set("gban_list")
+        notes[-100123] = {"rules": "new"}
+
+        assert await store.import_json(str(legacy))
+        assert not legacy.exists()
+        assert (tmp_path / "bot_data.json.migrated").exists()
+        assert set(notes) == {-100123, -100456}
+        assert gbans == {42, 43}
+        assert not await store.import_json(str(legacy))
+        await store.stop()
+
+        store = BotStore(store_path)
+        await store.load()
+        assert set(store.dict("notes_data")) == {-100123, -100456}
+        assert store.set("gban_list") == {42, 43}
+        await store.stop()
+
+    asyncio.run(main())
+
+
+def test_load_hook_warms_tables_across_restore(tmp_path, store, caplog):
+    backup = str(tmp_path / "backup.db")
+
+    async def main():
+        hot = store.dict("hot")
+        store.on_load(hot.warm)
+        await store.load()
+        assert store.loaded(hot)
+        hot["a"] = 1
+        await store.backup(backup)
+        await store.restore(backup)
+        assert store.loaded(hot)
+        assert not caplog.records
+
+        cold = store.dict("cold")
+        assert cold.get("x") is None
+        await store.stop()
+
+    with caplog.at_level("WARNING"):
+        asyncio.run(main())
+    assert "cold read on the event loop" in caplog.text
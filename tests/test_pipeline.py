@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+
+from FrozenMusic.infra.moderation.flood import FLOOD_STAGE, FloodDetector, flood_check
+from FrozenMusic.telegram_client.pipeline import MessageContext, MessagePipeline, parse_command
+
+CHAT, USER = -100, 7
+
+
+def group_message(text, user=USER):
+    return SimpleNamespace(
+        chat=SimpleNamespace(id=CHAT, type=SimpleNamespace(name="SUPERGROUP")),
+        from_user=SimpleNamespace(id=user),
+        text=text,
+        caption=None,
+    )
+
+
+def flood_pipeline(store):
+    async def not_admin(client, chat_id, user_id):
+        return False
+
+    async def punish(client, message, action):
+        punished.append(action)
+
+    flood = FloodDetector(store=store)
+    flood.configure(CHAT, limit=3, window=60.0)
+    pipeline = MessagePipeline(admin_check=not_admin, owner_id=1)
+    ran, punished = [], []
+
+    @pipeline.command("dice")
+    async def dice(client, message):
+        ran.append(message.command)
+
+    pipeline.stage(FLOOD_STAGE)(flood_check(flood, punish))
+    return pipeline, ran, punished
+
+
+def test_parse_command_targets_this_bot_only():
+    assert parse_command("/Warn@MyBot 3 spam", "mybot") == ["warn", "3", "spam"]
+    assert parse_command("/warn@OtherBot", "mybot") is None
+    assert parse_command("hello", "mybot") is None
+
+
+def test_flooding_user_commands_are_throttled(store):
+    pipeline, ran, punished = flood_pipeline(store)
+
+    async def spam():
+        return [
+            await pipeline._dispatch(MessageContext(pipeline, None, group_message("/dice"), None))
+            for _ in range(5)
+        ]
+
+    steps = asyncio.run(spam())
+    assert steps == ["/dice"] * 3 + ["check_flood"] * 2
+    assert len(ran) == 3
+    # Punished once; the rest of the burst is dropped without a new strike.
+    assert punished == ["warn"]
+
+
+def test_plain_messages_in_a_punished_burst_reach_later_stages(store):
+    pipeline, ran, punished = flood_pipeline(store)
+    checked = []
+
+    @pipeline.stage(16)
+    async def enforce_content_policy(ctx):
+        checked.append(ctx.text)
+        return False
+
+    async def chatter():
+        return [await pipeline._dispatch(MessageContext(pipeline, None, group_message("hi"), None)) for _ in range(5)]
+
+    assert asyncio.run(chatter()) == ["pass"] * 3 + ["check_flood", "pass"]
+    assert len(checked) == 4
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pyrogram")
+
+from pyrogram.enums import MessageEntityType  # noqa: E402
+
+from FrozenMusic.infra.moderation.policy import CLEAN, ChatPolicy, _utf16_slice, normalize_domain  # noqa: E402
+
+
+def message(text="", entities=None, document=None):
+    return SimpleNamespace(text=text, caption=None, entities=entities, caption_entities=None, document=document)
+
+
+def entity(kind, offset=0, length=0, url=None):
+    return SimpleNamespace(type=kind, offset=offset, length=length, url=url)
+
+
+def utf16_span(text: str, part: str):
+    start = text.index(part)
+    return len(text[:start].encode("utf-16-le")) // 2, len(part.encode("utf-16-le")) // 2
+
+
+def test_utf16_slice_counts_code_units():
+    text = "😀 नमस्ते see example.com now"
+    offset, length = utf16_span(text, "example.com")
+    assert offset != text.index("example.com")
+    assert _utf16_slice(text.encode("utf-16-le"), offset, length) == "example.com"
+
+
+def test_url_entity_after_astral_characters():
+    text = "😀😀 visit evil.org today"
+    offset, length = utf16_span(text, "evil.org")
+    policy = ChatPolicy(profanity=())
+    verdict = policy.check(message(text, [entity(MessageEntityType.URL, offset, length)]))
+    assert verdict.bad_link
+
+    policy.add_whitelist("evil.org")
+    assert policy.check(message(text, [entity(MessageEntityType.URL, offset, length)])) is CLEAN
+
+
+def test_text_link_entity_uses_its_url():
+    policy = ChatPolicy(profanity=())
+    policy.add_whitelist("example.com")
+    hidden = message("click here", [entity(MessageEntityType.TEXT_LINK, 0, 10, url="https://spam.net/x")])
+    assert policy.check(hidden).bad_link
+    allowed = message("click here", [entity(MessageEntityType.TEXT_LINK, 0, 10, url="https://example.com/x")])
+    assert policy.check(allowed) is CLEAN
+
+
+@pytest.mark.parametrize("url, allowed", [
+    ("https://example.com/page", True),
+    ("http://a.b.example.com", True),
+    ("t.me/example.com", False),
+    ("https://notexample.com", False),
+    ("https://example.com.evil.net", False),
+    ("https://user@example.com:8080/x", True),
+])
+def test_whitelist_suffix_matching(url, allowed):
+    policy = ChatPolicy(profanity=())
+    policy.add_whitelist("https://Example.com/")
+    assert policy.is_whitelisted(url) is allowed
+
+
+def test_link_and_profanity_detection_in_plain_text():
+    policy = ChatPolicy(profanity=("badword",))
+    assert policy.check(message("hello there")) is CLEAN
+    assert policy.check(message("join t.me/somechannel")).bad_link
+    assert policy.check(message("see https://x.io")).bad_link
+    verdict = policy.check(message("you BADWORD"))
+    assert verdict.profanity and not verdict.bad_link
+
+
+def test_restricted_extension():
+    policy = ChatPolicy(profanity=())
+    assert policy.restrict_extension("EXE") == ".exe"
+    assert policy.check(message(document=SimpleNamespace(file_name="setup.Exe"))).restricted_file
+    assert policy.check(message(document=SimpleNamespace(file_name="notes.txt"))) is CLEAN
+
+
+def test_normalize_domain():
+    assert normalize_domain("https://Sub.Example.com/path?q#f") == "sub.example.com"
+    assert normalize_domain("example.com.") == "example.com"
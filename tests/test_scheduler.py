@@ -0,0 +1,60 @@
+import asyncio
+
+from FrozenMusic.infra.chrono.scheduler import JobScheduler
+from FrozenMusic.infra.storage.kv_store import BotStore
+
+
+def warn_key(job):
+    return (job["chat_id"], job["user_id"])
+
+
+def test_cancel_key_removes_only_matching_jobs(store, store_path):
+    async def main(store):
+        scheduler = JobScheduler(store)
+        scheduler.index("warn_expiry", warn_key)
+        await store.load()
+        for user_id in (1, 1, 2):
+            scheduler.schedule(60, "warn_expiry", {"chat_id": -1, "user_id": user_id})
+        scheduler.schedule(60, "delete", {"chat_id": -1, "user_id": 1})
+
+        assert scheduler.cancel_key("warn_expiry", (-1, 1)) == 2
+        assert scheduler.cancel_key("warn_expiry", (-1, 1)) == 0
+        assert scheduler.pending() == 2
+        await store.flush()
+        await store.stop()
+
+        # The index is rebuilt from the stored payloads on load.
+        store = BotStore(store_path)
+        scheduler = JobScheduler(store)
+        scheduler.index("warn_expiry", warn_key)
+        await store.load()
+        kinds = sorted((scheduler.get(job_id)[1], scheduler.get(job_id)[2]["user_id"]) for job_id in scheduler._jobs)
+        assert kinds == [("delete", 1), ("warn_expiry", 2)]
+        assert scheduler.cancel_key("warn_expiry", (-1, 2)) == 1
+        assert scheduler.pending() == 1
+        await store.stop()
+
+    asyncio.run(main(store))
+
+
+def test_index_drops_jobs_once_they_run(store):
+    async def main():
+        scheduler = JobScheduler(store)
+        scheduler.index("warn_expiry", warn_key)
+        await store.load()
+        ran = []
+
+        async def expire(payloads):
+            ran.extend(payloads)
+
+        scheduler.register("warn_expiry", expire)
+        scheduler.schedule(0, "warn_expiry", {"chat_id": -1, "user_id": 1})
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        await store.stop()
+        return ran, scheduler._keyed
+
+    ran, keyed = asyncio.run(main())
+    assert ran == [{"chat_id": -1, "user_id": 1}]
+    assert keyed == {}
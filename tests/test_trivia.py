@@ -0,0 +1,79 @@
+import asyncio
+
+from FrozenMusic.infra.games.trivia import TriviaBusy, TriviaEngine
+
+CHAT = -100
+ENTRY = {"q": "Capital of India?", "a": ["New Delhi", "Delhi"]}
+
+
+class SlowBank:
+    async def draw(self):
+        await asyncio.sleep(0.01)
+        return ENTRY
+
+    def __len__(self):
+        return 1
+
+
+def test_concurrent_starts_in_one_chat_run_one_game():
+    engine = TriviaEngine(bank=SlowBank(), timeout=60)
+    message_ids = iter(range(1, 100))
+
+    async def post(entry):
+        await asyncio.sleep(0)
+        return next(message_ids)
+
+    async def start():
+        try:
+            return await engine.begin(CHAT, post)
+        except TriviaBusy:
+            return None
+
+    async def scenario():
+        return await asyncio.gather(start(), start())
+
+    games = asyncio.run(scenario())
+    assert sum(game is not None for game in games) == 1
+    assert engine.stats()["active"] == 1
+
+
+def test_failed_start_frees_the_chat():
+    engine = TriviaEngine(bank=SlowBank(), timeout=60)
+
+    async def broken_post(entry):
+        raise RuntimeError("CHAT_WRITE_FORBIDDEN")
+
+    async def scenario():
+        try:
+            await engine.begin(CHAT, broken_post)
+        except RuntimeError:
+            pass
+        return engine.active_in(CHAT)
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_empty_bank_starts_nothing():
+    class EmptyBank(SlowBank):
+        async def draw(self):
+            return None
+
+    engine = TriviaEngine(bank=EmptyBank(), timeout=60)
+
+    async def post(entry):
+        raise AssertionError("nothing to post")
+
+    assert asyncio.run(engine.begin(CHAT, post)) is None
+    assert not engine.active_in(CHAT)
+
+
+def test_answers_are_normalized():
+    engine = TriviaEngine(bank=SlowBank(), timeout=60)
+
+    async def scenario():
+        engine.start(CHAT, 5, ENTRY)
+        wrong = engine.answer(CHAT, 5, "Mumbai")
+        right = engine.answer(CHAT, 5, "  new DELHI! ")
+        return wrong[1], right[1], engine.active_in(CHAT)
+
+    assert asyncio.run(scenario()) == (False, True, False)
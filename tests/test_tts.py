@@ -0,0 +1,14 @@
+import logging
+
+from FrozenMusic.infra.speech.tts import GTTSBackend, SilentBackend, backend_from_name
+
+
+def test_known_backend_is_used():
+    assert isinstance(backend_from_name("silent"), SilentBackend)
+
+
+def test_unknown_backend_falls_back_with_warning(caplog):
+    with caplog.at_level(logging.WARNING):
+        backend = backend_from_name("espeak-ng")
+    assert isinstance(backend, GTTSBackend)
+    assert "espeak-ng" in caplog.text
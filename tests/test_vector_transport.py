@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("aiofiles")
+psutil = pytest.importorskip("psutil")
+
+from FrozenMusic.telegram_client import vector_transport  # noqa: E402
+from FrozenMusic.telegram_client.audio_cache import AudioCache  # noqa: E402
+
+URL = "https://youtu.be/shared"
+PAYLOAD = [b"a" * 100, b"b" * 100]
+
+
+class FakeResponse:
+    status = 200
+
+    def __init__(self, session):
+        self.session = session
+        self.content = self
+        self.chunks = list(PAYLOAD)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def read(self, size):
+        await self.session.gate.wait()
+        return self.chunks.pop(0) if self.chunks else b""
+
+
+class FakeSession:
+    def __init__(self):
+        self.requests = 0
+        self.gate = asyncio.Event()
+
+    def get(self, url, timeout=None):
+        self.requests += 1
+        return FakeResponse(self)
+
+
+def test_concurrent_callers_share_one_transfer(tmp_path, monkeypatch):
+    cache = AudioCache(str(tmp_path))
+    monkeypatch.setattr(vector_transport, "audio_cache", cache)
+    # Keep the test process at its own priority.
+    monkeypatch.setattr(psutil.Process, "nice", lambda self, value=None: 0)
+
+    async def main():
+        session = FakeSession()
+        monkeypatch.setattr(vector_transport, "get_http_session", lambda: session)
+        leaving = asyncio.ensure_future(vector_transport.vector_transport_resolver(URL))
+        staying = asyncio.ensure_future(vector_transport.vector_transport_resolver(URL))
+        # Both callers pinned the url and the transfer is blocked mid-stream.
+        while cache.stats()["pinned"] < 2 or session.requests == 0:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+
+        leaving.cancel()
+        await asyncio.sleep(0)
+        session.gate.set()
+        path = await staying
+
+        assert leaving.cancelled()
+        assert session.requests == 1
+        with open(path, "rb") as f:
+            assert f.read() == b"".join(PAYLOAD)
+        # The cancelled caller gave its pin back; the one playing keeps it.
+        assert cache.stats()["pinned"] == 1
+        assert not vector_transport._INFLIGHT_DOWNLOADS
+
+    asyncio.run(main())
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from FrozenMusic.infra.speech import vtt
+
+
+def _thread_pool(max_workers, mp_context=None):
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def test_unrecognized_speech_is_not_a_failure(monkeypatch):
+    def job(ogg, lang, backend):
+        if ogg == b"silence":
+            raise vtt.SpeechNotRecognized()
+        raise RuntimeError("backend down")
+
+    monkeypatch.setattr(vtt, "ProcessPoolExecutor", _thread_pool)
+    monkeypatch.setattr(vtt, "transcribe_job", job)
+
+    async def scenario():
+        engine = vtt.VoiceToText(workers=1)
+        try:
+            with pytest.raises(vtt.SpeechNotRecognized):
+                await engine.transcribe(b"silence")
+            with pytest.raises(RuntimeError):
+                await engine.transcribe(b"speech")
+            return engine.stats()
+        finally:
+            await engine.stop()
+
+    stats = asyncio.run(scenario())
+    assert stats["unrecognized"] == 1
+    assert stats["failures"] == 1
+
+
+def test_unknown_backend_falls_back_with_warning(caplog):
+    with caplog.at_level(logging.WARNING):
+        engine = vtt.VoiceToText(backend="gogle")
+    assert engine.backend == vtt.DEFAULT_VTT_BACKEND
+    assert "gogle" in caplog.text
+
+
+def test_missing_vosk_package_falls_back(monkeypatch, caplog):
+    monkeypatch.setattr(vtt.importlib.util, "find_spec", lambda name: None)
+    with caplog.at_level(logging.WARNING):
+        assert vtt.recognizer_from_name("vosk") == vtt.DEFAULT_VTT_BACKEND
+    assert "vosk" in caplog.text